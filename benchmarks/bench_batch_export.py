@@ -0,0 +1,60 @@
+"""
+Batch export of 50 projects (2,000 segments, 40 nodes each) from the command
+line: every project in one `nodeflow.py export --all-projects` process, per
+format, against one process per project as a scheduled job would otherwise
+run. The per-process cost is measured on a few projects and scaled up.
+
+Run from the repository root:
+    python -m benchmarks.bench_batch_export
+"""
+
+import os
+import subprocess
+import sys
+
+import nodeflow
+from benchmarks.fixtures import build_project, temp_database, timed
+
+PROJECTS = 50
+SEGMENTS = 2000
+NODES = 40
+# Projects exported one process each, to estimate the per-process cost
+PROCESS_SAMPLE = 5
+
+
+def main():
+    with temp_database() as temp_dir:
+        print(f"Building {PROJECTS} projects: {SEGMENTS} segments, {NODES} nodes...")
+        for i in range(PROJECTS):
+            build_project(
+                name=f"Project {i + 1}",
+                documents=10,
+                nodes=NODES,
+                segments=SEGMENTS,
+                seed=i,
+            )
+        db_file = os.path.join(temp_dir, "nodeflow.db")
+        results = {}
+        for fmt in nodeflow.PROJECT_WRITERS:
+            out = os.path.join(temp_dir, fmt)
+            args = ["export", "--database", db_file, "--format", fmt, "--quiet"]
+            with timed(f"{fmt}: {PROJECTS} projects, one process", results):
+                nodeflow.main(args + ["--all-projects", "--out", out])
+
+            label = f"{fmt}: {PROCESS_SAMPLE} projects, process each"
+            with timed(label, results):
+                for i in range(PROCESS_SAMPLE):
+                    subprocess.run(
+                        [sys.executable, "nodeflow.py"]
+                        + args
+                        + ["--project", f"Project {i + 1}"]
+                        + ["--out", os.path.join(out, f"single.{fmt}")],
+                        check=True,
+                        stdout=subprocess.DEVNULL,
+                    )
+            estimate = results[label] * PROJECTS / PROCESS_SAMPLE / 1000
+            print(f"    about {estimate:.1f} s for all {PROJECTS} projects")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Times coding one segment in an open workspace: the views applying the
+SegmentAdded event in place versus the full reload of every view that
+coding used to trigger.
+
+Run from the repository root:
+    python -m benchmarks.bench_change_events
+"""
+
+import os
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtGui import QTextCursor  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+import database  # noqa: E402
+from benchmarks.fixtures import build_project, temp_database, timed  # noqa: E402
+from managers.query_executor import (  # noqa: E402
+    get_query_executor,
+    shutdown_query_executor,
+)
+from ui.workspace.workspace_view import WorkspaceView  # noqa: E402
+
+SEGMENTS = 5000
+CODINGS = 10
+
+
+def drain(app, workspace):
+    """Runs the event loop until every queued load and tree rebuild has landed."""
+    while (
+        get_query_executor().pending_count()
+        or workspace.node_tree_manager._reload_scheduled
+    ):
+        app.processEvents()
+        time.sleep(0.001)
+    app.processEvents()
+
+
+def select(workspace, start, end):
+    # Signals blocked: only the coding is timed, not the views following the cursor
+    text_edit = workspace.center_pane.text_edit
+    text_edit.blockSignals(True)
+    cursor = text_edit.textCursor()
+    cursor.setPosition(start)
+    cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+    text_edit.setTextCursor(cursor)
+    text_edit.blockSignals(False)
+
+
+def main():
+    app = QApplication.instance() or QApplication([])
+    with temp_database():
+        print(f"Building project: {SEGMENTS} segments over 5 documents...")
+        project_id = build_project(documents=5, nodes=30, segments=SEGMENTS)
+        workspace = WorkspaceView(project_id, "Benchmark", lambda: None)
+        drain(app, workspace)
+        node_id = database.get_nodes_for_project(project_id)[-1]["id"]
+        print(
+            f"  current document holds "
+            f"{len(workspace.center_pane._coded_segments_cache)} segments"
+        )
+
+        results = {}
+        with timed(f"code segment, change events x{CODINGS}", results):
+            for i in range(CODINGS):
+                select(workspace, i * 10, i * 10 + 30)
+                workspace.code_selection(node_id)
+                drain(app, workspace)
+
+        with timed(f"code segment, full reload x{CODINGS}", results):
+            for i in range(CODINGS):
+                doc_id = workspace.center_pane.current_document_id
+                database.add_coded_segment(
+                    doc_id,
+                    node_id,
+                    workspace.center_pane.current_participant_id,
+                    i * 10,
+                    i * 10 + 30,
+                    "benchmark",
+                )
+                workspace.bottom_pane.reload_view()
+                workspace.center_pane.apply_all_highlights()
+                workspace.node_tree_manager.load_nodes()
+                workspace.participant_manager.load_participants()
+                drain(app, workspace)
+        shutdown_query_executor()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Excel export of a 200k segment, 2,000 node project through the streaming
+engine (managers/excel_export.py): openpyxl write-only sheets fed from a
+node-to-segments index with set-based family membership.
+
+The in-memory Workbook exporter it replaces filtered every segment against
+a list of family ids for every sheet. It only runs on a 20k segment, 200
+node project here; at full size its filter alone is timed on a sample of
+sheets. Peak memory is the tracemalloc peak while writing, measured in a
+second run so tracing does not slow the timed one.
+
+Run from the repository root:
+    python -m benchmarks.bench_excel_export
+"""
+
+import os
+import re
+import tracemalloc
+
+import openpyxl
+from openpyxl.styles import Font
+
+import database
+from benchmarks.fixtures import build_project, temp_database, timed
+from managers.excel_export import NodeIndex, write_family_sheet, write_node_sheets
+
+SIZES = [(20000, 200), (200000, 2000)]
+LEGACY_MAX_SEGMENTS = 20000
+# Sheets, evenly spread, the old list-membership filter is timed on at full size
+LEGACY_SAMPLE_SHEETS = 100
+
+
+def legacy_export_to_excel(file_path, nodes, coded_segments):
+    """export_to_excel as it was: an in-memory Workbook and list membership tests."""
+    nodes_by_id = {n["id"]: n for n in nodes}
+    nodes_by_parent = {n_id: [] for n_id in nodes_by_id}
+    nodes_by_parent[None] = []
+    for node in nodes:
+        nodes_by_parent.get(node["parent_id"], []).append(node)
+    for children_list in nodes_by_parent.values():
+        children_list.sort(key=lambda x: x["position"])
+
+    def get_all_descendant_ids(node_id):
+        descendants = []
+        for child_node in nodes_by_parent.get(node_id, []):
+            descendants.append(child_node["id"])
+            descendants.extend(get_all_descendant_ids(child_node["id"]))
+        return descendants
+
+    wb = openpyxl.Workbook()
+    wb.remove(wb["Sheet"])
+
+    def create_sheets_recursively(parent_id, prefix=""):
+        for i, node in enumerate(nodes_by_parent.get(parent_id, [])):
+            current_prefix = f"{prefix}{i + 1}."
+            title = re.sub(r"[\\/*?:\[\]]", "", f"{current_prefix} {node['name']}")
+            ws = wb.create_sheet(title=title[:31])
+            ws.append(["Participant", "Coded Segment", "Document"])
+            for cell in ws[1]:
+                cell.font = Font(bold=True)
+            ids_to_include = [node["id"]] + get_all_descendant_ids(node["id"])
+            for seg in [s for s in coded_segments if s["node_id"] in ids_to_include]:
+                ws.append(
+                    [
+                        seg["participant_name"] or "N/A",
+                        database.get_segment_text(seg),
+                        seg["document_title"],
+                    ]
+                )
+            create_sheets_recursively(node["id"], prefix=current_prefix)
+
+    create_sheets_recursively(None)
+    wb.save(file_path)
+
+
+def rows_by_list_membership(nodes, coded_segments, sheets=None):
+    """The old per-sheet filter alone: every segment against a list of family ids."""
+    children = {}
+    for node in nodes:
+        children.setdefault(node["parent_id"], []).append(node["id"])
+
+    def descendants(node_id):
+        result = []
+        for child_id in children.get(node_id, []):
+            result.append(child_id)
+            result.extend(descendants(child_id))
+        return result
+
+    rows = 0
+    for node in nodes if sheets is None else sheets:
+        ids_to_include = [node["id"]] + descendants(node["id"])
+        rows += len([s for s in coded_segments if s["node_id"] in ids_to_include])
+    return rows
+
+
+def rows_by_index(nodes, coded_segments):
+    index = NodeIndex(nodes, coded_segments)
+    return sum(sum(1 for _ in index.family_segments(node["id"])) for node in nodes)
+
+
+def peak_mb(fn, *args):
+    """Runs fn(*args) under tracemalloc; returns the peak traced memory in MB."""
+    tracemalloc.start()
+    try:
+        fn(*args)
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    for segments, nodes in SIZES:
+        with temp_database() as temp_dir:
+            print(f"Building project: {segments} segments, {nodes} nodes...")
+            project_id = build_project(
+                name=f"Export {segments}",
+                documents=50,
+                words_per_document=5000,
+                nodes=nodes,
+                segments=segments,
+            )
+            node_list = database.get_nodes_for_project(project_id)
+            coded_segments = database.get_coded_segments_for_project(project_id)
+            root_id = next(n["id"] for n in node_list if n["parent_id"] is None)
+            path = os.path.join(temp_dir, "export.xlsx")
+            results = {}
+
+            with timed("streaming: sheet per node", results):
+                write_node_sheets(path, node_list, coded_segments)
+            print(
+                f"    {os.path.getsize(path) / 1e6:.1f} MB file, peak "
+                f"{peak_mb(write_node_sheets, path, node_list, coded_segments):.1f} "
+                "MB traced"
+            )
+            with timed("family rows, index + sets (all sheets)", results):
+                rows = rows_by_index(node_list, coded_segments)
+            print(f"    {rows} rows")
+            if segments <= LEGACY_MAX_SEGMENTS:
+                with timed("family rows, list membership (all sheets)", results):
+                    rows_by_list_membership(node_list, coded_segments)
+            else:
+                label = f"family rows, list membership ({LEGACY_SAMPLE_SHEETS} sheets)"
+                sample = node_list[:: nodes // LEGACY_SAMPLE_SHEETS]
+                with timed(label, results):
+                    rows_by_list_membership(node_list, coded_segments, sample)
+                estimate = results[label] * nodes / LEGACY_SAMPLE_SHEETS / 1000
+                print(f"    about {estimate:.0f} s for all {nodes} sheets")
+            with timed("streaming: family of a root, sheet per node", results):
+                write_node_sheets(path, node_list, coded_segments, root_id)
+            with timed("streaming: family of a root, single sheet", results):
+                write_family_sheet(path, node_list, coded_segments, root_id)
+
+            if segments <= LEGACY_MAX_SEGMENTS:
+                with timed("in-memory Workbook: sheet per node", results):
+                    legacy_export_to_excel(path, node_list, coded_segments)
+                legacy_peak = peak_mb(
+                    legacy_export_to_excel, path, node_list, coded_segments
+                )
+                print(f"    peak {legacy_peak:.1f} MB traced")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Measures how long the GUI thread stalls while a 20k segment project exports,
+writing on the GUI thread versus through the export job queue, with the same
+16 ms frame clock as bench_query_executor. Also times three exports queued
+together and how quickly a running export stops once cancelled.
+
+Run from the repository root:
+    python -m benchmarks.bench_export_jobs
+"""
+
+import os
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+from benchmarks.bench_query_executor import measure_frame_gaps  # noqa: E402
+from benchmarks.fixtures import build_project, temp_database  # noqa: E402
+from managers import exporters  # noqa: E402
+from managers.export_jobs import run_export, shutdown_export_queue  # noqa: E402
+
+SEGMENTS = 20000
+NODES = 200
+
+
+def main():
+    app = QApplication.instance() or QApplication([])
+    with temp_database() as temp_dir:
+        print(f"Building project: {SEGMENTS} segments, {NODES} nodes...")
+        project_id = build_project(documents=50, nodes=NODES, segments=SEGMENTS)
+        path = os.path.join(temp_dir, "report.docx")
+
+        def export_sync(callback):
+            exporters.write_word_report(project_id, path)
+            callback(None)
+
+        def export_job(callback):
+            run_export(
+                "Word report",
+                exporters.write_word_report,
+                project_id,
+                path,
+                on_finished=callback,
+            )
+
+        def export_three(callback):
+            # Jobs run in submission order, so the last one ends the batch
+            for fn, name in (
+                (exporters.write_excel_report, "report.xlsx"),
+                (exporters.write_word_report, "report.docx"),
+                (exporters.write_json_export, "report.json"),
+            ):
+                job = run_export(name, fn, project_id, os.path.join(temp_dir, name))
+            job.finished.connect(callback)
+
+        for label, exporter in (
+            ("Word, GUI thread", export_sync),
+            ("Word, export job", export_job),
+            ("xlsx+docx+json queued", export_three),
+        ):
+            start = time.perf_counter()
+            worst, frames = measure_frame_gaps(app, exporter)
+            elapsed = time.perf_counter() - start
+            print(
+                f"  {label:<24} {elapsed:6.1f} s, worst frame {worst:8.1f} ms "
+                f"over {frames} frames"
+            )
+
+        job = run_export(
+            "Excel report",
+            exporters.write_excel_report,
+            project_id,
+            os.path.join(temp_dir, "cancelled.xlsx"),
+        )
+        started = []
+        job.progress.connect(lambda done, total: done and started.append(True))
+        while not started:
+            app.processEvents()
+            time.sleep(0.001)
+        stopped = []
+        job.cancelled.connect(lambda: stopped.append(time.perf_counter()))
+        cancelled_at = time.perf_counter()
+        job.cancel()
+        while not stopped:
+            app.processEvents()
+            time.sleep(0.001)
+        print(f"  cancel to stop: {(stopped[0] - cancelled_at) * 1000:.1f} ms")
+        shutdown_export_queue()
+
+
+if __name__ == "__main__":
+    main()
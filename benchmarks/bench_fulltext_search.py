@@ -0,0 +1,105 @@
+"""
+Ranked full-text search over a 10 million word project through the FTS5
+index: phrase, prefix and boolean queries on document bodies and coded
+segments, against a LIKE scan of the same text.
+
+The corpus draws from a 20,000 word vocabulary with Zipf-like frequencies,
+so common words match nearly every document and rare ones only a handful.
+
+Run from the repository root:
+    python -m benchmarks.bench_fulltext_search
+"""
+
+import random
+from itertools import accumulate
+
+import database
+from benchmarks.fixtures import WORDS, temp_database, timed
+
+DOCUMENTS = 200
+WORDS_PER_DOCUMENT = 50000
+SEGMENTS_PER_DOCUMENT = 100
+VOCABULARY = 20000
+QUERIES = [
+    '"family support"',
+    "manag*",
+    "stress AND (remote OR office) NOT money",
+    "lexeme17*",
+    '"lexeme4003 lexeme4004"',
+    "lexeme15000",
+]
+
+
+def build_corpus(rng):
+    words = WORDS + [f"lexeme{i}" for i in range(VOCABULARY - len(WORDS))]
+    weights = list(accumulate(1 / (rank + 1) for rank in range(len(words))))
+    database.add_project("Benchmark")
+    project_id = database.get_all_projects()[0]["id"]
+    with database.session():
+        node_ids = [
+            database.add_node(project_id, f"Node {i + 1}", None, "#FFFF00")
+            for i in range(50)
+        ]
+        for i in range(DOCUMENTS):
+            text = " ".join(
+                rng.choices(words, cum_weights=weights, k=WORDS_PER_DOCUMENT)
+            )
+            if i % 20 == 0:
+                text += " lexeme4003 lexeme4004"
+            document_id = database.add_document(project_id, f"Document {i + 1}", text)
+            for _ in range(SEGMENTS_PER_DOCUMENT):
+                start = rng.randrange(len(text) - 2000)
+                end = start + rng.randrange(100, 2000)
+                database.add_coded_segment(
+                    document_id,
+                    rng.choice(node_ids),
+                    None,
+                    start,
+                    end,
+                    text[start:end],
+                )
+    return project_id
+
+
+def main():
+    rng = random.Random(42)
+    with temp_database():
+        words = DOCUMENTS * WORDS_PER_DOCUMENT
+        print(
+            f"Building project: {words / 1e6:.0f}M words in {DOCUMENTS} documents, "
+            f"{DOCUMENTS * SEGMENTS_PER_DOCUMENT} segments..."
+        )
+        results = {}
+        with timed("build project (indexed by triggers)", results):
+            project_id = build_corpus(rng)
+        conn = database.get_db_connection()
+        with timed("optimize index", results):
+            conn.execute("INSERT INTO documents_fts(documents_fts) VALUES('optimize');")
+            conn.execute(
+                "INSERT INTO coded_segments_fts(coded_segments_fts) VALUES('optimize');"
+            )
+            conn.commit()
+
+        for query in QUERIES:
+            # First run reads the index pages from disk; report the warm run
+            database.search_documents(project_id, query, limit=20)
+            with timed(f"documents: {query}", results):
+                hits = database.search_documents(project_id, query, limit=20)
+            print(f"    {len(hits)} ranked results")
+        for query in QUERIES:
+            database.search_segments(project_id, query, limit=200)
+            with timed(f"segments: {query}", results):
+                hits = database.search_segments(project_id, query, limit=200)
+            print(f"    {len(hits)} ranked results")
+
+        with timed("documents LIKE '%lexeme15000%' (no index)", results):
+            rows = conn.execute(
+                "SELECT id FROM documents WHERE project_id = ? AND content LIKE ?",
+                (project_id, "%lexeme15000%"),
+            ).fetchall()
+        print(f"    {len(rows)} unranked results")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Peak memory of the JSON export as a project grows from 25k to 200k coded
+segments (the documents stay the same): the streaming writer
+(managers/json_export.py) against the old export, which built the whole
+nested structure from the project's segment list and then called json.dump.
+
+Each export runs in a fresh interpreter so its peak RSS is its own;
+"baseline" is a process that only imports the exporters and opens the
+database. The file-backed share is mostly database pages mapped by the
+storage profile's mmap window, which grow with the database file rather
+than with what the export holds in memory.
+
+Run from the repository root:
+    python -m benchmarks.bench_json_export
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import database
+from benchmarks.fixtures import build_project, temp_database
+
+SIZES = [25000, 50000, 100000, 200000]
+NODES = 500
+MODES = ["baseline", "legacy", "json", "ndjson.gz"]
+
+
+def legacy_export_to_json(project_id, file_path):
+    """export_to_json as it was: nested dicts, a node scan per level, json.dump."""
+    nodes = database.get_nodes_for_project(project_id)
+    coded_segments = database.get_coded_segments_for_project(project_id)
+    segments_by_node = {}
+    for seg in coded_segments:
+        segments_by_node.setdefault(seg["node_id"], []).append(
+            {
+                "participant": seg["participant_name"] or "N/A",
+                "text": database.get_segment_text(seg),
+                "document": seg["document_title"],
+            }
+        )
+
+    def build_json_recursively(parent_id=None):
+        children = sorted(
+            [n for n in nodes if n["parent_id"] == parent_id],
+            key=lambda x: x["position"],
+        )
+        return [
+            {
+                "id": node["id"],
+                "name": node["name"],
+                "segments": segments_by_node.get(node["id"], []),
+                "children": build_json_recursively(parent_id=node["id"]),
+            }
+            for node in children
+        ]
+
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(build_json_recursively(), f, ensure_ascii=False, indent=4)
+
+
+def child(db_file, project_id, mode, out_dir):
+    """Runs one export in this process and prints its time and peak RSS."""
+    from managers.exporters import export_project
+
+    database.configure_database(db_file)
+    project_id = int(project_id)
+    start = time.perf_counter()
+    if mode == "legacy":
+        legacy_export_to_json(project_id, os.path.join(out_dir, "legacy.json"))
+    elif mode != "baseline":
+        export_project(project_id, os.path.join(out_dir, f"export.{mode}"))
+    elapsed = time.perf_counter() - start
+    peak_mb, file_mb = rss_mb()
+    print(json.dumps({"seconds": elapsed, "peak_mb": peak_mb, "file_mb": file_mb}))
+
+
+def rss_mb():
+    """
+    (peak RSS, file-backed RSS) of this process in MB. Linux keeps ru_maxrss
+    across fork and exec, so it would include the parent's memory; VmHWM
+    starts afresh with exec. File-backed pages are mostly the database file
+    mapped by SQLite's mmap window, which grows with the file it reads.
+    """
+    status = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                status[key] = value.split()
+    except OSError:
+        pass
+    if "VmHWM" in status:
+        return int(status["VmHWM"][0]) / 1024, int(status["RssFile"][0]) / 1024
+    # KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 0.0
+
+
+def main():
+    with temp_database() as temp_dir:
+        db_file = os.path.join(temp_dir, "nodeflow.db")
+        for segments in SIZES:
+            print(f"Building project: {segments} segments, {NODES} nodes...")
+            project_id = build_project(
+                name=f"JSON {segments}",
+                documents=50,
+                words_per_document=5000,
+                nodes=NODES,
+                segments=segments,
+            )
+            database.close_all_connections()
+            for mode in MODES:
+                output = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_json_export"]
+                    + ["--child", db_file, str(project_id), mode, temp_dir],
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(
+                    f"  {mode:<12} {result['seconds'] * 1000:10.1f} ms, "
+                    f"peak RSS {result['peak_mb']:7.1f} MB "
+                    f"({result['file_mb']:.1f} MB file-backed)"
+                )
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(*sys.argv[2:])
+    else:
+        main()
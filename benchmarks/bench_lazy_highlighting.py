@@ -0,0 +1,138 @@
+"""
+Opens a 5 MB transcript carrying 20k coded segments in ContentView, times the
+viewport-only highlight layer against painting every segment up front, then
+scrolls through the document and reports the slowest step. Finally looks up
+the segments under the cursor at random positions, before and after coding
+one segment across the whole document.
+
+Run from the repository root:
+    python -m benchmarks.bench_lazy_highlighting
+"""
+
+import os
+import random
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtGui import QTextCursor  # noqa: E402
+from PySide6.QtWidgets import QApplication, QTextEdit  # noqa: E402
+
+import database  # noqa: E402
+from benchmarks.fixtures import random_text, temp_database, timed  # noqa: E402
+from ui.workspace.content_view import ContentView  # noqa: E402
+from ui.workspace.highlight_layer import highlight_format  # noqa: E402
+
+DOCUMENT_BYTES = 5 * 1024 * 1024
+SEGMENTS = 20000
+SCROLL_STEPS = 200
+CURSOR_LOOKUPS = 5000
+
+
+def build_transcript(rng):
+    paragraphs, size = [], 0
+    while size < DOCUMENT_BYTES:
+        paragraph = random_text(rng.randrange(20, 120), rng)
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def paint_everything(text_edit, segments):
+    """What the layer replaces: one selection per segment in the document."""
+    selections = []
+    for segment in segments:
+        cursor = QTextCursor(text_edit.document())
+        cursor.setPosition(segment["segment_start"])
+        cursor.setPosition(segment["segment_end"], QTextCursor.MoveMode.KeepAnchor)
+        selection = QTextEdit.ExtraSelection()
+        selection.cursor = cursor
+        selection.format = highlight_format(segment["node_color"])
+        selections.append(selection)
+    text_edit.setExtraSelections(selections)
+
+
+def main():
+    app = QApplication.instance() or QApplication([])
+    rng = random.Random(42)
+    with temp_database():
+        text = build_transcript(rng)
+        print(
+            f"Building project: {len(text) / 1e6:.1f} MB document, {SEGMENTS} segments..."
+        )
+        database.add_project("Benchmark")
+        project_id = database.get_all_projects()[0]["id"]
+        with database.session():
+            database.add_participant(project_id, "Participant 1")
+            participant_id = database.get_participants_for_project(project_id)[0]["id"]
+            document_id = database.add_document(
+                project_id, "Transcript", text, participant_id
+            )
+            node_ids = [
+                database.add_node(
+                    project_id, f"Node {i + 1}", None, f"#{rng.randrange(0xFFFFFF):06X}"
+                )
+                for i in range(50)
+            ]
+            for _ in range(SEGMENTS):
+                start = rng.randrange(len(text) - 400)
+                end = start + rng.randrange(20, 400)
+                database.add_coded_segment(
+                    document_id,
+                    rng.choice(node_ids),
+                    participant_id,
+                    start,
+                    end,
+                    text[start:end],
+                )
+
+        results = {}
+        with timed("open document (text layout + highlights)", results):
+            view = ContentView(project_id)
+            view.resize(1000, 800)
+            view.show()
+            app.processEvents()
+        layer = view.highlight_layer
+        segments = list(view._coded_segments_cache.values())
+        print(f"  segments painted: {layer.painted_count()} of {len(segments)}")
+
+        # With the layout done, compare the highlighting work on its own
+        with timed("highlight: visible segments only", results):
+            layer.set_segments(segments)
+            app.processEvents()
+        with timed("highlight: every segment up front", results):
+            paint_everything(view.text_edit, segments)
+            app.processEvents()
+        layer.refresh()
+
+        scrollbar = view.text_edit.verticalScrollBar()
+        worst = 0.0
+        step = max(1, scrollbar.maximum() // SCROLL_STEPS)
+        with timed(f"scroll through in {SCROLL_STEPS} steps", results):
+            for value in range(0, scrollbar.maximum(), step):
+                start = time.perf_counter()
+                scrollbar.setValue(value)
+                app.processEvents()
+                worst = max(worst, (time.perf_counter() - start) * 1000)
+        print(f"  slowest scroll step: {worst:.1f} ms")
+
+        positions = [rng.randrange(len(text)) for _ in range(CURSOR_LOOKUPS)]
+        with timed(f"{CURSOR_LOOKUPS} cursor lookups", results):
+            for position in positions:
+                layer.segment_ids_at(position)
+        # A segment spanning the whole document overlaps every lookup
+        layer.add_segment(
+            {
+                "id": max(s["id"] for s in segments) + 1,
+                "segment_start": 0,
+                "segment_end": len(text),
+                "node_color": "#FFCC00",
+            }
+        )
+        with timed(f"{CURSOR_LOOKUPS} cursor lookups, one segment on all", results):
+            for position in positions:
+                layer.segment_ids_at(position)
+
+
+if __name__ == "__main__":
+    main()
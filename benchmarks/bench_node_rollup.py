@@ -0,0 +1,62 @@
+"""
+Compares node roll-up statistics computed by Python recursion (the old
+NodeTreeManager/DashboardView approach) with the node_closure GROUP BY query.
+
+Run from the repository root:
+    python -m benchmarks.bench_node_rollup
+"""
+
+import sys
+
+import database
+from benchmarks.fixtures import build_project, temp_database, timed
+
+NODES = 5000
+SEGMENTS = 50000
+REPEATS = 5
+
+
+def rollup_by_recursion(project_id):
+    node_stats = database.get_node_statistics(project_id)
+    nodes = database.get_nodes_for_project(project_id)
+    nodes_by_parent = {n["id"]: [] for n in nodes}
+    nodes_by_parent[None] = []
+    for node in nodes:
+        nodes_by_parent.setdefault(node["parent_id"], []).append(node)
+    aggregated = {}
+
+    def recurse(parent_id):
+        total_wc, total_sc = 0, 0
+        for node in nodes_by_parent.get(parent_id, []):
+            child_wc, child_sc = recurse(node["id"])
+            direct = node_stats.get(node["id"], {"word_count": 0, "segment_count": 0})
+            wc = direct["word_count"] + child_wc
+            sc = direct["segment_count"] + child_sc
+            if sc:
+                aggregated[node["id"]] = {"word_count": wc, "segment_count": sc}
+            total_wc, total_sc = total_wc + wc, total_sc + sc
+        return total_wc, total_sc
+
+    recurse(None)
+    return aggregated
+
+
+def main():
+    sys.setrecursionlimit(10000)
+    with temp_database():
+        print(f"Building project: {NODES} nodes, {SEGMENTS} segments...")
+        project_id = build_project(
+            documents=50, nodes=NODES, max_depth=8, segments=SEGMENTS
+        )
+        with timed(f"python recursion x{REPEATS}"):
+            for _ in range(REPEATS):
+                expected = rollup_by_recursion(project_id)
+        with timed(f"node_closure GROUP BY x{REPEATS}"):
+            for _ in range(REPEATS):
+                actual = database.get_node_rollup_statistics(project_id)
+        assert actual == expected, "Roll-up results differ"
+        print("  results identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Startup and refresh of the node tree for a 3,000 node codebook: NodeTreeModel
+with its painting delegate against one QTreeWidgetItem plus an item widget
+(colour button, two labels and five action buttons) per node, as the tree
+used to be built. Coding and moving segments update the statistics of the
+node's ancestors in place; re-querying them for the whole scope is timed
+for comparison.
+
+Run from the repository root:
+    python -m benchmarks.bench_node_tree
+"""
+
+import os
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import (  # noqa: E402
+    QApplication,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QTreeWidget,
+    QTreeWidgetItem,
+    QWidget,
+)
+from qt_material_icons import MaterialIcon  # noqa: E402
+
+import database  # noqa: E402
+from benchmarks.fixtures import build_project, temp_database, timed  # noqa: E402
+from ui.workspace.node_tree_manager import NodeTreeManager  # noqa: E402
+
+NODES = 3000
+MOVES = 10
+ICONS = ["download", "filter_list", "add", "edit", "delete"]
+
+
+def wait_for_stats(app, manager):
+    """Runs the event loop until the node statistics have been applied."""
+    while manager._stats_task is not None:
+        app.processEvents()
+        time.sleep(0.001)
+    app.processEvents()
+
+
+def wait_until(app, condition, timeout=5):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        app.processEvents()
+
+
+def legacy_populate(tree, nodes):
+    """Builds the tree the way NodeTreeManager.load_nodes used to; returns the stats labels."""
+    tree.clear()
+    by_parent = {}
+    for node in nodes:
+        by_parent.setdefault(node["parent_id"], []).append(node)
+    for children in by_parent.values():
+        children.sort(key=lambda n: n["position"])
+    stats_labels = {}
+
+    def add_items(parent_item, parent_id, prefix=""):
+        for i, node in enumerate(by_parent.get(parent_id, [])):
+            current_prefix = f"{prefix}{i + 1}."
+            item = QTreeWidgetItem(parent_item)
+            item.setData(0, 1, node["id"])
+            widget = QWidget()
+            layout = QHBoxLayout(widget)
+            layout.setContentsMargins(0, 2, 5, 7)
+            layout.setSpacing(5)
+            color_button = QPushButton()
+            color_button.setFixedSize(18, 18)
+            color_button.setStyleSheet(
+                f"background-color: {node['color']}; border: 1px solid #888;"
+            )
+            layout.addWidget(color_button)
+            layout.addWidget(QLabel(f"{current_prefix} {node['name']}"))
+            layout.addStretch()
+            stats_label = QLabel("")
+            stats_label.setStyleSheet("color: #888;")
+            layout.addWidget(stats_label)
+            for icon in ICONS:
+                button = QPushButton()
+                button.setIcon(MaterialIcon(icon))
+                button.setFixedSize(24, 24)
+                button.setVisible(False)
+                layout.addWidget(button)
+            tree.setItemWidget(item, 0, widget)
+            stats_labels[node["id"]] = stats_label
+            add_items(item, node["id"], current_prefix)
+
+    add_items(tree.invisibleRootItem(), None)
+    tree.expandAll()
+    return stats_labels
+
+
+def main():
+    app = QApplication.instance() or QApplication([])
+    with temp_database():
+        print(f"Building project: {NODES} nodes, 20k segments...")
+        project_id = build_project(
+            documents=20, words_per_document=5000, nodes=NODES, segments=20000
+        )
+        results = {}
+        database.get_nodes_for_project(project_id)  # warm the cache
+
+        with timed("startup: model + delegate, first paint", results):
+            manager = NodeTreeManager(project_id)
+            manager.resize(400, 800)
+            manager.show()
+            app.processEvents()
+        with timed("  node statistics (worker thread) applied", results):
+            manager.scope_combo.setCurrentText("Project Total")
+            wait_for_stats(app, manager)
+        with timed("refresh: reload unchanged tree", results):
+            manager.load_nodes()
+            wait_for_stats(app, manager)
+        roots = manager.model.rowCount()
+        with timed("refresh: reload after adding a node (reset)", results):
+            database.add_node(project_id, "New node", None, "#FFFF00")
+            wait_until(app, lambda: manager.model.rowCount() == roots + 1)
+            wait_for_stats(app, manager)
+
+        node_ids = list(manager.model.nodes)
+        segment_node = node_ids[len(node_ids) // 2]
+        document_id = database.get_documents_for_project(project_id)[0]["id"]
+        before = manager.model.stats_text(segment_node)
+        with timed("code a segment (stats roll-up repaint)", results):
+            segment_id = database.add_coded_segment(
+                document_id, segment_node, None, 0, 50, "x"
+            )
+            wait_until(app, lambda: manager.model.stats_text(segment_node) != before)
+        with timed(f"move a segment between nodes x{MOVES} (O(depth) each)", results):
+            for i in range(MOVES):
+                target = node_ids[(i * 7919) % len(node_ids)]
+                database.move_coded_segment(segment_id, target)
+                app.processEvents()
+        with timed(f"code a segment x{MOVES}, reloading all stats each", results):
+            for _ in range(MOVES):
+                database.add_coded_segment(document_id, segment_node, None, 0, 50, "x")
+                manager._load_stats()
+                wait_for_stats(app, manager)
+        with timed("rename a node", results):
+            database.update_node_name(segment_node, "Renamed")
+            wait_until(
+                app,
+                lambda: manager.model.nodes[segment_node]["name"] == "Renamed",
+            )
+        manager.close()
+
+        nodes = database.get_nodes_for_project(project_id)
+        tree = QTreeWidget()
+        tree.setHeaderHidden(True)
+        tree.resize(400, 800)
+        tree.show()
+        with timed("startup: QTreeWidgetItem + widget each, first paint", results):
+            stats_labels = legacy_populate(tree, nodes)
+            app.processEvents()
+        with timed("refresh: rebuild (QTreeWidgetItem + widget each)", results):
+            stats_labels = legacy_populate(tree, nodes)
+            app.processEvents()
+        with timed("  set every stats label", results):
+            for node_id, label in stats_labels.items():
+                label.setText(manager.model.stats_text(node_id))
+            app.processEvents()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Times the reads behind a workspace/dashboard refresh with a cold and a warm
+ProjectDataCache, and confirms warm refreshes never acquire a connection.
+
+Run from the repository root:
+    python -m benchmarks.bench_project_cache
+"""
+
+import database
+from benchmarks.fixtures import build_project, temp_database, timed
+
+REFRESHES = 20
+
+
+def refresh(project_id):
+    database.get_nodes_for_project(project_id)
+    database.get_participants_for_project(project_id)
+    database.get_documents_for_project(project_id)
+    database.get_coded_segments_for_project(project_id)
+
+
+def main():
+    with temp_database():
+        print("Building project...")
+        project_id = build_project(documents=100, nodes=300, segments=20000)
+        results = {}
+        with timed(f"cold cache x{REFRESHES}", results):
+            for _ in range(REFRESHES):
+                database.clear_project_cache()
+                refresh(project_id)
+
+        database.reset_cache_stats()
+        acquired_before = database.get_pool_stats()["acquired"]
+        with timed(f"warm cache x{REFRESHES}", results):
+            for _ in range(REFRESHES):
+                refresh(project_id)
+        acquired = database.get_pool_stats()["acquired"] - acquired_before
+        stats = database.get_cache_stats()
+        print(
+            f"  warm refreshes: {stats['hits']} hits, {stats['misses']} misses, "
+            f"{acquired} connections acquired"
+        )
+        assert acquired == 0, "Warm refreshes should not touch SQLite"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Measures how long the GUI thread stalls while a large project's segments load,
+synchronously versus through the query executor. A 16 ms timer stands in for
+the frame clock; the longest gap between its ticks is the worst frame.
+
+Run from the repository root:
+    python -m benchmarks.bench_query_executor
+"""
+
+import os
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QTimer  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+import database  # noqa: E402
+from benchmarks.fixtures import build_project, temp_database  # noqa: E402
+from managers.query_executor import (  # noqa: E402
+    get_query_executor,
+    shutdown_query_executor,
+)
+
+SEGMENTS = 100000
+FRAME_MS = 16
+
+
+def measure_frame_gaps(app, start_load):
+    """Runs the event loop until the load finishes; returns (max gap ms, frames)."""
+    ticks = []
+    done = []
+    timer = QTimer()
+    timer.setInterval(FRAME_MS)
+    timer.timeout.connect(lambda: ticks.append(time.perf_counter()))
+    timer.start()
+    ticks.append(time.perf_counter())
+    start_load(lambda _result: done.append(True))
+    while not done:
+        app.processEvents()
+        time.sleep(0.001)
+    # Let one more frame land so the stall at the end is measured too
+    deadline = time.perf_counter() + FRAME_MS * 2 / 1000
+    while time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    timer.stop()
+    gaps = [(b - a) * 1000 for a, b in zip(ticks, ticks[1:])]
+    return max(gaps) if gaps else 0.0, len(gaps)
+
+
+def main():
+    app = QApplication.instance() or QApplication([])
+    with temp_database():
+        print(f"Building project: {SEGMENTS} segments...")
+        project_id = build_project(documents=200, nodes=500, segments=SEGMENTS)
+
+        def load_sync(callback):
+            callback(database.get_coded_segments_for_project(project_id))
+
+        def load_async(callback):
+            get_query_executor().submit(
+                database.get_coded_segments_for_project, project_id, on_result=callback
+            )
+
+        for label, loader in (
+            ("GUI thread", load_sync),
+            ("query executor", load_async),
+        ):
+            worst, frames = measure_frame_gaps(app, loader)
+            print(f"  {label:<20} worst frame {worst:8.1f} ms over {frames} frames")
+        shutdown_query_executor()
+
+
+if __name__ == "__main__":
+    main()
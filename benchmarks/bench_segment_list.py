@@ -0,0 +1,166 @@
+"""
+Lists and filters 100k coded segments in CodedSegmentsView's "Entire Project"
+scope: the column store and fetchMore table model against building one
+QTreeWidgetItem per segment, as the view used to. Searches are also typed a
+key at a time, reporting the latency recorded by the search pipeline and the
+longest time the event loop was blocked while it ran.
+
+Run from the repository root:
+    python -m benchmarks.bench_segment_list
+"""
+
+import os
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication, QTreeWidget, QTreeWidgetItem  # noqa: E402
+
+import database  # noqa: E402
+from benchmarks.fixtures import build_project, temp_database, timed  # noqa: E402
+from managers.query_executor import get_query_executor  # noqa: E402
+from ui.workspace.coded_segments_view import CodedSegmentsView  # noqa: E402
+from ui.workspace.segment_table_model import load_segment_store  # noqa: E402
+
+SEGMENTS = 100000
+# "family" refines "fam", so it only re-checks the rows already shown
+SEARCHES = ["fam", "family", "manager", "zzz"]
+TYPED = ["family", "manager", "zzz"]
+# A fast typist's keystrokes fall within the debounce; a slow one's each run
+KEYSTROKE_MS = [90, 250]
+
+
+def wait(app, view, ms=None):
+    """
+    Runs the event loop for ms, or until the search is idle; returns the
+    longest gap between event loop turns, in ms.
+    """
+    start = last = time.perf_counter()
+    longest = 0
+    while True:
+        app.processEvents()
+        now = time.perf_counter()
+        longest = max(longest, now - last)
+        last = now
+        if ms is None and not view._search.is_running():
+            return longest * 1000
+        if ms is not None:
+            if now - start >= ms / 1000:
+                return longest * 1000
+            time.sleep(0.001)
+
+
+def type_query(app, view, text, keystroke_ms):
+    """Types text into the search box a key at a time, then waits for the result."""
+    view.search_input.setText("")
+    wait(app, view)
+    view._search.latencies.clear()
+    stall = 0
+    for end in range(1, len(text) + 1):
+        view.search_input.setText(text[:end])
+        stall = max(stall, wait(app, view, keystroke_ms))
+    stall = max(stall, wait(app, view))
+    for query, keystrokes, first_ms, complete_ms in view._search.latencies:
+        print(
+            f"    {query!r:<10} {keystrokes} key(s): first rows {first_ms:6.1f} ms, "
+            f"complete {complete_ms:6.1f} ms"
+        )
+    print(f"    longest event loop stall {stall:.1f} ms")
+
+
+def legacy_populate(tree, segments):
+    tree.clear()
+    items = []
+    for segment in segments:
+        preview = segment["content_preview"].strip()
+        if len(preview) > 100:
+            preview = preview[:100] + "..."
+        item = QTreeWidgetItem(
+            [
+                preview,
+                segment["node_name"],
+                segment.get("participant_name") or "N/A",
+                segment["document_title"],
+            ]
+        )
+        item.setData(0, 1, segment["id"])
+        items.append(item)
+    tree.addTopLevelItems(items)
+
+
+def main():
+    app = QApplication.instance() or QApplication([])
+    with temp_database():
+        print(f"Building project: {SEGMENTS} segments over 50 documents...")
+        project_id = build_project(
+            documents=50, words_per_document=5000, nodes=200, segments=SEGMENTS
+        )
+        results = {}
+        database.get_coded_segments_for_project(project_id)  # warm the cache
+
+        view = CodedSegmentsView(project_id)
+        view.resize(1000, 600)
+        view.show()
+        view.scope_combo.blockSignals(True)
+        view.scope_combo.setCurrentText("Entire Project")
+        view.scope_combo.blockSignals(False)
+        app.processEvents()
+
+        with timed("build column store (worker thread)", results):
+            store = load_segment_store(project_id=project_id)
+        view.reload_view()
+        view._load_task.cancel()
+        view._load_task = None
+        # A cancelled load that already started still runs to the end; timing
+        # alongside it would measure the worker's hold on the GIL
+        while get_query_executor().pending_count():
+            app.processEvents()
+            time.sleep(0.01)
+        with timed("list project scope (model + first paint)", results):
+            view._on_segments_loaded(store)
+            app.processEvents()
+        print(f"  rows fetched: {view.model.rowCount()} of {view.segment_count()}")
+
+        for search in SEARCHES:
+            view.search_input.blockSignals(True)
+            view.search_input.setText(search)
+            view.search_input.blockSignals(False)
+            with timed(f"filter 'All' by '{search}'", results):
+                view.filter_tree()
+                wait(app, view)
+            print(f"    {len(view.model.rows)} matches")
+        with timed("clear filter", results):
+            view.search_input.setText("")
+            view.filter_tree()
+            app.processEvents()
+        for keystroke_ms in KEYSTROKE_MS:
+            for text in TYPED:
+                print(f"  typing '{text}', {keystroke_ms} ms per key:")
+                type_query(app, view, text, keystroke_ms)
+        node_ids = [n["id"] for n in database.get_nodes_for_project(project_id)[:5]]
+        with timed("filter by node family (5 nodes)", results):
+            view.filter_by_node_family(node_ids)
+            app.processEvents()
+
+        segments = database.get_coded_segments_for_project(project_id)
+        tree = QTreeWidget()
+        tree.setColumnCount(4)
+        tree.resize(1000, 600)
+        tree.show()
+        with timed("list project scope (QTreeWidgetItem each)", results):
+            legacy_populate(tree, segments)
+            app.processEvents()
+        with timed("filter by 'family' (QTreeWidgetItem each)", results):
+            legacy_populate(
+                tree,
+                [
+                    s
+                    for s in segments
+                    if "family" in database.get_segment_text(s).lower()
+                ],
+            )
+            app.processEvents()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Compares storing every coded passage in full (the layout older builds wrote)
+with keeping a short preview and slicing the text from its document: database
+size, reading the project-wide segment join, and reading every segment's text.
+
+The project is coded densely, with several nested codes over the same
+passages, which is where duplicated text costs the most.
+
+Run from the repository root:
+    python -m benchmarks.bench_segment_text
+"""
+
+import os
+import random
+
+import database
+from benchmarks.fixtures import random_text, temp_database, timed
+
+DOCUMENTS = 40
+WORDS_PER_DOCUMENT = 8000
+PASSAGES_PER_DOCUMENT = 150
+CODES_PER_PASSAGE = 4
+
+
+def build_project(rng):
+    database.add_project("Benchmark")
+    project_id = database.get_all_projects()[0]["id"]
+    with database.session():
+        node_ids = [
+            database.add_node(project_id, f"Node {i + 1}", None, "#FFFF00")
+            for i in range(50)
+        ]
+        for i in range(DOCUMENTS):
+            text = random_text(WORDS_PER_DOCUMENT, rng)
+            document_id = database.add_document(project_id, f"Document {i + 1}", text)
+            for _ in range(PASSAGES_PER_DOCUMENT):
+                start = rng.randrange(len(text) - 2000)
+                end = start + rng.randrange(200, 2000)
+                # Nested codes: the same passage, trimmed a little each time
+                for level in range(CODES_PER_PASSAGE):
+                    database.add_coded_segment(
+                        document_id,
+                        rng.choice(node_ids),
+                        None,
+                        start + level * 10,
+                        end - level * 10,
+                        text[start + level * 10 : end - level * 10],
+                    )
+    return project_id
+
+
+def store_full_text():
+    """Rewrites every segment the way older builds stored it: the whole passage."""
+    conn = database.get_db_connection()
+    with conn:
+        conn.execute(
+            """
+            UPDATE coded_segments SET text_derived = 0, content_preview = (
+                SELECT substr(d.content, coded_segments.segment_start + 1,
+                              coded_segments.segment_end - coded_segments.segment_start)
+                FROM documents d WHERE d.id = coded_segments.document_id
+            )
+            """
+        )
+        conn.execute("PRAGMA user_version = 6;")
+    conn.close()
+
+
+def compact(db_path):
+    conn = database.get_db_connection()
+    conn.execute("VACUUM;")
+    conn.close()
+    return os.path.getsize(db_path)
+
+
+def read_everything(project_id, label, results):
+    database.clear_project_cache()
+    database.document_text_cache.clear()
+    with timed(f"{label}: segment join", results):
+        segments = database.get_coded_segments_for_project(project_id)
+    with timed(f"{label}: text of every segment", results):
+        texts = database.get_segment_texts(segments)
+    return sum(len(text) for text in texts)
+
+
+def main():
+    rng = random.Random(42)
+    with temp_database() as temp_dir:
+        db_path = os.path.join(temp_dir, "nodeflow.db")
+        segments = DOCUMENTS * PASSAGES_PER_DOCUMENT * CODES_PER_PASSAGE
+        print(f"Building project: {DOCUMENTS} documents, {segments} segments...")
+        project_id = build_project(rng)
+        results = {}
+
+        store_full_text()
+        full_size = compact(db_path)
+        full_chars = read_everything(project_id, "full text stored", results)
+
+        conn = database.get_db_connection()
+        with timed("migrate to derived text", results):
+            database.run_migrations(conn)
+        conn.close()
+        derived_size = compact(db_path)
+        derived_chars = read_everything(project_id, "derived from document", results)
+        assert derived_chars == full_chars, "derived text differs from stored text"
+
+        print(f"  database size, full text stored   {full_size / 1e6:10.1f} MB")
+        print(f"  database size, derived text       {derived_size / 1e6:10.1f} MB")
+        print(
+            f"  segment text read back            {derived_chars / 1e6:10.1f} M chars"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Compares commit latency and concurrent read throughput across storage profiles.
+
+Run from the repository root:
+    python -m benchmarks.bench_storage_profiles
+"""
+
+import statistics
+import threading
+import time
+
+import database
+from benchmarks.fixtures import build_project, temp_database
+
+COMMITS = 300
+READ_SECONDS = 3.0
+READER_THREADS = 4
+
+
+def measure_commit_latency(project_id):
+    doc_id = database.get_documents_for_project(project_id)[0]["id"]
+    node_id = database.get_nodes_for_project(project_id)[0]["id"]
+    latencies = []
+    for i in range(COMMITS):
+        start = time.perf_counter()
+        database.add_coded_segment(doc_id, node_id, None, i, i + 10, "benchmark")
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95)]
+
+
+def measure_concurrent_reads(project_id):
+    doc_ids = [d["id"] for d in database.get_documents_for_project(project_id)]
+    node_id = database.get_nodes_for_project(project_id)[0]["id"]
+    stop = threading.Event()
+    read_counts = [0] * READER_THREADS
+    write_count = [0]
+
+    def reader(index):
+        while not stop.is_set():
+            database.get_coded_segments_for_document(doc_ids[index % len(doc_ids)])
+            read_counts[index] += 1
+
+    def writer():
+        while not stop.is_set():
+            database.add_coded_segment(doc_ids[0], node_id, None, 0, 5, "write")
+            write_count[0] += 1
+
+    threads = [
+        threading.Thread(target=reader, args=(i,)) for i in range(READER_THREADS)
+    ]
+    threads.append(threading.Thread(target=writer))
+    for t in threads:
+        t.start()
+    time.sleep(READ_SECONDS)
+    stop.set()
+    for t in threads:
+        t.join()
+    return sum(read_counts) / READ_SECONDS, write_count[0] / READ_SECONDS
+
+
+def main():
+    print(
+        f"{'profile':<15} {'commit p50':>12} {'commit p95':>12} "
+        f"{'reads/s':>10} {'writes/s':>10}"
+    )
+    for profile in database.STORAGE_PROFILES:
+        with temp_database(profile):
+            project_id = build_project(documents=20, segments=2000)
+            p50, p95 = measure_commit_latency(project_id)
+            reads_per_s, writes_per_s = measure_concurrent_reads(project_id)
+        print(
+            f"{profile:<15} {p50:>10.2f}ms {p95:>10.2f}ms "
+            f"{reads_per_s:>10.0f} {writes_per_s:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
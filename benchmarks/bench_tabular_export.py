@@ -0,0 +1,92 @@
+"""
+Exporting a 200k-segment project for analysis, and loading the result back
+as one row per segment: the table exports (managers/tabular_export.py)
+against the JSON exports, whose nested nodes must be parsed and flattened,
+and the Excel report, which is slow to write. Loading uses json for JSON,
+pyarrow for the rest, as pandas and DuckDB do underneath.
+
+Parquet and Arrow need pyarrow; without it only CSV and the JSON exports
+are timed, and loads are skipped.
+
+Run from the repository root:
+    python -m benchmarks.bench_tabular_export
+"""
+
+import json
+import os
+
+from benchmarks.fixtures import build_project, temp_database, timed
+from managers.exporters import export_project
+from managers.tabular_export import available_formats
+
+try:
+    import pyarrow.csv as pa_csv
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+SEGMENTS = 200000
+NODES = 500
+
+
+def flatten_json(path):
+    """Segment rows from the nested JSON export."""
+    rows = []
+
+    def walk(nodes, path):
+        for node in nodes:
+            node_path = path + [node["name"]]
+            for segment in node["segments"]:
+                rows.append(dict(segment, node_path=" / ".join(node_path)))
+            walk(node["children"], node_path)
+
+    with open(path, encoding="utf-8") as f:
+        walk(json.load(f), [])
+    return rows
+
+
+def flatten_ndjson(path):
+    """Segment rows from the JSON Lines export (node paths left out)."""
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            node = json.loads(line)
+            for segment in node["segments"]:
+                rows.append(dict(segment, node_id=node["id"]))
+    return rows
+
+
+def load_arrow(path):
+    with pa_ipc.open_file(path) as f:
+        return f.read_all()
+
+
+LOADERS = {"json": flatten_json, "ndjson": flatten_ndjson}
+if pq is not None:
+    LOADERS.update(parquet=pq.read_table, arrow=load_arrow, csv=pa_csv.read_csv)
+
+
+def main():
+    with temp_database() as temp_dir:
+        print(f"Building project: {SEGMENTS} segments, {NODES} nodes...")
+        project_id = build_project(
+            documents=50,
+            words_per_document=5000,
+            nodes=NODES,
+            segments=SEGMENTS,
+        )
+        for fmt in ["xlsx", "json", "ndjson", *available_formats()]:
+            path = os.path.join(temp_dir, f"segments.{fmt}")
+            with timed(f"{fmt}: export"):
+                result = export_project(project_id, path)
+            print(f"    {result.size_bytes / 1e6:.1f} MB")
+            load = LOADERS.get(fmt)
+            if load is not None:
+                with timed(f"{fmt}: load as segment rows"):
+                    rows = load(path)
+                print(f"    {len(rows)} rows")
+
+
+if __name__ == "__main__":
+    main()
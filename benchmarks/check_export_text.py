@@ -0,0 +1,178 @@
+"""
+Fails if any export writes a coded segment's text other than what was
+selected. Segment offsets are Qt positions, which count UTF-16 units, so the
+document here has emoji (characters outside the BMP) before, between and
+inside its segments; an export slicing by Python index would write shifted
+text.
+
+Run from the repository root:
+    python -m benchmarks.check_export_text
+"""
+
+import csv
+import json
+import os
+
+import openpyxl
+from docx import Document
+
+import database
+from benchmarks.fixtures import temp_database
+from managers import exporters
+from managers.tabular_export import available_formats
+
+TEXT = (
+    "Before any emoji: the opening quote.\n"
+    "Then 😀 a smile and the important quote here.\n"
+    "Two 🎉🎉 parties, 🧑‍🤝‍🧑 people and a quote 🌍 spanning the globe\n"
+    "across two lines of the last paragraph."
+)
+QUOTES = [
+    "the opening quote",
+    "the important quote",
+    "a quote 🌍 spanning the globe\nacross two lines",
+    "people and a quote",
+]
+
+
+def qt_selection(text, phrase):
+    """(start, end, selected text) as QTextCursor reports a selection of phrase."""
+    index = text.index(phrase)
+    start = len(text[:index].encode("utf-16-le")) // 2
+    end = start + len(phrase.encode("utf-16-le")) // 2
+    return start, end, phrase.replace("\n", " ")
+
+
+def expect(found, label):
+    missing = [quote for quote in QUOTES if quote not in found]
+    if missing:
+        raise AssertionError(f"{label}: segment text not exported: {missing!r}")
+
+
+def normalized(texts):
+    return {text.replace(" ", "\n") for text in texts if text}
+
+
+def docx_paragraphs(path):
+    texts = set()
+    for paragraph in Document(path).paragraphs:
+        # Report bullets read "<participant>: <text>"
+        texts.add(paragraph.text.partition(": ")[2])
+        texts.update(run.text for run in paragraph.runs)
+    return normalized(texts)
+
+
+def xlsx_cells(path):
+    wb = openpyxl.load_workbook(path, read_only=True)
+    texts = [
+        value
+        for ws in wb.worksheets
+        for row in ws.iter_rows(values_only=True)
+        for value in row
+        if isinstance(value, str)
+    ]
+    wb.close()
+    return normalized(texts)
+
+
+def json_segments(path):
+    texts = []
+
+    def walk(nodes):
+        for node in nodes:
+            texts.extend(segment["text"] for segment in node["segments"])
+            walk(node.get("children", ()))
+
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".ndjson"):
+            walk(json.loads(line) for line in f)
+        else:
+            walk(json.load(f))
+    return normalized(texts)
+
+
+def table_segments(path):
+    if path.endswith(".csv"):
+        with open(path, encoding="utf-8", newline="") as f:
+            return normalized(row["text"] for row in csv.DictReader(f))
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    if path.endswith(".parquet"):
+        table = pyarrow.parquet.read_table(path)
+    else:
+        with pyarrow.ipc.open_file(path) as f:
+            table = f.read_all()
+    return normalized(table.column("text").to_pylist())
+
+
+def main():
+    with temp_database() as temp_dir:
+        database.add_project("Emoji")
+        project_id = database.get_all_projects()[0]["id"]
+        database.add_participant(project_id, "Ann")
+        participant_id = database.get_participants_for_project(project_id)[0]["id"]
+        document_id = database.add_document(project_id, "Doc", TEXT, participant_id)
+        node_id = database.add_node(project_id, "Quotes", None, "#FFCC00")
+        child_id = database.add_node(project_id, "More quotes", node_id, "#3366FF")
+        for i, quote in enumerate(QUOTES):
+            start, end, selected = qt_selection(TEXT, quote)
+            database.add_coded_segment(
+                document_id,
+                child_id if i % 2 else node_id,
+                participant_id,
+                start,
+                end,
+                selected,
+            )
+
+        def path(name):
+            return os.path.join(temp_dir, name)
+
+        exports = [
+            ("docx", docx_paragraphs, exporters.write_word_report, project_id),
+            ("xlsx", xlsx_cells, exporters.write_excel_report, project_id),
+            ("json", json_segments, exporters.write_json_export, project_id),
+            ("ndjson", json_segments, exporters.write_ndjson_export, project_id),
+            (
+                "family.docx",
+                docx_paragraphs,
+                exporters.write_node_family_word,
+                project_id,
+                node_id,
+            ),
+            (
+                "family.xlsx",
+                xlsx_cells,
+                exporters.write_node_family_excel,
+                project_id,
+                node_id,
+            ),
+            (
+                "sheets.xlsx",
+                xlsx_cells,
+                exporters.write_node_family_excel_multi_sheet,
+                project_id,
+                node_id,
+            ),
+            (
+                "annotated.docx",
+                docx_paragraphs,
+                exporters.write_annotated_document,
+                document_id,
+                "Doc",
+            ),
+        ]
+        exports += [
+            (fmt, table_segments, exporters.write_table_export, project_id)
+            for fmt in available_formats()
+        ]
+        for name, read, writer, *args in exports:
+            file_path = path(f"export.{name}")
+            writer(*args, file_path)
+            expect(read(file_path), name)
+        print(f"Segment text intact in {len(exports)} exports.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""
+Fails if any query used by the database layer falls back to a full table scan.
+
+Run from the repository root:
+    python -m benchmarks.check_query_plans
+"""
+
+import database
+from benchmarks.fixtures import build_project, temp_database
+
+
+def main():
+    with temp_database():
+        conn = database.get_db_connection()
+        # Check both an empty schema and one with planner statistics gathered
+        database.assert_no_table_scans(conn)
+        build_project(documents=50, nodes=300, segments=5000)
+        conn.execute("ANALYZE;")
+        database.assert_no_table_scans(conn)
+        print(f"Schema version {database.get_schema_version(conn)}: no table scans.")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import os
+import random
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+import database
+
+WORDS = (
+    "the interview participant said that work life balance family support "
+    "stress manager team remote office community health school money time "
+    "change future experience learning feel think really important because"
+).split()
+
+
+@contextmanager
+def temp_database(storage_profile=None):
+    """Points the database layer at a throwaway file for the duration of a benchmark."""
+    temp_dir = tempfile.mkdtemp(prefix="nodeflow_bench_")
+    try:
+        database.configure_database(
+            os.path.join(temp_dir, "nodeflow.db"), storage_profile
+        )
+        database.create_tables()
+        yield temp_dir
+    finally:
+        database.close_all_connections()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+@contextmanager
+def timed(label, results=None):
+    """Prints (and optionally records) the wall-clock time of a block in ms."""
+    start = time.perf_counter()
+    yield
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if results is not None:
+        results[label] = elapsed_ms
+    print(f"  {label:<45} {elapsed_ms:10.1f} ms")
+
+
+def random_text(word_count, rng):
+    return " ".join(rng.choice(WORDS) for _ in range(word_count))
+
+
+def build_project(
+    name="Benchmark",
+    documents=20,
+    words_per_document=2000,
+    participants=5,
+    nodes=100,
+    max_depth=4,
+    segments=2000,
+    seed=42,
+):
+    """
+    Creates a synthetic project and returns its id. Everything is written in a
+    single session so that building large fixtures stays fast.
+    """
+    rng = random.Random(seed)
+    database.add_project(name)
+    project_id = next(p["id"] for p in database.get_all_projects() if p["name"] == name)
+    with database.session():
+        for i in range(participants):
+            database.add_participant(project_id, f"Participant {i + 1}")
+        participant_ids = [
+            p["id"] for p in database.get_participants_for_project(project_id)
+        ]
+
+        doc_texts = {}
+        for i in range(documents):
+            text = random_text(words_per_document, rng)
+            doc_id = database.add_document(
+                project_id,
+                f"Document {i + 1}",
+                text,
+                participant_ids[i % len(participant_ids)] if participant_ids else None,
+            )
+            doc_texts[doc_id] = text
+
+        node_ids, depth_of = [], {}
+        for i in range(nodes):
+            candidates = [n for n in node_ids if depth_of[n] < max_depth - 1]
+            parent_id = rng.choice(candidates) if candidates and i > 5 else None
+            node_id = database.add_node(
+                project_id,
+                f"Node {i + 1}",
+                parent_id,
+                f"#{rng.randrange(0xFFFFFF):06X}",
+            )
+            depth_of[node_id] = 0 if parent_id is None else depth_of[parent_id] + 1
+            node_ids.append(node_id)
+
+        doc_ids = list(doc_texts)
+        for _ in range(segments if node_ids and doc_ids else 0):
+            doc_id = rng.choice(doc_ids)
+            text = doc_texts[doc_id]
+            start = rng.randrange(max(1, len(text) - 200))
+            end = start + rng.randrange(20, 200)
+            database.add_coded_segment(
+                doc_id,
+                rng.choice(node_ids),
+                rng.choice(participant_ids) if participant_ids else None,
+                start,
+                end,
+                text[start:end],
+            )
+    return project_id
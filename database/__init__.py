@@ -1,5 +1,59 @@
 # Core
-from .db_core import get_db_connection, create_tables  # noqa: F401
+from .db_core import (
+    get_db_connection,
+    create_tables,
+    session,
+    in_session,
+    uses_wal,
+    snapshot,
+    get_pool_stats,
+    close_all_connections,
+    configure_database,
+    set_storage_profile,
+    get_storage_profile,
+    STORAGE_PROFILES,
+    DEFAULT_STORAGE_PROFILE,
+)  # noqa: F401
+from .cache import (
+    ProjectDataCache,
+    project_cache,
+    DocumentTextCache,
+    document_text_cache,
+    get_cache_stats,
+    reset_cache_stats,
+    clear_project_cache,
+)  # noqa: F401
+from .events import (
+    DataEvent,
+    SegmentAdded,
+    SegmentDeleted,
+    SegmentMoved,
+    NodeAdded,
+    NodeRenamed,
+    NodeRecolored,
+    NodeMoved,
+    NodesReordered,
+    NodeDeleted,
+    DocumentAdded,
+    DocumentEdited,
+    DocumentDeleted,
+    ParticipantAdded,
+    ParticipantUpdated,
+    ParticipantDeleted,
+    ProjectDeleted,
+    ChangeEventBus,
+    event_bus,
+    subscribe,
+    unsubscribe,
+    get_data_version,
+)  # noqa: F401
+from .migrations import (
+    run_migrations,
+    get_schema_version,
+    find_table_scans,
+    assert_no_table_scans,
+    SCHEMA_VERSION,
+)  # noqa: F401
 
 # Projects
 from .projects_db import (
@@ -24,6 +78,8 @@ from .documents_db import (
     get_documents_for_project,
     get_document_content,
     get_document_word_count,
+    get_document_stats,
+    compute_text_stats,
     delete_document,
     update_document_text_only,
     get_project_word_count,
@@ -40,16 +96,37 @@ from .nodes_db import (
     update_node_order,
     update_node_parent,
     get_node_descendants,
+    get_node_subtree,
+    get_node_ancestors,
 )  # noqa: F401
 
 # Coded Segments
 from .segments_db import (
     add_coded_segment,
     get_coded_segments_for_document,
+    get_coded_segment,
     get_coded_segments_for_project,
     get_coded_segments_for_participant,
     get_coded_segments_for_nodes,
+    iter_segments_by_node,
+    iter_coded_segment_batches,
+    get_segment_text,
+    get_segment_texts,
+    get_document_text,
+    make_preview,
+    utf16_slicer,
+    PREVIEW_LENGTH,
     delete_coded_segment,
+    move_coded_segment,
     get_node_statistics,
+    get_participant_statistics,
+    get_node_rollup_statistics,
     get_word_count_for_participant,
 )  # noqa: F401
+
+# Full-text search
+from .search_db import (
+    build_match_query,
+    search_documents,
+    search_segments,
+)  # noqa: F401
@@ -0,0 +1,191 @@
+"""
+Process-wide cache of the per-project rows the UI asks for over and over
+(nodes, participants, document listings and the full segment join).
+
+Entries are keyed by (project_id, slice). Every mutating function in the
+*_db modules invalidates exactly the slices its write can change, so a read
+that hits the cache never touches SQLite.
+
+A separate small LRU holds the text of the most recently read documents, from
+which coded segment text is sliced on demand.
+"""
+
+import threading
+from collections import OrderedDict
+
+from .db_core import in_session, register_listener
+
+NODES = "nodes"
+PARTICIPANTS = "participants"
+DOCUMENTS = "documents"
+SEGMENTS = "segments"
+SLICES = (NODES, PARTICIPANTS, DOCUMENTS, SEGMENTS)
+
+
+class ProjectDataCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        # Bumped by every invalidation; a load only stores its rows if no
+        # write invalidated the slice while it was reading
+        self._generations = {}
+        self._local = threading.local()
+        self._stats = {
+            name: {"hits": 0, "misses": 0, "bypassed": 0, "invalidations": 0}
+            for name in SLICES
+        }
+
+    def get(self, project_id, slice_name, loader):
+        """Returns the cached rows for a slice, calling loader() on a miss."""
+        key = (project_id, slice_name)
+        if in_session():
+            # Sessions read their own uncommitted writes, which must not be cached
+            self._count(slice_name, "bypassed")
+            return loader()
+        with self._lock:
+            if key in self._entries:
+                self._stats[slice_name]["hits"] += 1
+                return self._entries[key]
+            self._stats[slice_name]["misses"] += 1
+            generation = self._generations.get(key, 0)
+        rows = loader()
+        with self._lock:
+            if self._generations.get(key, 0) == generation:
+                self._entries[key] = rows
+        return rows
+
+    def invalidate(self, project_id, *slice_names):
+        """Drops the given slices (all of them if none are named) of a project."""
+        slice_names = slice_names or SLICES
+        with self._lock:
+            for slice_name in slice_names:
+                key = (project_id, slice_name)
+                self._entries.pop(key, None)
+                self._generations[key] = self._generations.get(key, 0) + 1
+                self._stats[slice_name]["invalidations"] += 1
+        if in_session():
+            # Other threads may re-cache the old committed rows before this
+            # session commits, so invalidate again when it ends
+            pending = getattr(self._local, "pending", None)
+            if pending is None:
+                pending = self._local.pending = set()
+            pending.update((project_id, slice_name) for slice_name in slice_names)
+
+    def on_session_end(self, committed):
+        # Re-invalidate even on rollback: other threads may have cached rows
+        pending = getattr(self._local, "pending", None)
+        self._local.pending = None
+        for project_id, slice_name in pending or ():
+            self.invalidate(project_id, slice_name)
+
+    def clear(self):
+        with self._lock:
+            for key in self._entries:
+                self._generations[key] = self._generations.get(key, 0) + 1
+            self._entries.clear()
+
+    def get_stats(self):
+        with self._lock:
+            slices = {name: dict(counts) for name, counts in self._stats.items()}
+            entries = len(self._entries)
+        totals = {
+            counter: sum(counts[counter] for counts in slices.values())
+            for counter in ("hits", "misses", "bypassed", "invalidations")
+        }
+        return {**totals, "entries": entries, "slices": slices}
+
+    def reset_stats(self):
+        with self._lock:
+            for counts in self._stats.values():
+                for counter in counts:
+                    counts[counter] = 0
+
+    def _count(self, slice_name, counter):
+        with self._lock:
+            self._stats[slice_name][counter] += 1
+
+
+project_cache = ProjectDataCache()
+register_listener(project_cache)
+
+
+class DocumentTextCache:
+    """Least-recently-used cache of whole document texts, keyed by document id."""
+
+    def __init__(self, capacity=8):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._local = threading.local()
+        self._stats = {"hits": 0, "misses": 0, "bypassed": 0, "invalidations": 0}
+
+    def get(self, document_id, loader):
+        """Returns the document's text, calling loader() on a miss."""
+        if in_session():
+            self._count("bypassed")
+            return loader()
+        with self._lock:
+            if document_id in self._entries:
+                self._entries.move_to_end(document_id)
+                self._stats["hits"] += 1
+                return self._entries[document_id]
+            self._stats["misses"] += 1
+            generation = self._generations.get(document_id, 0)
+        text = loader()
+        with self._lock:
+            if self._generations.get(document_id, 0) == generation:
+                self._entries[document_id] = text
+                while len(self._entries) > self.capacity:
+                    self._entries.popitem(last=False)
+        return text
+
+    def invalidate(self, document_id):
+        with self._lock:
+            self._entries.pop(document_id, None)
+            self._generations[document_id] = self._generations.get(document_id, 0) + 1
+            self._stats["invalidations"] += 1
+        if in_session():
+            pending = getattr(self._local, "pending", None)
+            if pending is None:
+                pending = self._local.pending = set()
+            pending.add(document_id)
+
+    def on_session_end(self, committed):
+        pending = getattr(self._local, "pending", None)
+        self._local.pending = None
+        for document_id in pending or ():
+            self.invalidate(document_id)
+
+    def clear(self):
+        with self._lock:
+            for document_id in self._entries:
+                self._generations[document_id] = (
+                    self._generations.get(document_id, 0) + 1
+                )
+            self._entries.clear()
+
+    def get_stats(self):
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries)}
+
+    def _count(self, counter):
+        with self._lock:
+            self._stats[counter] += 1
+
+
+document_text_cache = DocumentTextCache()
+register_listener(document_text_cache)
+
+
+def get_cache_stats():
+    """Returns hit/miss/invalidation counters, in total and per slice."""
+    return project_cache.get_stats()
+
+
+def reset_cache_stats():
+    project_cache.reset_stats()
+
+
+def clear_project_cache():
+    project_cache.clear()
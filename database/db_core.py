@@ -1,20 +1,327 @@
 import sqlite3
 import os
+import threading
+from contextlib import contextmanager
+
+from .migrations import run_migrations
 
 # Define the data directory and the database file path
 DATA_DIR = "data"
 DB_FILE = os.path.join(DATA_DIR, "nodeflow.db")
 
+# Storage profiles are applied to every pooled connection when it is opened.
+# "page_size" only takes effect when the database file is first created.
+STORAGE_PROFILES = {
+    "compatibility": {
+        # SQLite defaults: rollback journal and a full fsync on every commit
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+    },
+    "balanced": {
+        "page_size": 4096,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,  # 64 MiB (negative values are KiB)
+        "mmap_size": 268435456,  # 256 MiB
+        "temp_store": "MEMORY",
+    },
+    "large_project": {
+        "page_size": 8192,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -262144,  # 256 MiB
+        "mmap_size": 1073741824,  # 1 GiB
+        "temp_store": "MEMORY",
+    },
+}
+DEFAULT_STORAGE_PROFILE = "balanced"
+
+
+def apply_storage_profile(conn, profile_name, is_new_database=False):
+    """Applies the PRAGMAs of a storage profile to an open connection."""
+    profile = STORAGE_PROFILES.get(
+        profile_name, STORAGE_PROFILES[DEFAULT_STORAGE_PROFILE]
+    )
+    # page_size must be set before anything is written (and before WAL)
+    if is_new_database and "page_size" in profile:
+        conn.execute(f"PRAGMA page_size = {int(profile['page_size'])};")
+    conn.execute(f"PRAGMA journal_mode = {profile['journal_mode']};")
+    conn.execute(f"PRAGMA synchronous = {profile['synchronous']};")
+    for pragma in ("cache_size", "mmap_size"):
+        if pragma in profile:
+            conn.execute(f"PRAGMA {pragma} = {int(profile[pragma])};")
+    if "temp_store" in profile:
+        conn.execute(f"PRAGMA temp_store = {profile['temp_store']};")
+
+
+def _word_count(text):
+    return len(text.split()) if text else 0
+
+
+class PooledConnection:
+    """
+    A thin proxy around a pooled sqlite3 connection.
+
+    It behaves like a normal connection, except that close() hands the
+    connection back to the pool, and commits are deferred while a
+    session() scope is active on the current thread.
+    """
+
+    def __init__(self, pool, raw_conn):
+        self._pool = pool
+        self._raw = raw_conn
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def commit(self):
+        if not self._pool.in_session():
+            self._raw.commit()
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self._pool.release(self._raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Inside a session the outermost scope decides commit or rollback
+        if self._pool.in_session():
+            return False
+        if exc_type is None:
+            self._raw.commit()
+        else:
+            self._raw.rollback()
+        return False
+
+
+class ConnectionPool:
+    """
+    Keeps one long-lived sqlite3 connection per thread for the whole process.
+
+    Connections are opened lazily, configured once, and reused by every
+    get_db_connection() call made from the same thread.
+    """
+
+    def __init__(self, db_file=DB_FILE, storage_profile=DEFAULT_STORAGE_PROFILE):
+        self.db_file = db_file
+        self.storage_profile = storage_profile
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}
+        self._stats = {
+            "connections_opened": 0,
+            "acquired": 0,
+            "reused": 0,
+            "sessions": 0,
+            "rollbacks": 0,
+        }
+
+    def _open_connection(self):
+        db_dir = os.path.dirname(self.db_file)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        is_new_database = (
+            not os.path.exists(self.db_file) or os.path.getsize(self.db_file) == 0
+        )
+        # check_same_thread is disabled only so close_all() can run at shutdown;
+        # each connection is still used exclusively by the thread that opened it.
+        conn = sqlite3.connect(self.db_file, timeout=10, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON;")
+        conn.create_function("word_count", 1, _word_count, deterministic=True)
+        apply_storage_profile(conn, self.storage_profile, is_new_database)
+        return conn
+
+    def _bump(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def acquire(self):
+        """Returns a proxy for the calling thread's connection, opening it if needed."""
+        raw_conn = getattr(self._local, "conn", None)
+        if raw_conn is None:
+            raw_conn = self._open_connection()
+            self._local.conn = raw_conn
+            self._local.session_depth = 0
+            with self._lock:
+                self._prune_dead_threads()
+                self._connections[threading.get_ident()] = raw_conn
+                self._stats["connections_opened"] += 1
+        else:
+            self._bump("reused")
+        self._bump("acquired")
+        return PooledConnection(self, raw_conn)
+
+    def release(self, raw_conn):
+        """Called when a proxy is closed. Discards uncommitted work outside sessions."""
+        if not self.in_session() and raw_conn.in_transaction:
+            # Matches the old close() semantics: unfinished work is thrown away
+            raw_conn.rollback()
+            self._bump("rollbacks")
+
+    def in_session(self):
+        return getattr(self._local, "session_depth", 0) > 0
+
+    def uses_wal(self):
+        profile = STORAGE_PROFILES.get(
+            self.storage_profile, STORAGE_PROFILES[DEFAULT_STORAGE_PROFILE]
+        )
+        return profile["journal_mode"] == "WAL"
+
+    @contextmanager
+    def snapshot(self):
+        """
+        A private connection, outside the pool, holding one read transaction
+        for the whole `with` block. Calls made through the pooled connection
+        meanwhile neither end it nor join it.
+        """
+        conn = self._open_connection()
+        try:
+            conn.execute("BEGIN")
+            yield conn
+        finally:
+            conn.rollback()  # read only
+            conn.close()
+
+    @contextmanager
+    def session(self):
+        """
+        Shares one connection and one transaction across every database call
+        made on this thread inside the `with` block. Nested sessions join the
+        outermost one, which commits on success and rolls back on error.
+        """
+        conn = self.acquire()
+        outermost = self._local.session_depth == 0
+        if outermost:
+            self._bump("sessions")
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+        self._local.session_depth += 1
+        try:
+            yield conn
+        except BaseException:
+            self._local.session_depth -= 1
+            committed = False
+            if outermost and conn.in_transaction:
+                conn.rollback()
+                self._bump("rollbacks")
+            raise
+        else:
+            self._local.session_depth -= 1
+            committed = True
+            if outermost and conn.in_transaction:
+                conn.commit()
+        finally:
+            conn.close()
+            if outermost:
+                for listener in _listeners:
+                    listener.on_session_end(committed)
+
+    def _prune_dead_threads(self):
+        live_idents = {t.ident for t in threading.enumerate()}
+        for ident in list(self._connections):
+            if ident not in live_idents:
+                self._connections.pop(ident).close()
+
+    def close_all(self):
+        """Closes every pooled connection. Call this once at application shutdown."""
+        with self._lock:
+            for conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["connections_open"] = len(self._connections)
+        stats["storage_profile"] = self.storage_profile
+        stats["in_session"] = self.in_session()
+        return stats
+
+
+_pool = ConnectionPool(DB_FILE)
+
+# Objects layered over the database (the read cache, the change event bus).
+# They are told when a session ends, so work deferred during it can be applied
+# once committed, and are cleared whenever the database file changes. They are
+# called in registration order: the cache is invalidated before events fire.
+_listeners = []
+
+
+def register_listener(listener):
+    _listeners.append(listener)
+
 
 def get_db_connection():
-    """Establishes the database connection and configuration."""
-    # Ensure the data directory exists before connecting
-    os.makedirs(DATA_DIR, exist_ok=True)
+    """Returns the calling thread's pooled database connection."""
+    return _pool.acquire()
+
+
+def session():
+    """Context manager sharing one connection and transaction across many calls."""
+    return _pool.session()
+
 
-    conn = sqlite3.connect(DB_FILE, timeout=10)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON;")
-    return conn
+def in_session():
+    """True while the calling thread is inside a session() block."""
+    return _pool.in_session()
+
+
+def uses_wal():
+    """
+    True when the active storage profile journals to a write-ahead log, so a
+    long read transaction does not block writers.
+    """
+    return _pool.uses_wal()
+
+
+def snapshot():
+    """Context manager yielding a private connection that reads one consistent snapshot."""
+    return _pool.snapshot()
+
+
+def get_pool_stats():
+    """Returns a snapshot of the connection pool counters."""
+    return _pool.get_stats()
+
+
+def close_all_connections():
+    """Closes all pooled connections (e.g. when the application quits)."""
+    _pool.close_all()
+
+
+def configure_database(db_file, storage_profile=None):
+    """Points the pool at a different database file, closing existing connections."""
+    global _pool
+    _pool.close_all()
+    _pool = ConnectionPool(db_file, storage_profile or _pool.storage_profile)
+    for listener in _listeners:
+        listener.clear()
+
+
+def set_storage_profile(profile_name):
+    """
+    Selects the storage profile used for new connections. Existing pooled
+    connections are closed so the next call reopens them with the new PRAGMAs.
+    """
+    if profile_name not in STORAGE_PROFILES:
+        print(
+            f"Unknown storage profile '{profile_name}', "
+            f"using '{DEFAULT_STORAGE_PROFILE}'."
+        )
+        profile_name = DEFAULT_STORAGE_PROFILE
+    _pool.close_all()
+    _pool.storage_profile = profile_name
+
+
+def get_storage_profile():
+    """Returns the name of the active storage profile."""
+    return _pool.storage_profile
 
 
 def create_tables():
@@ -103,12 +410,9 @@ def create_tables():
         );
     """
     )
-    # Schema migration check for 'color' column
-    cursor.execute("PRAGMA table_info(nodes);")
-    columns = [col[1] for col in cursor.fetchall()]
-    if "color" not in columns:
-        cursor.execute("ALTER TABLE nodes ADD COLUMN color TEXT DEFAULT '#FFFF00';")
-
     conn.commit()
+
+    # Versioned schema changes (columns, indexes, ...) are applied on top
+    run_migrations(conn)
     conn.close()
     print("Database tables created or verified successfully.")
@@ -1,5 +1,24 @@
+import hashlib
 from contextlib import closing
+from . import events
+from .cache import DOCUMENTS, SEGMENTS, document_text_cache, project_cache
 from .db_core import get_db_connection
+from .segments_db import _rebase_segments
+
+
+def compute_text_stats(text):
+    """Returns (word_count, char_count, line_count, content_hash) for a document's text."""
+    text = text or ""
+    line_count = text.count("\n") + 1 if text else 0
+    content_hash = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    return len(text.split()), len(text), line_count, content_hash
+
+
+def _save_document_stats(conn, document_id, text):
+    conn.execute(
+        "INSERT OR REPLACE INTO document_stats (document_id, word_count, char_count, line_count, content_hash) VALUES (?, ?, ?, ?, ?)",
+        (document_id, *compute_text_stats(text)),
+    )
 
 
 def add_document(project_id, title, text, participant_id=None):
@@ -10,24 +29,30 @@ def add_document(project_id, title, text, participant_id=None):
         (project_id, title, text, participant_id),
     )
     new_id = cursor.lastrowid
+    _save_document_stats(conn, new_id, text)
     conn.commit()
+    project_cache.invalidate(project_id, DOCUMENTS)
     conn.close()
+    events.publish(events.DocumentAdded(project_id=project_id, document_id=new_id))
     return new_id
 
 
 def get_documents_for_project(project_id):
-    conn = get_db_connection()
-    docs = conn.execute(
-        """
-        SELECT d.id, d.title, d.participant_id, p.name as participant_name
-        FROM documents d
-        LEFT JOIN participants p ON d.participant_id = p.id
-        WHERE d.project_id = ?
-    """,
-        (project_id,),
-    ).fetchall()
-    conn.close()
-    return docs
+    def load():
+        conn = get_db_connection()
+        docs = conn.execute(
+            """
+            SELECT d.id, d.title, d.participant_id, p.name as participant_name
+            FROM documents d
+            LEFT JOIN participants p ON d.participant_id = p.id
+            WHERE d.project_id = ?
+        """,
+            (project_id,),
+        ).fetchall()
+        conn.close()
+        return docs
+
+    return list(project_cache.get(project_id, DOCUMENTS, load))
 
 
 def get_document_content(document_id):
@@ -42,52 +67,97 @@ def get_document_content(document_id):
 def delete_document(document_id):
     conn = get_db_connection()
     with conn:
+        row = conn.execute(
+            "SELECT project_id FROM documents WHERE id = ?", (document_id,)
+        ).fetchone()
         conn.execute("DELETE FROM documents WHERE id = ?", (document_id,))
     conn.close()
+    document_text_cache.invalidate(document_id)
+    if row:
+        project_cache.invalidate(row[0], DOCUMENTS, SEGMENTS)
+        events.publish(
+            events.DocumentDeleted(project_id=row[0], document_id=document_id)
+        )
 
 
-def update_document_text_only(document_id, new_content):
+def update_document_text_only(document_id, new_content, offset_map=None):
+    """
+    Saves edited document text. When offset_map (a utils.offset_map.OffsetMap
+    holding the edits since the text was loaded) is given, the document's coded
+    segments are moved to follow the edits in the same transaction.
+    """
     conn = get_db_connection()
+    rebased_ids = []
     try:
         with conn:
             conn.execute(
                 "UPDATE documents SET content = ? WHERE id = ?",
                 (new_content, document_id),
             )
+            _save_document_stats(conn, document_id, new_content)
+            if offset_map is not None:
+                rebased_ids = _rebase_segments(
+                    conn, document_id, offset_map, new_content
+                )
+            row = conn.execute(
+                "SELECT project_id FROM documents WHERE id = ?", (document_id,)
+            ).fetchone()
     except Exception as e:
         # Consider more specific error handling if needed
         raise e
     finally:
         conn.close()
+    document_text_cache.invalidate(document_id)
+    if row:
+        if rebased_ids:
+            project_cache.invalidate(row[0], SEGMENTS)
+        events.publish(
+            events.DocumentEdited(
+                project_id=row[0],
+                document_id=document_id,
+                rebased_segment_ids=frozenset(rebased_ids),
+            )
+        )
+
+
+def get_document_stats(document_id):
+    """Returns the stored word/char/line counts and content hash of a document."""
+    conn = get_db_connection()
+    row = conn.execute(
+        "SELECT word_count, char_count, line_count, content_hash FROM document_stats WHERE document_id = ?",
+        (document_id,),
+    ).fetchone()
+    conn.close()
+    if row:
+        return dict(row)
+    return {"word_count": 0, "char_count": 0, "line_count": 0, "content_hash": None}
 
 
 def get_document_word_count(document_id):
     if not document_id:
         return 0
     conn = get_db_connection()
-    content_row = conn.execute(
-        "SELECT content FROM documents WHERE id = ?", (document_id,)
+    row = conn.execute(
+        "SELECT word_count FROM document_stats WHERE document_id = ?", (document_id,)
     ).fetchone()
     conn.close()
-    if content_row and content_row["content"]:
-        return len(content_row["content"].split())
-    return 0
+    return row["word_count"] if row else 0
 
 
 def get_project_word_count(project_id):
-    """Calculates the total word count for all documents in a project."""
+    """Sums the stored word counts of all documents in a project."""
     conn = get_db_connection()
-    docs = conn.execute(
-        "SELECT content FROM documents WHERE project_id = ?", (project_id,)
-    ).fetchall()
+    row = conn.execute(
+        """
+        SELECT COALESCE(SUM(s.word_count), 0)
+        FROM documents d
+        JOIN document_stats s ON s.document_id = d.id
+        WHERE d.project_id = ?
+        """,
+        (project_id,),
+    ).fetchone()
     conn.close()
-    total_words = 0
-    if docs:
-        for doc in docs:
-            # The 'content' might be None for an empty document
-            if doc and doc["content"]:
-                total_words += len(doc["content"].split())
-    return total_words
+    return row[0]
 
 
 def check_document_exists(project_id: int, title: str, content: str) -> bool:
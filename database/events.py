@@ -0,0 +1,202 @@
+"""
+Typed change events published by the *_db mutators, plus a per-project data
+version that increases by one with every published event.
+
+Views subscribe to apply each change incrementally. A view remembers the
+version it reflects, so an event whose version is not exactly one ahead
+means it missed something and should reload instead.
+"""
+
+import threading
+import traceback
+from dataclasses import dataclass, field, replace
+
+from .db_core import in_session, register_listener
+
+
+@dataclass(frozen=True, kw_only=True)
+class DataEvent:
+    project_id: int
+    version: int = 0
+
+
+@dataclass(frozen=True, kw_only=True)
+class SegmentAdded(DataEvent):
+    segment_id: int
+    document_id: int
+    node_id: int
+    participant_id: int | None
+    word_count: int
+
+
+@dataclass(frozen=True, kw_only=True)
+class SegmentDeleted(DataEvent):
+    segment_id: int
+    document_id: int
+    node_id: int
+    participant_id: int | None
+    word_count: int
+    segment_start: int
+    segment_end: int
+
+
+@dataclass(frozen=True, kw_only=True)
+class SegmentMoved(DataEvent):
+    # Recoded from old_node_id to node_id
+    segment_id: int
+    document_id: int
+    old_node_id: int
+    node_id: int
+    participant_id: int | None
+    word_count: int
+
+
+@dataclass(frozen=True, kw_only=True)
+class NodeAdded(DataEvent):
+    node_id: int
+    parent_id: int | None
+
+
+@dataclass(frozen=True, kw_only=True)
+class NodeRenamed(DataEvent):
+    node_id: int
+    name: str
+
+
+@dataclass(frozen=True, kw_only=True)
+class NodeRecolored(DataEvent):
+    node_id: int
+    color: str
+
+
+@dataclass(frozen=True, kw_only=True)
+class NodeMoved(DataEvent):
+    node_id: int
+    old_parent_id: int | None
+    new_parent_id: int | None
+
+
+@dataclass(frozen=True, kw_only=True)
+class NodesReordered(DataEvent):
+    node_ids: tuple = ()
+
+
+@dataclass(frozen=True, kw_only=True)
+class NodeDeleted(DataEvent):
+    node_id: int
+    # The node and all of its descendants; their segments were deleted too
+    deleted_node_ids: frozenset = field(default_factory=frozenset)
+
+
+@dataclass(frozen=True, kw_only=True)
+class DocumentAdded(DataEvent):
+    document_id: int
+
+
+@dataclass(frozen=True, kw_only=True)
+class DocumentEdited(DataEvent):
+    document_id: int
+    # Segments whose offsets, text or text_deleted flag the save rewrote
+    rebased_segment_ids: frozenset = field(default_factory=frozenset)
+
+
+@dataclass(frozen=True, kw_only=True)
+class DocumentDeleted(DataEvent):
+    document_id: int
+
+
+@dataclass(frozen=True, kw_only=True)
+class ParticipantAdded(DataEvent):
+    pass
+
+
+@dataclass(frozen=True, kw_only=True)
+class ParticipantUpdated(DataEvent):
+    participant_id: int
+
+
+@dataclass(frozen=True, kw_only=True)
+class ParticipantDeleted(DataEvent):
+    participant_id: int
+
+
+@dataclass(frozen=True, kw_only=True)
+class ProjectDeleted(DataEvent):
+    pass
+
+
+class ChangeEventBus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._versions = {}
+        self._local = threading.local()
+
+    def subscribe(self, callback):
+        """callback(event) is called on the publishing thread, after the write commits."""
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def get_data_version(self, project_id):
+        with self._lock:
+            return self._versions.get(project_id, 0)
+
+    def publish(self, event):
+        if in_session():
+            # Held back until the session commits; dropped if it rolls back
+            pending = getattr(self._local, "pending", None)
+            if pending is None:
+                pending = self._local.pending = []
+            pending.append(event)
+            return
+        self._dispatch(event)
+
+    def on_session_end(self, committed):
+        pending = getattr(self._local, "pending", None)
+        self._local.pending = None
+        if committed:
+            for event in pending or ():
+                self._dispatch(event)
+
+    def clear(self):
+        self._local.pending = None
+
+    def _dispatch(self, event):
+        with self._lock:
+            version = self._versions.get(event.project_id, 0) + 1
+            self._versions[event.project_id] = version
+            subscribers = list(self._subscribers)
+        event = replace(event, version=version)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception:
+                # One failing view must not stop the others from updating
+                traceback.print_exc()
+
+
+event_bus = ChangeEventBus()
+register_listener(event_bus)
+
+
+def publish(event):
+    event_bus.publish(event)
+
+
+def subscribe(callback):
+    event_bus.subscribe(callback)
+
+
+def unsubscribe(callback):
+    event_bus.unsubscribe(callback)
+
+
+def get_data_version(project_id):
+    """Returns the number of change events published for a project so far."""
+    return event_bus.get_data_version(project_id)
@@ -0,0 +1,571 @@
+"""
+Versioned schema migrations driven by PRAGMA user_version.
+
+Each step is applied once, in order, inside its own transaction, and must be
+idempotent so that databases created by older builds (which may already have
+part of a change applied by hand) upgrade cleanly.
+"""
+
+
+def _add_node_color_column(conn):
+    columns = [col[1] for col in conn.execute("PRAGMA table_info(nodes);")]
+    if "color" not in columns:
+        conn.execute("ALTER TABLE nodes ADD COLUMN color TEXT DEFAULT '#FFFF00';")
+
+
+def _add_lookup_indexes(conn):
+    statements = [
+        # Segments: per document (ordered by offset), per node, per participant
+        "CREATE INDEX IF NOT EXISTS idx_segments_document ON coded_segments (document_id, segment_start);",
+        "CREATE INDEX IF NOT EXISTS idx_segments_node ON coded_segments (node_id);",
+        "CREATE INDEX IF NOT EXISTS idx_segments_participant ON coded_segments (participant_id);",
+        # Documents: per project (covers the listing columns) and per participant
+        "CREATE INDEX IF NOT EXISTS idx_documents_project ON documents (project_id, title, participant_id);",
+        "CREATE INDEX IF NOT EXISTS idx_documents_participant ON documents (participant_id, project_id);",
+        # Nodes: roots/positions per project and children per parent
+        "CREATE INDEX IF NOT EXISTS idx_nodes_project ON nodes (project_id, parent_id, position);",
+        "CREATE INDEX IF NOT EXISTS idx_nodes_parent ON nodes (parent_id, position);",
+        # Participants: ordered listing per project, cascade lookups
+        "CREATE INDEX IF NOT EXISTS idx_participants_project ON participants (project_id, name);",
+        "CREATE INDEX IF NOT EXISTS idx_participant_documents_participant ON participant_documents (participant_id);",
+    ]
+    for statement in statements:
+        conn.execute(statement)
+
+
+def _add_node_closure_table(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS node_closure (
+            ancestor_id INTEGER NOT NULL,
+            descendant_id INTEGER NOT NULL,
+            depth INTEGER NOT NULL,
+            PRIMARY KEY (ancestor_id, descendant_id),
+            FOREIGN KEY (ancestor_id) REFERENCES nodes (id) ON DELETE CASCADE,
+            FOREIGN KEY (descendant_id) REFERENCES nodes (id) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+        """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_node_closure_descendant ON node_closure (descendant_id, depth);"
+    )
+    # Backfill every (ancestor, descendant) pair, including each node with itself
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO node_closure (ancestor_id, descendant_id, depth)
+        WITH RECURSIVE tree(ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM nodes
+            UNION ALL
+            SELECT t.ancestor_id, n.id, t.depth + 1
+            FROM tree t JOIN nodes n ON n.parent_id = t.descendant_id
+        )
+        SELECT ancestor_id, descendant_id, depth FROM tree;
+        """
+    )
+
+
+def _add_document_stats_table(conn):
+    from .documents_db import compute_text_stats
+
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS document_stats (
+            document_id INTEGER PRIMARY KEY,
+            word_count INTEGER NOT NULL DEFAULT 0,
+            char_count INTEGER NOT NULL DEFAULT 0,
+            line_count INTEGER NOT NULL DEFAULT 0,
+            content_hash TEXT,
+            FOREIGN KEY (document_id) REFERENCES documents (id) ON DELETE CASCADE
+        );
+        """
+    )
+    # Backfill one document at a time so large projects are never fully in memory
+    missing_ids = [
+        row[0]
+        for row in conn.execute(
+            "SELECT id FROM documents WHERE id NOT IN (SELECT document_id FROM document_stats)"
+        )
+    ]
+    for document_id in missing_ids:
+        content = conn.execute(
+            "SELECT content FROM documents WHERE id = ?", (document_id,)
+        ).fetchone()[0]
+        conn.execute(
+            "INSERT INTO document_stats (document_id, word_count, char_count, line_count, content_hash) VALUES (?, ?, ?, ?, ?)",
+            (document_id, *compute_text_stats(content)),
+        )
+
+
+def _add_segment_word_count(conn):
+    columns = [col[1] for col in conn.execute("PRAGMA table_info(coded_segments);")]
+    if "word_count" not in columns:
+        conn.execute(
+            "ALTER TABLE coded_segments ADD COLUMN word_count INTEGER NOT NULL DEFAULT 0;"
+        )
+    conn.execute("UPDATE coded_segments SET word_count = word_count(content_preview);")
+    # Covers the statistics GROUP BYs so they never read the segment rows (and their text)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_segments_stats ON coded_segments (document_id, node_id, participant_id, word_count);"
+    )
+
+
+def _add_segment_text_deleted_flag(conn):
+    columns = [col[1] for col in conn.execute("PRAGMA table_info(coded_segments);")]
+    if "text_deleted" not in columns:
+        conn.execute(
+            "ALTER TABLE coded_segments ADD COLUMN text_deleted INTEGER NOT NULL DEFAULT 0;"
+        )
+
+
+def _derive_segment_text(conn):
+    from .segments_db import make_preview, matches_document
+
+    columns = [col[1] for col in conn.execute("PRAGMA table_info(coded_segments);")]
+    if "text_derived" not in columns:
+        conn.execute(
+            "ALTER TABLE coded_segments ADD COLUMN text_derived INTEGER NOT NULL DEFAULT 0;"
+        )
+    # Only rows whose stored text still matches their document are shortened;
+    # any other row keeps the full text as its only faithful copy
+    document_ids = [
+        row[0]
+        for row in conn.execute(
+            "SELECT DISTINCT document_id FROM coded_segments WHERE text_derived = 0"
+        )
+    ]
+    for document_id in document_ids:
+        content = conn.execute(
+            "SELECT content FROM documents WHERE id = ?", (document_id,)
+        ).fetchone()
+        if content is None:
+            continue
+        content = content[0]
+        updates = []
+        for segment_id, start, end, text in conn.execute(
+            "SELECT id, segment_start, segment_end, content_preview FROM coded_segments WHERE document_id = ? AND text_derived = 0 AND text_deleted = 0",
+            (document_id,),
+        ):
+            if matches_document(content, start, end, text):
+                updates.append((make_preview(text), segment_id))
+        conn.executemany(
+            "UPDATE coded_segments SET content_preview = ?, text_derived = 1 WHERE id = ?",
+            updates,
+        )
+
+
+def _restore_unmatched_segment_text(conn):
+    from .segments_db import NON_BMP, matches_document, utf16_slicer
+
+    # New segments were derived without checking their document slice, which
+    # is off after a character outside the BMP (offsets are UTF-16 positions).
+    # Those rows get their full text back, sliced by UTF-16 position, and stop
+    # reading it from the document.
+    document_ids = [
+        row[0]
+        for row in conn.execute(
+            "SELECT DISTINCT document_id FROM coded_segments WHERE text_derived = 1"
+        )
+    ]
+    for document_id in document_ids:
+        content = conn.execute(
+            "SELECT content FROM documents WHERE id = ?", (document_id,)
+        ).fetchone()
+        if content is None or not NON_BMP.search(content[0]):
+            continue
+        content = content[0]
+        qt_slice = utf16_slicer(content)
+        updates = []
+        for segment_id, start, end in conn.execute(
+            "SELECT id, segment_start, segment_end FROM coded_segments WHERE document_id = ? AND text_derived = 1 AND text_deleted = 0",
+            (document_id,),
+        ):
+            text = qt_slice(start, end)
+            if not matches_document(content, start, end, text):
+                updates.append((text, len(text.split()), segment_id))
+        conn.executemany(
+            "UPDATE coded_segments SET content_preview = ?, word_count = ?, text_derived = 0 WHERE id = ?",
+            updates,
+        )
+
+
+# Text a coded segment is indexed under, from its row (r) and its document's
+# content (c): the document slice, or the stored text for rows not derived
+# from the document. substr counts code points while segment offsets count
+# UTF-16 units, which is why rows are only derived where the two agree
+# (segments_db.matches_document). The triggers below expand it with OLD/NEW values.
+_SEGMENT_TEXT = (
+    "CASE WHEN {r}.text_derived = 1 AND {r}.text_deleted = 0 "
+    "THEN substr({c}, {r}.segment_start + 1, {r}.segment_end - {r}.segment_start) "
+    "ELSE {r}.content_preview END"
+)
+
+
+def _add_full_text_index(conn):
+    # External-content FTS5 tables: the index reads text from documents (and,
+    # for segments, from a view slicing it) rather than storing another copy.
+    # Every 'delete' must pass exactly the values that were indexed, so each
+    # trigger deletes with the text as it was before its change.
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+            title, content, content='documents', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        );
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE VIEW IF NOT EXISTS coded_segment_texts AS
+        SELECT cs.id AS id, {_SEGMENT_TEXT.format(r="cs", c="d.content")} AS text
+        FROM coded_segments cs JOIN documents d ON d.id = cs.document_id;
+        """
+    )
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS coded_segments_fts USING fts5(
+            text, content='coded_segment_texts', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        );
+        """
+    )
+    old_document_text = _SEGMENT_TEXT.format(r="cs", c="OLD.content")
+    new_document_text = _SEGMENT_TEXT.format(r="cs", c="NEW.content")
+    current_content = "(SELECT content FROM documents WHERE id = {r}.document_id)"
+    old_segment_text = _SEGMENT_TEXT.format(r="OLD", c=current_content.format(r="OLD"))
+    triggers = [
+        """
+        CREATE TRIGGER IF NOT EXISTS documents_fts_insert AFTER INSERT ON documents BEGIN
+            INSERT INTO documents_fts (rowid, title, content)
+            VALUES (NEW.id, NEW.title, NEW.content);
+        END;
+        """,
+        # Before the row goes, while the segments' text can still be sliced;
+        # the cascaded segment deletes then find no document and skip
+        f"""
+        CREATE TRIGGER IF NOT EXISTS documents_fts_delete BEFORE DELETE ON documents BEGIN
+            INSERT INTO coded_segments_fts (coded_segments_fts, rowid, text)
+            SELECT 'delete', cs.id, {old_document_text}
+            FROM coded_segments cs WHERE cs.document_id = OLD.id;
+            INSERT INTO documents_fts (documents_fts, rowid, title, content)
+            VALUES ('delete', OLD.id, OLD.title, OLD.content);
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS documents_fts_update AFTER UPDATE OF title, content ON documents BEGIN
+            INSERT INTO documents_fts (documents_fts, rowid, title, content)
+            VALUES ('delete', OLD.id, OLD.title, OLD.content);
+            INSERT INTO documents_fts (rowid, title, content)
+            VALUES (NEW.id, NEW.title, NEW.content);
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS documents_fts_update_segments AFTER UPDATE OF content ON documents
+        WHEN OLD.content IS NOT NEW.content BEGIN
+            INSERT INTO coded_segments_fts (coded_segments_fts, rowid, text)
+            SELECT 'delete', cs.id, {old_document_text}
+            FROM coded_segments cs
+            WHERE cs.document_id = NEW.id AND cs.text_derived = 1 AND cs.text_deleted = 0;
+            INSERT INTO coded_segments_fts (rowid, text)
+            SELECT cs.id, {new_document_text}
+            FROM coded_segments cs
+            WHERE cs.document_id = NEW.id AND cs.text_derived = 1 AND cs.text_deleted = 0;
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS coded_segments_fts_insert AFTER INSERT ON coded_segments BEGIN
+            INSERT INTO coded_segments_fts (rowid, text)
+            SELECT id, text FROM coded_segment_texts WHERE id = NEW.id;
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS coded_segments_fts_delete AFTER DELETE ON coded_segments
+        WHEN EXISTS (SELECT 1 FROM documents WHERE id = OLD.document_id) BEGIN
+            INSERT INTO coded_segments_fts (coded_segments_fts, rowid, text)
+            VALUES ('delete', OLD.id, {old_segment_text});
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS coded_segments_fts_update AFTER UPDATE OF
+            document_id, segment_start, segment_end, content_preview, text_derived, text_deleted
+        ON coded_segments BEGIN
+            INSERT INTO coded_segments_fts (coded_segments_fts, rowid, text)
+            VALUES ('delete', OLD.id, {old_segment_text});
+            INSERT INTO coded_segments_fts (rowid, text)
+            SELECT id, text FROM coded_segment_texts WHERE id = NEW.id;
+        END;
+        """,
+    ]
+    for trigger in triggers:
+        conn.execute(trigger)
+    conn.execute("INSERT INTO documents_fts (documents_fts) VALUES ('rebuild');")
+    conn.execute(
+        "INSERT INTO coded_segments_fts (coded_segments_fts) VALUES ('rebuild');"
+    )
+
+
+def _rebuild_segment_full_text_index(conn):
+    # Entries indexed from mis-sliced rows before migration 9 are replaced
+    conn.execute(
+        "INSERT INTO coded_segments_fts (coded_segments_fts) VALUES ('rebuild');"
+    )
+
+
+# (version, description, step). Append new steps; never reorder or renumber.
+MIGRATIONS = [
+    (1, "Add nodes.color column", _add_node_color_column),
+    (
+        2,
+        "Add lookup indexes for segments, documents, nodes and participants",
+        _add_lookup_indexes,
+    ),
+    (3, "Add node_closure ancestor/descendant table", _add_node_closure_table),
+    (4, "Add document_stats table", _add_document_stats_table),
+    (5, "Add coded_segments.word_count column", _add_segment_word_count),
+    (6, "Add coded_segments.text_deleted flag", _add_segment_text_deleted_flag),
+    (7, "Read coded segment text from its document", _derive_segment_text),
+    (8, "Add FTS5 full-text index over documents and segments", _add_full_text_index),
+    (
+        9,
+        "Keep the full text of segments their document slice does not match",
+        _restore_unmatched_segment_text,
+    ),
+    (10, "Rebuild the coded segment full-text index", _rebuild_segment_full_text_index),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version;").fetchone()[0]
+
+
+def run_migrations(conn):
+    """
+    Applies every migration newer than the database's user_version.
+    Returns the list of versions that were applied.
+    """
+    current_version = get_schema_version(conn)
+    applied = []
+    for version, description, step in MIGRATIONS:
+        if version <= current_version:
+            continue
+        # DDL does not open an implicit transaction, so start one explicitly
+        conn.execute("BEGIN")
+        try:
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {int(version)};")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"Applied schema migration {version}: {description}")
+        applied.append(version)
+    if applied:
+        conn.execute("PRAGMA optimize;")
+    return applied
+
+
+# Representative statements for every lookup done by segments_db, nodes_db and
+# documents_db. Each must be answered through an index, never a full table scan.
+QUERY_PLAN_CHECKS = [
+    (
+        "segments for document",
+        "SELECT * FROM coded_segments s JOIN nodes n ON s.node_id = n.id "
+        "JOIN documents d ON s.document_id = d.id LEFT JOIN participants p ON d.participant_id = p.id "
+        "WHERE s.document_id = ? ORDER BY s.segment_start, s.id",
+        (1,),
+    ),
+    (
+        "segments for project",
+        "SELECT cs.* FROM coded_segments cs JOIN documents d ON cs.document_id = d.id "
+        "JOIN nodes n ON cs.node_id = n.id LEFT JOIN participants p ON cs.participant_id = p.id "
+        "WHERE d.project_id = ? ORDER BY d.title, cs.id",
+        (1,),
+    ),
+    (
+        "segments for participant",
+        "SELECT cs.* FROM coded_segments cs JOIN documents d ON cs.document_id = d.id "
+        "JOIN nodes n ON cs.node_id = n.id LEFT JOIN participants p ON cs.participant_id = p.id "
+        "WHERE d.project_id = ? AND cs.participant_id = ?",
+        (1, 1),
+    ),
+    (
+        "segments for nodes",
+        "SELECT cs.* FROM coded_segments cs JOIN documents d ON cs.document_id = d.id WHERE d.project_id = ? AND cs.node_id IN (?, ?)",
+        (1, 1, 2),
+    ),
+    (
+        "segments to rebase after an edit",
+        "SELECT id, segment_start, segment_end, content_preview, word_count, text_derived FROM coded_segments WHERE document_id = ? AND segment_end > ?",
+        (1, 0),
+    ),
+    (
+        "node statistics for document",
+        "SELECT node_id, COUNT(*), SUM(word_count) FROM coded_segments WHERE document_id = ? GROUP BY node_id",
+        (1,),
+    ),
+    (
+        "node statistics for project",
+        "SELECT cs.node_id, COUNT(*), SUM(cs.word_count) FROM coded_segments cs "
+        "WHERE cs.document_id IN (SELECT id FROM documents WHERE project_id = ?) GROUP BY cs.node_id",
+        (1,),
+    ),
+    (
+        "participant statistics for project",
+        "SELECT cs.participant_id, COUNT(*), SUM(cs.word_count) FROM coded_segments cs "
+        "WHERE cs.document_id IN (SELECT id FROM documents WHERE project_id = ?) GROUP BY cs.participant_id",
+        (1,),
+    ),
+    (
+        "delete segments of nodes",
+        "DELETE FROM coded_segments WHERE node_id IN (?, ?)",
+        (1, 2),
+    ),
+    (
+        "nodes for project",
+        "SELECT * FROM nodes WHERE project_id = ? ORDER BY position, name",
+        (1,),
+    ),
+    (
+        "root node count",
+        "SELECT COUNT(*) FROM nodes WHERE project_id = ? AND parent_id IS NULL",
+        (1,),
+    ),
+    (
+        "child nodes",
+        "SELECT id FROM nodes WHERE parent_id IN (?, ?)",
+        (1, 2),
+    ),
+    (
+        "node subtree",
+        "WITH RECURSIVE subtree(id, depth) AS (SELECT id, 0 FROM nodes WHERE id = ? "
+        "UNION ALL SELECT n.id, s.depth + 1 FROM nodes n JOIN subtree s ON n.parent_id = s.id) "
+        "SELECT n.* FROM subtree s JOIN nodes n ON n.id = s.id",
+        (1,),
+    ),
+    (
+        "node descendants",
+        "SELECT descendant_id FROM node_closure WHERE ancestor_id = ? AND depth > 0",
+        (1,),
+    ),
+    (
+        "node ancestors",
+        "SELECT ancestor_id FROM node_closure WHERE descendant_id = ? AND depth > 0 ORDER BY depth",
+        (1,),
+    ),
+    (
+        "node roll-up statistics",
+        "SELECT c.ancestor_id, COUNT(*) FROM coded_segments cs JOIN node_closure c ON c.descendant_id = cs.node_id WHERE cs.document_id = ? GROUP BY c.ancestor_id",
+        (1,),
+    ),
+    (
+        "segments of a node, streamed for export",
+        "SELECT cs.*, d.title, n.name, p.name FROM coded_segments cs JOIN documents d ON cs.document_id = d.id "
+        "JOIN nodes n ON cs.node_id = n.id LEFT JOIN participants p ON cs.participant_id = p.id "
+        "WHERE cs.node_id = ? ORDER BY d.title, cs.id",
+        (1,),
+    ),
+    (
+        "document word count",
+        "SELECT word_count FROM document_stats WHERE document_id = ?",
+        (1,),
+    ),
+    (
+        "project word count",
+        "SELECT SUM(s.word_count) FROM documents d JOIN document_stats s ON s.document_id = d.id WHERE d.project_id = ?",
+        (1,),
+    ),
+    (
+        "participant word count",
+        "SELECT SUM(s.word_count) FROM documents d JOIN document_stats s ON s.document_id = d.id WHERE d.project_id = ? AND d.participant_id = ?",
+        (1, 1),
+    ),
+    (
+        "documents for project",
+        "SELECT d.id, d.title, d.participant_id, p.name FROM documents d LEFT JOIN participants p ON d.participant_id = p.id WHERE d.project_id = ?",
+        (1,),
+    ),
+    (
+        "duplicate document check",
+        "SELECT 1 FROM documents WHERE project_id = ? AND title = ? AND content = ?",
+        (1, "t", "c"),
+    ),
+    (
+        "participant documents",
+        "SELECT content FROM documents WHERE project_id = ? AND participant_id = ?",
+        (1, 1),
+    ),
+    (
+        "participants for project",
+        "SELECT * FROM participants WHERE project_id = ? ORDER BY name",
+        (1,),
+    ),
+    (
+        "full-text document search",
+        "SELECT d.id FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid "
+        "WHERE documents_fts MATCH ? AND d.project_id = ? ORDER BY documents_fts.rank LIMIT 50",
+        ('"family"', 1),
+    ),
+    (
+        "full-text segment search",
+        "SELECT s.id FROM coded_segments_fts JOIN coded_segments s ON s.id = coded_segments_fts.rowid "
+        "JOIN documents d ON d.id = s.document_id JOIN nodes n ON n.id = s.node_id "
+        "WHERE coded_segments_fts MATCH ? AND d.project_id = ? ORDER BY coded_segments_fts.rank LIMIT 200",
+        ('"family"', 1),
+    ),
+]
+
+
+def find_table_scans(conn):
+    """
+    Runs EXPLAIN QUERY PLAN for every QUERY_PLAN_CHECKS entry and returns
+    (description, plan_detail) pairs for steps that scan a whole table.
+    """
+    offenders = []
+    for description, sql, params in QUERY_PLAN_CHECKS:
+        # Map aliases to tables so scans of CTEs (e.g. "SCAN subtree") are ignored
+        for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params):
+            detail = row[3]
+            if not detail.startswith("SCAN ") or "INDEX" in detail:
+                continue
+            scanned = detail.split()[1]
+            if scanned in _table_aliases(sql):
+                offenders.append((description, detail))
+    return offenders
+
+
+def _table_aliases(sql):
+    """Returns every table name and alias referenced after FROM/JOIN in sql."""
+    tokens = sql.replace("(", " ").replace(")", " ").split()
+    names = set()
+    for i, token in enumerate(tokens[:-1]):
+        if token.upper() in ("FROM", "JOIN") and tokens[i + 1] in _TABLES:
+            names.add(tokens[i + 1])
+            if i + 2 < len(tokens) and tokens[i + 2].upper() not in _KEYWORDS:
+                names.add(tokens[i + 2])
+    return names
+
+
+_TABLES = {
+    "projects",
+    "participants",
+    "participant_documents",
+    "documents",
+    "nodes",
+    "coded_segments",
+    "node_closure",
+    "document_stats",
+}
+_KEYWORDS = {"ON", "WHERE", "JOIN", "LEFT", "INNER", "ORDER", "GROUP", "LIMIT", "AS"}
+
+
+def assert_no_table_scans(conn):
+    """Raises AssertionError if any checked query falls back to a full table scan."""
+    offenders = find_table_scans(conn)
+    if offenders:
+        raise AssertionError(
+            "Full table scans found:\n"
+            + "\n".join(
+                f"  {description}: {detail}" for description, detail in offenders
+            )
+        )
@@ -1,5 +1,20 @@
+from . import events
+from .cache import NODES, SEGMENTS, project_cache
 from .db_core import get_db_connection
 
+# Walks a node's subtree in one query. sort_key orders siblings by position so
+# that "ORDER BY sort_key" yields the same pre-order as the node tree view.
+_SUBTREE_CTE = """
+    WITH RECURSIVE subtree(id, depth, path, sort_key) AS (
+        SELECT id, 0, CAST(id AS TEXT), ''
+        FROM nodes WHERE id = ?
+        UNION ALL
+        SELECT n.id, s.depth + 1, s.path || '/' || n.id,
+               s.sort_key || printf('%08d.%010d/', n.position, n.id)
+        FROM nodes n JOIN subtree s ON n.parent_id = s.id
+    )
+"""
+
 
 def add_node(project_id, name, parent_id, color):
     assert isinstance(project_id, int), "project_id must be an integer"
@@ -20,68 +35,122 @@ def add_node(project_id, name, parent_id, color):
                 "INSERT INTO nodes (project_id, name, parent_id, color, position) VALUES (?, ?, ?, ?, ?)",
                 (project_id, name, parent_id, color, position),
             )
-            return cursor.lastrowid
+            new_id = cursor.lastrowid
+            # The new node inherits every ancestor of its parent, plus itself
+            conn.execute(
+                """
+                INSERT INTO node_closure (ancestor_id, descendant_id, depth)
+                SELECT ancestor_id, ?, depth + 1 FROM node_closure WHERE descendant_id = ?
+                UNION ALL SELECT ?, ?, 0
+                """,
+                (new_id, parent_id, new_id, new_id),
+            )
+        project_cache.invalidate(project_id, NODES)
+        events.publish(
+            events.NodeAdded(project_id=project_id, node_id=new_id, parent_id=parent_id)
+        )
+        return new_id
     finally:
         conn.close()
 
 
+def _project_of_node(conn, node_id):
+    row = conn.execute(
+        "SELECT project_id FROM nodes WHERE id = ?", (node_id,)
+    ).fetchone()
+    return row[0] if row else None
+
+
 def get_nodes_for_project(project_id):
-    conn = get_db_connection()
-    nodes = conn.execute(
-        "SELECT * FROM nodes WHERE project_id = ? ORDER BY position, name",
-        (project_id,),
-    ).fetchall()
-    conn.close()
-    return [dict(row) for row in nodes]
+    def load():
+        conn = get_db_connection()
+        nodes = conn.execute(
+            "SELECT * FROM nodes WHERE project_id = ? ORDER BY position, name",
+            (project_id,),
+        ).fetchall()
+        conn.close()
+        return [dict(row) for row in nodes]
+
+    # Copies, so callers can annotate the dicts without touching the cache
+    return [dict(node) for node in project_cache.get(project_id, NODES, load)]
 
 
 def update_node_name(node_id, new_name):
     conn = get_db_connection()
     with conn:
         conn.execute("UPDATE nodes SET name = ? WHERE id = ?", (new_name, node_id))
+        project_id = _project_of_node(conn, node_id)
+    # Invalidate after the commit. Segment rows carry the node's name and color
+    project_cache.invalidate(project_id, NODES, SEGMENTS)
     conn.close()
+    events.publish(
+        events.NodeRenamed(project_id=project_id, node_id=node_id, name=new_name)
+    )
 
 
 def update_node_color(node_id, new_color):
     conn = get_db_connection()
     with conn:
         conn.execute("UPDATE nodes SET color = ? WHERE id = ?", (new_color, node_id))
+        project_id = _project_of_node(conn, node_id)
+    project_cache.invalidate(project_id, NODES, SEGMENTS)
     conn.close()
+    events.publish(
+        events.NodeRecolored(project_id=project_id, node_id=node_id, color=new_color)
+    )
 
 
 def delete_node_and_children(node_id):
+    """
+    Deletes a node and its whole subtree in a single statement. The coded
+    segments and node_closure rows of every deleted node are removed by
+    their ON DELETE CASCADE foreign keys.
+    """
     conn = get_db_connection()
-    cursor = conn.cursor()
-    nodes_to_delete = [node_id]
-    query_ids = [node_id]
-    while query_ids:
-        placeholders = ",".join("?" for _ in query_ids)
-        children = cursor.execute(
-            f"SELECT id FROM nodes WHERE parent_id IN ({placeholders})", query_ids
-        ).fetchall()
-        child_ids = [row["id"] for row in children]
-        nodes_to_delete.extend(child_ids)
-        query_ids = child_ids
-    placeholders = ",".join("?" for _ in nodes_to_delete)
-    cursor.execute(f"DELETE FROM nodes WHERE id IN ({placeholders})", nodes_to_delete)
-    cursor.execute(
-        f"DELETE FROM coded_segments WHERE node_id IN ({placeholders})",
-        nodes_to_delete,
-    )
-    conn.commit()
+    with conn:
+        project_id = _project_of_node(conn, node_id)
+        deleted_ids = frozenset(
+            row[0]
+            for row in conn.execute(
+                "SELECT descendant_id FROM node_closure WHERE ancestor_id = ?",
+                (node_id,),
+            )
+        )
+        conn.execute(
+            "DELETE FROM nodes WHERE id IN (SELECT descendant_id FROM node_closure WHERE ancestor_id = ?)",
+            (node_id,),
+        )
+    project_cache.invalidate(project_id, NODES, SEGMENTS)
     conn.close()
+    events.publish(
+        events.NodeDeleted(
+            project_id=project_id, node_id=node_id, deleted_node_ids=deleted_ids
+        )
+    )
 
 
 def update_node_order(node_positions):
     conn = get_db_connection()
     with conn:
         conn.executemany("UPDATE nodes SET position = ? WHERE id = ?", node_positions)
+        project_ids = {_project_of_node(conn, node_id) for _, node_id in node_positions}
     conn.close()
+    for project_id in project_ids:
+        project_cache.invalidate(project_id, NODES)
+        events.publish(
+            events.NodesReordered(
+                project_id=project_id,
+                node_ids=tuple(node_id for _, node_id in node_positions),
+            )
+        )
 
 
 def update_node_parent(node_id, new_parent_id):
     conn = get_db_connection()
     with conn:
+        old_parent_id = conn.execute(
+            "SELECT parent_id FROM nodes WHERE id = ?", (node_id,)
+        ).fetchone()[0]
         if new_parent_id is None:
             cursor = conn.execute(
                 "SELECT COUNT(*) FROM nodes WHERE project_id = (SELECT project_id FROM nodes WHERE id = ?) AND parent_id IS NULL",
@@ -96,34 +165,80 @@ def update_node_parent(node_id, new_parent_id):
             "UPDATE nodes SET parent_id = ?, position = ? WHERE id = ?",
             (new_parent_id, count, node_id),
         )
+        # Detach the moved subtree from its old ancestors...
+        conn.execute(
+            """
+            DELETE FROM node_closure
+            WHERE descendant_id IN (SELECT descendant_id FROM node_closure WHERE ancestor_id = ?)
+              AND ancestor_id NOT IN (SELECT descendant_id FROM node_closure WHERE ancestor_id = ?)
+            """,
+            (node_id, node_id),
+        )
+        # ...and attach it below every ancestor of the new parent
+        conn.execute(
+            """
+            INSERT INTO node_closure (ancestor_id, descendant_id, depth)
+            SELECT above.ancestor_id, below.descendant_id, above.depth + below.depth + 1
+            FROM node_closure above, node_closure below
+            WHERE above.descendant_id = ? AND below.ancestor_id = ?
+            """,
+            (new_parent_id, node_id),
+        )
+        project_id = _project_of_node(conn, node_id)
+    project_cache.invalidate(project_id, NODES)
     conn.close()
+    events.publish(
+        events.NodeMoved(
+            project_id=project_id,
+            node_id=node_id,
+            old_parent_id=old_parent_id,
+            new_parent_id=new_parent_id,
+        )
+    )
 
 
 def get_node_descendants(node_id):
     """
-    Recursively fetches all descendant node IDs for a given node_id.
+    Fetches all descendant node IDs for a given node_id from the closure table.
     """
     conn = get_db_connection()
-    cursor = conn.cursor()
-
-    all_descendant_ids = []
-
-    # Start with the direct children
-    query_ids = [node_id]
+    rows = conn.execute(
+        "SELECT descendant_id FROM node_closure WHERE ancestor_id = ? AND depth > 0 ORDER BY depth",
+        (node_id,),
+    ).fetchall()
+    conn.close()
+    return [row["descendant_id"] for row in rows]
 
-    while query_ids:
-        placeholders = ",".join("?" for _ in query_ids)
-        children = cursor.execute(
-            f"SELECT id FROM nodes WHERE parent_id IN ({placeholders})", query_ids
-        ).fetchall()
 
-        child_ids = [row["id"] for row in children]
+def get_node_ancestors(node_id):
+    """Fetches the ancestor IDs of a node, nearest (the parent) first."""
+    conn = get_db_connection()
+    rows = conn.execute(
+        "SELECT ancestor_id FROM node_closure WHERE descendant_id = ? AND depth > 0 ORDER BY depth",
+        (node_id,),
+    ).fetchall()
+    conn.close()
+    return [row["ancestor_id"] for row in rows]
 
-        if not child_ids:
-            break
 
-        all_descendant_ids.extend(child_ids)
-        query_ids = child_ids
+def get_node_subtree(node_id, include_root=True):
+    """
+    Returns a node and all of its descendants in tree (pre-)order.
 
+    Each row is a dict of the node's columns plus:
+      depth: 0 for the given node, 1 for its children, ...
+      path:  slash-separated node IDs from the given node down, e.g. "4/9/12"
+    """
+    conn = get_db_connection()
+    rows = conn.execute(
+        f"""
+        {_SUBTREE_CTE}
+        SELECT n.*, s.depth, s.path
+        FROM subtree s JOIN nodes n ON n.id = s.id
+        WHERE s.depth >= ?
+        ORDER BY s.sort_key
+        """,
+        (node_id, 0 if include_root else 1),
+    ).fetchall()
     conn.close()
-    return all_descendant_ids
+    return [dict(row) for row in rows]
@@ -1,4 +1,6 @@
 from contextlib import closing
+from . import events
+from .cache import DOCUMENTS, PARTICIPANTS, SEGMENTS, project_cache
 from .db_core import get_db_connection
 
 
@@ -9,16 +11,29 @@ def add_participant(project_id, name, details=""):
             "INSERT INTO participants (project_id, name, details) VALUES (?, ?, ?)",
             (project_id, name, details),
         )
+    project_cache.invalidate(project_id, PARTICIPANTS)
     conn.close()
+    events.publish(events.ParticipantAdded(project_id=project_id))
 
 
 def get_participants_for_project(project_id):
-    conn = get_db_connection()
-    participants = conn.execute(
-        "SELECT * FROM participants WHERE project_id = ? ORDER BY name", (project_id,)
-    ).fetchall()
-    conn.close()
-    return participants
+    def load():
+        conn = get_db_connection()
+        participants = conn.execute(
+            "SELECT * FROM participants WHERE project_id = ? ORDER BY name",
+            (project_id,),
+        ).fetchall()
+        conn.close()
+        return participants
+
+    return list(project_cache.get(project_id, PARTICIPANTS, load))
+
+
+def _project_of_participant(conn, participant_id):
+    row = conn.execute(
+        "SELECT project_id FROM participants WHERE id = ?", (participant_id,)
+    ).fetchone()
+    return row[0] if row else None
 
 
 def get_participant_for_document(document_id: int) -> int | None:
@@ -40,11 +55,22 @@ def update_participant(participant_id, name, details):
             "UPDATE participants SET name = ?, details = ? WHERE id = ?",
             (name, details, participant_id),
         )
+        project_id = _project_of_participant(conn, participant_id)
+    # Document listings and segment rows carry the participant's name
+    project_cache.invalidate(project_id, PARTICIPANTS, DOCUMENTS, SEGMENTS)
     conn.close()
+    events.publish(
+        events.ParticipantUpdated(project_id=project_id, participant_id=participant_id)
+    )
 
 
 def delete_participant(participant_id):
     conn = get_db_connection()
     with conn:
+        project_id = _project_of_participant(conn, participant_id)
         conn.execute("DELETE FROM participants WHERE id = ?", (participant_id,))
+    project_cache.invalidate(project_id, PARTICIPANTS, DOCUMENTS, SEGMENTS)
     conn.close()
+    events.publish(
+        events.ParticipantDeleted(project_id=project_id, participant_id=participant_id)
+    )
@@ -1,4 +1,6 @@
 import sqlite3
+from . import events
+from .cache import project_cache
 from .db_core import get_db_connection
 
 
@@ -38,4 +40,6 @@ def delete_project(project_id):
     conn = get_db_connection()
     with conn:
         conn.execute("DELETE FROM projects WHERE id = ?", (project_id,))
+    project_cache.invalidate(project_id)
     conn.close()
+    events.publish(events.ProjectDeleted(project_id=project_id))
@@ -0,0 +1,210 @@
+import re
+import sqlite3
+
+from .db_core import get_db_connection
+from .segments_db import get_document_text, get_segment_texts
+
+_OPERATORS = {"AND", "OR", "NOT"}
+_TOKEN = re.compile(r'"([^"]*)"?|(\()|(\))|([^\s()"]+)')
+_WORD = re.compile(r"\w+")
+SNIPPET_LENGTH = 160
+
+
+def build_match_query(text):
+    """
+    Turns what the user typed into an FTS5 query. Supports "quoted phrases",
+    prefix* terms, AND / OR / NOT (upper case, as in FTS5) and parentheses;
+    every other word is quoted, so punctuation never breaks the syntax.
+    Words without an operator between them must all match. Returns None for
+    an empty query.
+    """
+    parts = []
+    for phrase, opening, closing, word in _TOKEN.findall(text):
+        if opening or closing:
+            parts.append(opening or closing)
+        elif word in _OPERATORS:
+            parts.append(word)
+        elif word:
+            prefix = word.endswith("*")
+            word = word.rstrip("*")
+            if word:
+                parts.append(_quote(word) + ("*" if prefix else ""))
+        elif phrase.strip():
+            parts.append(_quote(phrase))
+    # Operators need an operand on both sides
+    while parts and parts[0] in _OPERATORS:
+        parts.pop(0)
+    while parts and parts[-1] in _OPERATORS:
+        parts.pop()
+    if all(part in _OPERATORS or part in "()" for part in parts):
+        return None
+    return " ".join(parts)
+
+
+def _quote(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _plain_query(text):
+    """Fallback for input build_match_query could not make valid: all words, ANDed."""
+    words = [_quote(word) for word in _WORD.findall(text)]
+    return " ".join(words) or None
+
+
+def _highlight_patterns(match_query):
+    """
+    Regexes finding the terms and phrases of a match query in plain text, to
+    place snippets and highlights. Like the index, they ignore case and treat
+    any run of non-word characters as a token separator. Returns (pattern,
+    scan): scan lacks the leading word boundary and expects lower-cased text,
+    which lets re skip ahead to its literal prefix in long documents.
+    """
+    alternatives = []
+    for term, prefix in re.findall(r'"((?:[^"]|"")*)"(\*?)', match_query):
+        words = _WORD.findall(term.replace('""', '"').lower())
+        if words:
+            pattern = r"\W+".join(re.escape(word) for word in words)
+            alternatives.append(pattern + (r"\w*" if prefix else r"\b"))
+    if not alternatives:
+        return None, None
+    # Longest first, so a phrase wins over one of its own words
+    alternatives.sort(key=len, reverse=True)
+    scan = "|".join(f"(?:{alternative})" for alternative in alternatives)
+    return re.compile(rf"\b(?:{scan})", re.IGNORECASE), re.compile(scan)
+
+
+def _first_match(text, pattern, scan):
+    """Offset of the first match of a _highlight_patterns pair in text, or None."""
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # Lower-casing changed some lengths, so offsets would not line up
+        match = pattern.search(text)
+        return match.start() if match else None
+    for match in scan.finditer(lowered):
+        start = match.start()
+        if start == 0 or not _WORD.match(lowered, start - 1):
+            return start
+    return None
+
+
+def _make_snippet(text, patterns, length):
+    """
+    The part of text around the first match, about length characters long
+    and cut at word boundaries. Returns (snippet_start, snippet, highlights):
+    where the snippet starts in text, and the (start, end) offsets of every
+    match within the snippet.
+    """
+    pattern, scan = patterns
+    first = _first_match(text, pattern, scan) if pattern else None
+    start = 0
+    if first:
+        start = max(0, first - length // 4)
+        if start:
+            # Begin at the start of a word
+            space = text.rfind(" ", max(0, start - 20), start)
+            start = space + 1 if space != -1 else start
+    end = min(len(text), start + length)
+    if end < len(text):
+        space = text.find(" ", end, end + 20)
+        end = space if space != -1 else end
+    snippet = text[start:end]
+    highlights = []
+    if pattern:
+        highlights = [(m.start(), m.end()) for m in pattern.finditer(snippet)]
+    return start, snippet, highlights
+
+
+def _run_search(sql, text, params):
+    """Runs an FTS query taking :match plus the named params; returns (rows, patterns)."""
+    match = build_match_query(text)
+    if match is None:
+        return [], (None, None)
+    conn = get_db_connection()
+    try:
+        try:
+            rows = conn.execute(sql, {**params, "match": match}).fetchall()
+        except sqlite3.OperationalError:
+            # e.g. unbalanced parentheses: retry with every word as a plain term
+            match = _plain_query(text)
+            if match is None:
+                return [], (None, None)
+            rows = conn.execute(sql, {**params, "match": match}).fetchall()
+    finally:
+        conn.close()
+    return [dict(row) for row in rows], _highlight_patterns(match)
+
+
+def search_documents(project_id, text, limit=50, snippet_length=SNIPPET_LENGTH):
+    """
+    Full-text search over the titles and bodies of a project's documents.
+    Returns dicts with document_id, title and rank (bm25; lower is better),
+    best match first, each with a snippet of the body around the first
+    match: snippet_start is its offset in the document, and highlights the
+    (start, end) of each match within the snippet.
+    """
+    results, patterns = _run_search(
+        """
+        SELECT d.id AS document_id, d.title, documents_fts.rank AS rank
+        FROM documents_fts
+        JOIN documents d ON d.id = documents_fts.rowid
+        WHERE documents_fts MATCH :match AND d.project_id = :project_id
+        ORDER BY documents_fts.rank
+        LIMIT :limit
+        """,
+        text,
+        {"project_id": project_id, "limit": limit},
+    )
+    # FTS5's snippet() re-tokenizes the whole body; a regex over it is far cheaper
+    for result in results:
+        content = get_document_text(result["document_id"])
+        (
+            result["snippet_start"],
+            result["snippet"],
+            result["highlights"],
+        ) = _make_snippet(content, patterns, snippet_length)
+    return results
+
+
+def search_segments(
+    project_id, text, limit=200, document_id=None, snippet_length=SNIPPET_LENGTH
+):
+    """
+    Full-text search over the text of a project's coded segments, optionally
+    within one document. Returns the segment fields with node_name,
+    document_title and rank, best match first, plus snippet, snippet_start
+    (its offset in the segment text) and highlights as in search_documents.
+    With limit=None every match is returned, without snippets.
+    """
+    document_filter = "AND s.document_id = :document_id" if document_id else ""
+    results, patterns = _run_search(
+        f"""
+        SELECT s.id, s.document_id, s.node_id, s.participant_id,
+               s.segment_start, s.segment_end, s.content_preview,
+               s.text_derived, s.text_deleted,
+               n.name AS node_name, d.title AS document_title,
+               coded_segments_fts.rank AS rank
+        FROM coded_segments_fts
+        JOIN coded_segments s ON s.id = coded_segments_fts.rowid
+        JOIN documents d ON d.id = s.document_id
+        JOIN nodes n ON n.id = s.node_id
+        WHERE coded_segments_fts MATCH :match AND d.project_id = :project_id
+        {document_filter}
+        ORDER BY coded_segments_fts.rank
+        LIMIT :limit
+        """,
+        text,
+        {
+            "project_id": project_id,
+            "document_id": document_id,
+            "limit": -1 if limit is None else limit,
+        },
+    )
+    if limit is None:
+        return results
+    for result, segment_text in zip(results, get_segment_texts(results)):
+        (
+            result["snippet_start"],
+            result["snippet"],
+            result["highlights"],
+        ) = _make_snippet(segment_text, patterns, snippet_length)
+    return results
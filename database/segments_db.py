@@ -1,14 +1,152 @@
-from .db_core import get_db_connection
+import re
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import partial
+
+from . import events
+from .cache import SEGMENTS, document_text_cache, project_cache
+from .db_core import get_db_connection, in_session, snapshot, uses_wal
+
+# Characters of a segment's text kept in content_preview for list display.
+# Rows with text_derived = 1 read their full text from documents.content,
+# sliced by Python index (or SQL substr); they are only flagged when that
+# slice is exactly their text (see matches_document).
+PREVIEW_LENGTH = 120
+
+# Characters outside the Basic Multilingual Plane (emoji, for one)
+NON_BMP = re.compile("[\U00010000-\U0010ffff]")
+
+
+def make_preview(text):
+    """The stored preview of a segment's text: its start, with paragraph breaks as newlines."""
+    return text[:PREVIEW_LENGTH].replace("\u2029", "\n")
+
+
+def matches_document(content, start, end, text):
+    """
+    True when a segment's selected text is content[start:end], so it can be
+    read back from its document. Segment offsets are Qt positions, which
+    count UTF-16 code units: after a character outside the BMP they run
+    ahead of Python indices and the slice no longer matches.
+    """
+    return content[start:end] == text.replace("\u2029", "\n")
+
+
+def utf16_slicer(content):
+    """
+    A function returning the text of content from one Qt (UTF-16) position to
+    another, or to the end when that is None.
+    """
+    if not NON_BMP.search(content):
+        return lambda start, end=None: content[start:end]
+    encoded = content.encode("utf-16-le")
+
+    def qt_slice(start, end=None):
+        stop = None if end is None else 2 * end
+        return encoded[2 * start : stop].decode("utf-16-le", "replace")
+
+    return qt_slice
 
 
 def add_coded_segment(document_id, node_id, participant_id, start, end, text_preview):
+    """
+    Codes [start, end) of a document. text_preview is the selected text; when
+    the document slice matches it only its first PREVIEW_LENGTH characters
+    are stored and the rest is read back from the document by
+    get_segment_text, otherwise the full text is kept.
+    """
+    word_count = len(text_preview.split())
+    derived = matches_document(get_document_text(document_id), start, end, text_preview)
+    if derived:
+        text_preview = make_preview(text_preview)
     conn = get_db_connection()
     with conn:
-        conn.execute(
-            "INSERT INTO coded_segments (document_id, node_id, participant_id, segment_start, segment_end, content_preview) VALUES (?, ?, ?, ?, ?, ?)",
-            (document_id, node_id, participant_id, start, end, text_preview),
+        cursor = conn.execute(
+            "INSERT INTO coded_segments (document_id, node_id, participant_id, segment_start, segment_end, content_preview, word_count, text_derived) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                document_id,
+                node_id,
+                participant_id,
+                start,
+                end,
+                text_preview,
+                word_count,
+                int(derived),
+            ),
         )
+        new_id = cursor.lastrowid
+        project_id = _project_of_document(conn, document_id)
+    project_cache.invalidate(project_id, SEGMENTS)
     conn.close()
+    events.publish(
+        events.SegmentAdded(
+            project_id=project_id,
+            segment_id=new_id,
+            document_id=document_id,
+            node_id=node_id,
+            participant_id=participant_id,
+            word_count=word_count,
+        )
+    )
+    return new_id
+
+
+def _project_of_document(conn, document_id):
+    row = conn.execute(
+        "SELECT project_id FROM documents WHERE id = ?", (document_id,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _rebase_segments(conn, document_id, offset_map, content):
+    """
+    Moves the document's segments to follow the edits recorded in offset_map,
+    within the caller's transaction. Segments before the first edit are not
+    read at all. A segment whose text was edited gets its preview and word
+    count from the new content (and reads its text from the document from then
+    on, where its slice matches); one whose text was deleted outright collapses
+    to where it stood, keeps its stored preview and is flagged with
+    text_deleted. Offsets are Qt (UTF-16) positions, so text is sliced by
+    those, and a derived segment an edit leaves behind a character outside the
+    BMP keeps its full text instead. Returns the ids of the segments that changed.
+    """
+    first_changed = offset_map.first_changed()
+    if first_changed is None:
+        return []
+    rows = conn.execute(
+        "SELECT id, segment_start, segment_end, content_preview, word_count, text_derived, text_deleted FROM coded_segments WHERE document_id = ? AND segment_end > ?",
+        (document_id, first_changed),
+    ).fetchall()
+    qt_slice = utf16_slicer(content)
+    has_non_bmp = NON_BMP.search(content) is not None
+    updates = []
+    for segment_id, start, end, preview, word_count, derived, deleted in rows:
+        row = (start, end, preview, word_count, derived, deleted)
+        mapped = None if deleted else offset_map.map_range(start, end)
+        if mapped is None:
+            position = offset_map.map_position(start)
+            new_row = (position, position, preview, word_count, 0, 1)
+        elif not offset_map.is_intact(start, end):
+            text = qt_slice(*mapped)
+            if matches_document(content, *mapped, text):
+                new_row = (*mapped, make_preview(text), len(text.split()), 1, 0)
+            else:
+                new_row = (*mapped, text, len(text.split()), 0, 0)
+        elif derived and has_non_bmp:
+            text = qt_slice(*mapped)
+            if matches_document(content, *mapped, text):
+                new_row = (*mapped, preview, word_count, 1, 0)
+            else:
+                new_row = (*mapped, text, word_count, 0, 0)
+        else:
+            new_row = (*mapped, preview, word_count, derived, 0)
+        if new_row != row:
+            updates.append((*new_row, segment_id))
+    conn.executemany(
+        "UPDATE coded_segments SET segment_start = ?, segment_end = ?, content_preview = ?, word_count = ?, text_derived = ?, text_deleted = ? WHERE id = ?",
+        updates,
+    )
+    return [update[-1] for update in updates]
 
 
 def get_coded_segments_for_nodes(project_id, node_ids, document_id=None):
@@ -18,30 +156,13 @@ def get_coded_segments_for_nodes(project_id, node_ids, document_id=None):
     """
     if not node_ids:
         return []
-
-    conn = get_db_connection()
-    placeholders = ",".join("?" * len(node_ids))
-
-    params = [project_id] + node_ids
-
-    sql = f"""
-        SELECT cs.*, d.title as document_title, d.id as document_id, n.name as node_name, n.color as node_color, p.name as participant_name
-        FROM coded_segments cs
-        JOIN documents d ON cs.document_id = d.id
-        JOIN nodes n ON cs.node_id = n.id
-        LEFT JOIN participants p ON cs.participant_id = p.id
-        WHERE d.project_id = ? AND cs.node_id IN ({placeholders})
-    """
-
-    if document_id:
-        sql += " AND d.id = ?"
-        params.append(document_id)
-
-    sql += " ORDER BY d.title, cs.id"
-
-    segments_rows = conn.execute(sql, tuple(params)).fetchall()
-    conn.close()
-    return [dict(row) for row in segments_rows]
+    node_ids = set(node_ids)
+    return [
+        dict(seg)
+        for seg in _project_segments(project_id)
+        if seg["node_id"] in node_ids
+        and (not document_id or seg["document_id"] == document_id)
+    ]
 
 
 # Replace the existing get_coded_segments_for_document function
@@ -59,6 +180,7 @@ def get_coded_segments_for_document(document_id):
         """
         SELECT
             s.id, s.document_id, s.segment_start, s.segment_end, s.content_preview,
+            s.word_count, s.text_derived, s.text_deleted,
             n.id as node_id, n.name as node_name, n.color as node_color,
             d.participant_id,
             p.name as participant_name,
@@ -71,7 +193,7 @@ def get_coded_segments_for_document(document_id):
         WHERE
             s.document_id = ?
         ORDER BY
-            s.segment_start
+            s.segment_start, s.id
     """,
         (document_id,),
     )
@@ -80,82 +202,403 @@ def get_coded_segments_for_document(document_id):
     return [dict(row) for row in rows]
 
 
-def get_coded_segments_for_project(project_id):
+def get_coded_segment(segment_id):
+    """Fetches one segment with the same columns as get_coded_segments_for_project."""
     conn = get_db_connection()
-    segments_rows = conn.execute(
+    row = conn.execute(
         """
-        SELECT cs.*, d.title as document_title, d.id as document_id, n.name as node_name, n.color as node_color, p.name as participant_name
+        SELECT cs.*, d.title as document_title, n.name as node_name, n.color as node_color, p.name as participant_name
         FROM coded_segments cs
         JOIN documents d ON cs.document_id = d.id
         JOIN nodes n ON cs.node_id = n.id
         LEFT JOIN participants p ON cs.participant_id = p.id
-        WHERE d.project_id = ? ORDER BY d.title, cs.id
-    """,
-        (project_id,),
-    ).fetchall()
+        WHERE cs.id = ?
+        """,
+        (segment_id,),
+    ).fetchone()
     conn.close()
-    return [dict(row) for row in segments_rows]
+    return dict(row) if row else None
 
 
-def get_coded_segments_for_participant(project_id, participant_id):
+def get_document_text(document_id):
+    """A document's content, through the document text LRU."""
+
+    def load():
+        conn = get_db_connection()
+        row = conn.execute(
+            "SELECT content FROM documents WHERE id = ?", (document_id,)
+        ).fetchone()
+        conn.close()
+        return row[0] if row else ""
+
+    return document_text_cache.get(document_id, load)
+
+
+def get_segment_text(segment):
+    """
+    Full text of a segment dict (any of the get_coded_segments_* rows), sliced
+    from its document. Segments whose text was deleted, or that predate
+    derived text and no longer match their document, return the stored text.
+    """
+    if not segment.get("text_derived") or segment.get("text_deleted"):
+        return segment["content_preview"]
+    text = get_document_text(segment["document_id"])
+    return text[segment["segment_start"] : segment["segment_end"]]
+
+
+def get_segment_texts(segments, documents=None):
+    """
+    get_segment_text for many segments; each document is read at most once.
+    Pass the same documents dict to several calls to share the texts read.
+    """
+    if documents is None:
+        documents = {}
+    texts = []
+    for segment in segments:
+        if not segment.get("text_derived") or segment.get("text_deleted"):
+            texts.append(segment["content_preview"])
+            continue
+        document_id = segment["document_id"]
+        text = documents.get(document_id)
+        if text is None:
+            text = documents[document_id] = get_document_text(document_id)
+        texts.append(text[segment["segment_start"] : segment["segment_end"]])
+    return texts
+
+
+SEGMENTS_SELECT = """
+    SELECT cs.*, d.title as document_title, d.id as document_id, n.name as node_name, n.color as node_color, p.name as participant_name
+    FROM coded_segments cs
+    JOIN documents d ON cs.document_id = d.id
+    JOIN nodes n ON cs.node_id = n.id
+    LEFT JOIN participants p ON cs.participant_id = p.id
+"""
+PROJECT_SEGMENTS_QUERY = (
+    SEGMENTS_SELECT + "WHERE d.project_id = ? ORDER BY d.title, cs.id"
+)
+
+# Rows read per query when a streaming read pages through segments
+KEYSET_PAGE_SIZE = 2000
+
+
+def _project_segments(project_id):
+    """The cached project-wide segment join, ordered by document title then id."""
+
+    def load():
+        conn = get_db_connection()
+        segments_rows = conn.execute(PROJECT_SEGMENTS_QUERY, (project_id,)).fetchall()
+        conn.close()
+        return [dict(row) for row in segments_rows]
+
+    return project_cache.get(project_id, SEGMENTS, load)
+
+
+def get_coded_segments_for_project(project_id):
+    return [dict(seg) for seg in _project_segments(project_id)]
+
+
+def iter_segments_by_node(node_ids, document_capacity=8):
+    """
+    Yields the coded segments of each node in node_ids, node by node, with
+    the columns of get_coded_segments_for_project plus their full "text".
+    Within a node they come in the same order (document title, then id).
+    Memory does not grow with the number of segments: only the last
+    document_capacity document texts are kept. See _segment_reader for how
+    the rows are read; close the generator when stopping early.
+    """
+    with _segment_reader(document_capacity) as pages:
+        for node_id in node_ids:
+            for page in pages("cs.node_id = ?", (node_id,), KEYSET_PAGE_SIZE):
+                yield from page
+
+
+def iter_coded_segment_batches(project_id, batch_size=10000):
+    """
+    Yields the rows of get_coded_segments_for_project, plus their full
+    "text", in lists of up to batch_size. The query bypasses the project
+    cache, so only one batch is held at a time. Segments come grouped by
+    document, so one document text is kept. The same caveats as
+    iter_segments_by_node apply.
+    """
+    with _segment_reader(1) as pages:
+        yield from pages("d.project_id = ?", (project_id,), batch_size)
+
+
+@contextmanager
+def _segment_reader(document_capacity):
+    """
+    Yields pages(where, params, page_size), which yields lists of the
+    segments matching where, ordered by document title then id, each with
+    its full "text".
+
+    Inside a session, or any transaction already open on this thread, rows
+    are read on that transaction. Under a WAL storage profile they are read
+    from one snapshot on a private connection: a long read transaction
+    there does not block writers, and database calls made meanwhile on this
+    thread cannot end it. Otherwise (the rollback journal of the
+    "compatibility" profile) a read transaction held for a whole export
+    would lock out every write, so rows are read a page at a time by
+    keyset, each page in a short transaction of its own. Such a stream is
+    not one snapshot: a segment added or removed during it may or may not
+    appear, but none is repeated or skipped otherwise.
+    """
     conn = get_db_connection()
-    segments_rows = conn.execute(
-        """
-        SELECT cs.*, d.title as document_title, d.id as document_id, n.name as node_name, n.color as node_color, p.name as participant_name
-        FROM coded_segments cs
-        JOIN documents d ON cs.document_id = d.id
-        JOIN nodes n ON cs.node_id = n.id
-        LEFT JOIN participants p ON cs.participant_id = p.id
-        WHERE d.project_id = ? AND cs.participant_id = ?
-        ORDER BY d.title, cs.id
-    """,
-        (project_id, participant_id),
-    ).fetchall()
-    conn.close()
-    return [dict(row) for row in segments_rows]
+    try:
+        if in_session() or conn.in_transaction:
+            yield partial(_cursor_pages, conn, _text_slicer(conn, document_capacity))
+        elif uses_wal():
+            with snapshot() as snapshot_conn:
+                add_text = _text_slicer(snapshot_conn, document_capacity)
+                yield partial(_cursor_pages, snapshot_conn, add_text)
+        else:
+            yield partial(_keyset_pages, conn, document_capacity)
+    finally:
+        conn.close()
+
+
+def _cursor_pages(conn, add_text, where, params, page_size):
+    cursor = conn.execute(
+        f"{SEGMENTS_SELECT} WHERE {where} ORDER BY d.title, cs.id", params
+    )
+    while True:
+        rows = cursor.fetchmany(page_size)
+        if not rows:
+            break
+        yield [add_text(dict(row)) for row in rows]
+
+
+def _keyset_pages(conn, document_capacity, where, params, page_size):
+    query = f"{SEGMENTS_SELECT} WHERE {where} ORDER BY d.title, cs.id LIMIT ?"
+    after_query = (
+        f"{SEGMENTS_SELECT} WHERE {where} AND (d.title, cs.id) > (?, ?)"
+        " ORDER BY d.title, cs.id LIMIT ?"
+    )
+    add_text = None
+    version = None
+    last = None
+    while True:
+        # The caller may have opened a session on this thread between pages
+        owns_transaction = not in_session() and not conn.in_transaction
+        if owns_transaction:
+            conn.execute("BEGIN")
+        try:
+            if last is None:
+                rows = conn.execute(query, (*params, page_size)).fetchall()
+            else:
+                rows = conn.execute(after_query, (*params, *last, page_size)).fetchall()
+            # Document texts kept from earlier pages are stale once anything
+            # was written since, by another connection or by this one
+            current = (
+                conn.execute("PRAGMA data_version").fetchone()[0],
+                conn.total_changes,
+            )
+            if current != version:
+                version = current
+                add_text = _text_slicer(conn, document_capacity)
+            page = [add_text(dict(row)) for row in rows]
+        finally:
+            if owns_transaction:
+                conn.rollback()  # read only
+        if not page:
+            break
+        yield page
+        last = (rows[-1]["document_title"], rows[-1]["id"])
+
+
+def _text_slicer(conn, capacity):
+    """
+    A function that sets a segment dict's "text", slicing it from its
+    document read through conn; the last capacity documents are kept.
+    """
+    documents = OrderedDict()
+
+    def add_text(segment):
+        if not segment["text_derived"] or segment["text_deleted"]:
+            segment["text"] = segment["content_preview"]
+            return segment
+        text = documents.get(segment["document_id"])
+        if text is None:
+            text = conn.execute(
+                "SELECT content FROM documents WHERE id = ?",
+                (segment["document_id"],),
+            ).fetchone()[0]
+            documents[segment["document_id"]] = text
+            if len(documents) > capacity:
+                documents.popitem(last=False)
+        else:
+            documents.move_to_end(segment["document_id"])
+        segment["text"] = text[segment["segment_start"] : segment["segment_end"]]
+        return segment
+
+    return add_text
+
+
+def get_coded_segments_for_participant(project_id, participant_id):
+    return [
+        dict(seg)
+        for seg in _project_segments(project_id)
+        if seg["participant_id"] == participant_id
+    ]
 
 
 def delete_coded_segment(segment_id):
     conn = get_db_connection()
     with conn:
+        row = conn.execute(
+            "SELECT document_id, node_id, participant_id, word_count, segment_start, segment_end FROM coded_segments WHERE id = ?",
+            (segment_id,),
+        ).fetchone()
+        project_id = _project_of_document(conn, row[0]) if row else None
         conn.execute("DELETE FROM coded_segments WHERE id = ?", (segment_id,))
     conn.close()
+    if project_id is not None:
+        project_cache.invalidate(project_id, SEGMENTS)
+        events.publish(
+            events.SegmentDeleted(
+                project_id=project_id, segment_id=segment_id, **dict(row)
+            )
+        )
 
 
-def get_node_statistics(project_id, document_id=None):
-    stats = {}
+def move_coded_segment(segment_id, node_id):
+    """Recodes a segment to another node, keeping its range and participant."""
     conn = get_db_connection()
-    if document_id:
-        sql = (
-            "SELECT node_id, content_preview FROM coded_segments WHERE document_id = ?"
+    with conn:
+        row = conn.execute(
+            "SELECT document_id, node_id, participant_id, word_count FROM coded_segments WHERE id = ?",
+            (segment_id,),
+        ).fetchone()
+        moved = row is not None and row["node_id"] != node_id
+        if moved:
+            project_id = _project_of_document(conn, row["document_id"])
+            conn.execute(
+                "UPDATE coded_segments SET node_id = ? WHERE id = ?",
+                (node_id, segment_id),
+            )
+    conn.close()
+    if not moved:
+        return
+    project_cache.invalidate(project_id, SEGMENTS)
+    events.publish(
+        events.SegmentMoved(
+            project_id=project_id,
+            segment_id=segment_id,
+            document_id=row["document_id"],
+            old_node_id=row["node_id"],
+            node_id=node_id,
+            participant_id=row["participant_id"],
+            word_count=row["word_count"],
         )
-        params = (document_id,)
+    )
+
+
+def _segment_scope(project_id, document_id=None, participant_id=None):
+    """Builds the WHERE clause (over coded_segments cs) shared by the statistics queries."""
+    conditions, params = [], []
+    if document_id:
+        conditions.append("cs.document_id = ?")
+        params.append(document_id)
     else:
-        sql = """
-            SELECT cs.node_id, cs.content_preview FROM coded_segments cs
-            JOIN documents d ON cs.document_id = d.id WHERE d.project_id = ?
-        """
-        params = (project_id,)
+        conditions.append(
+            "cs.document_id IN (SELECT id FROM documents WHERE project_id = ?)"
+        )
+        params.append(project_id)
+    if participant_id:
+        conditions.append("cs.participant_id = ?")
+        params.append(participant_id)
+    return " AND ".join(conditions), params
 
-    segments_rows = conn.execute(sql, params).fetchall()
+
+def _stats_by(column, where, params):
+    conn = get_db_connection()
+    rows = conn.execute(
+        f"""
+        SELECT {column} AS key, COUNT(*) AS segment_count, SUM(cs.word_count) AS word_count
+        FROM coded_segments cs
+        WHERE {where}
+        GROUP BY {column}
+        """,
+        params,
+    ).fetchall()
     conn.close()
+    return {
+        row["key"]: {
+            "word_count": row["word_count"] or 0,
+            "segment_count": row["segment_count"],
+        }
+        for row in rows
+    }
 
-    segments = [dict(row) for row in segments_rows]
-    for seg in segments:
-        stats.setdefault(seg["node_id"], {"word_count": 0, "segment_count": 0})
-        stats[seg["node_id"]]["segment_count"] += 1
-        stats[seg["node_id"]]["word_count"] += len(seg["content_preview"].split())
-    return stats
 
+def get_node_statistics(project_id, document_id=None, participant_id=None):
+    """Returns {node_id: {"word_count", "segment_count"}} for segments coded directly to each node."""
+    where, params = _segment_scope(project_id, document_id, participant_id)
+    return _stats_by("cs.node_id", where, params)
 
-def get_word_count_for_participant(project_id, participant_id):
+
+def get_participant_statistics(project_id, document_id=None):
+    """
+    Returns {participant_id: {"word_count", "segment_count"}}. Within a single
+    document every segment is attributed to the document's participant, which
+    matches how get_coded_segments_for_document reports them.
+    """
+    if document_id:
+        return _stats_by(
+            "(SELECT participant_id FROM documents WHERE id = cs.document_id)",
+            "cs.document_id = ?",
+            [document_id],
+        )
+    where, params = _segment_scope(project_id)
+    return _stats_by("cs.participant_id", where, params)
+
+
+def get_node_rollup_statistics(project_id, document_id=None, participant_id=None):
+    """
+    Returns {node_id: {"word_count", "segment_count"}} where each node's
+    counts include the segments of all of its descendants. Segments are
+    first totalled per node, then summed up the node_closure table.
+    """
+    where, params = _segment_scope(project_id, document_id, participant_id)
     conn = get_db_connection()
-    docs_rows = conn.execute(
-        "SELECT content FROM documents WHERE project_id = ? AND participant_id = ?",
-        (project_id, participant_id),
+    rows = conn.execute(
+        f"""
+        SELECT c.ancestor_id AS node_id,
+               SUM(direct.segment_count) AS segment_count,
+               SUM(direct.word_count) AS word_count
+        FROM (
+            SELECT cs.node_id,
+                   COUNT(*) AS segment_count,
+                   SUM(cs.word_count) AS word_count
+            FROM coded_segments cs
+            WHERE {where}
+            GROUP BY cs.node_id
+        ) direct
+        JOIN node_closure c ON c.descendant_id = direct.node_id
+        GROUP BY c.ancestor_id
+        """,
+        params,
     ).fetchall()
     conn.close()
+    return {
+        row["node_id"]: {
+            "word_count": row["word_count"] or 0,
+            "segment_count": row["segment_count"],
+        }
+        for row in rows
+    }
 
-    docs = [dict(row) for row in docs_rows]
-    total_words = sum(len(doc["content"].split()) for doc in docs if doc["content"])
-    return total_words
+
+def get_word_count_for_participant(project_id, participant_id):
+    """Sums the stored word counts of a participant's documents."""
+    conn = get_db_connection()
+    row = conn.execute(
+        """
+        SELECT COALESCE(SUM(s.word_count), 0)
+        FROM documents d
+        JOIN document_stats s ON s.document_id = d.id
+        WHERE d.project_id = ? AND d.participant_id = ?
+        """,
+        (project_id, participant_id),
+    ).fetchone()
+    conn.close()
+    return row[0]
@@ -7,7 +7,9 @@ import os
 
 from ui.startup_view import StartupView
 
-from managers.theme_manager import apply_theme
+from managers.theme_manager import apply_theme, load_settings
+from managers.export_jobs import shutdown_export_queue
+from managers.query_executor import shutdown_query_executor
 import database
 from utils.common import get_resource_path
 
@@ -51,7 +53,13 @@ if __name__ == "__main__":
     splash.show()
     app.processEvents()
     apply_theme(app)
+    database.set_storage_profile(
+        load_settings().get("storage_profile", database.DEFAULT_STORAGE_PROFILE)
+    )
     database.create_tables()
+    # Stop exports first: the query executor's shutdown closes every pooled connection
+    app.aboutToQuit.connect(shutdown_export_queue)
+    app.aboutToQuit.connect(shutdown_query_executor)
     time.sleep(2)
     window = MainWindow()
     window.show()
@@ -0,0 +1,63 @@
+# managers/data_events.py
+"""
+Delivers database change events to widgets on the GUI thread.
+
+The *_db mutators publish typed events (see database/events.py) after each
+commit. DataEventBridge re-emits them as a Qt signal, so events published on
+a worker thread are queued to the GUI thread like any other signal.
+DataVersionTracker tells a view whether an event can be applied to what it
+shows or whether it missed an event and has to reload.
+"""
+from PySide6.QtCore import QObject, Signal
+
+import database
+
+SKIP = "skip"  # another project, or already part of the loaded data
+APPLY = "apply"  # the next event after what the view shows
+RELOAD = "reload"  # the view missed at least one event
+
+
+class DataEventBridge(QObject):
+    changed = Signal(object)  # a database.DataEvent
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        database.subscribe(self._on_event)
+
+    def _on_event(self, event):
+        self.changed.emit(event)
+
+
+class DataVersionTracker:
+    """Remembers the data version of a project that a view was loaded at."""
+
+    def __init__(self, project_id):
+        self.project_id = project_id
+        self.version = None
+
+    def mark_loaded(self):
+        """Call when the view starts a full (re)load from the database."""
+        self.version = database.get_data_version(self.project_id)
+
+    def check(self, event):
+        """Returns SKIP, APPLY or RELOAD for an incoming event."""
+        if event.project_id != self.project_id:
+            return SKIP
+        if self.version is not None and event.version <= self.version:
+            return SKIP
+        if self.version is None or event.version != self.version + 1:
+            self.version = event.version
+            return RELOAD
+        self.version = event.version
+        return APPLY
+
+
+_bridge = None
+
+
+def get_data_event_bridge():
+    """Returns the application-wide bridge, creating it on first use."""
+    global _bridge
+    if _bridge is None:
+        _bridge = DataEventBridge()
+    return _bridge
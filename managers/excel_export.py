@@ -0,0 +1,169 @@
+# managers/excel_export.py
+"""
+Writes coded segments to Excel with openpyxl's write-only mode: rows stream
+to the file as they are produced instead of accumulating in a Workbook.
+Memory then grows only with openpyxl's shared-string table (each distinct
+text once), not with the number of rows or sheets.
+
+Segments are indexed by node once (NodeIndex); a sheet covering a node and
+its descendants merges the index lists of that family instead of scanning
+every segment. Nothing here imports Qt; export_manager adds the dialogs.
+"""
+import heapq
+import re
+from itertools import groupby
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+import database
+
+ROW_BATCH = 1000
+SEGMENT_COLUMNS = [("Participant", 25), ("Coded Segment", 80), ("Document", 40)]
+FAMILY_COLUMNS = [("Node", 30)] + SEGMENT_COLUMNS
+
+
+class NodeIndex:
+    """A project's nodes and coded segments, indexed for exporting node families."""
+
+    def __init__(self, nodes, segments):
+        self.nodes = {n["id"]: n for n in nodes}
+        self.segments = segments
+        self.children = {}  # parent_id: child node dicts, by position
+        for node in nodes:
+            self.children.setdefault(node["parent_id"], []).append(node)
+        for children in self.children.values():
+            children.sort(key=lambda n: n["position"])
+        # node_id: positions in segments, ascending
+        self.positions = {}
+        for position, segment in enumerate(segments):
+            self.positions.setdefault(segment["node_id"], []).append(position)
+
+    def family_ids(self, node_id):
+        """The node and all of its descendants, as a set."""
+        family = {node_id}
+        stack = [node_id]
+        while stack:
+            for child in self.children.get(stack.pop(), ()):
+                family.add(child["id"])
+                stack.append(child["id"])
+        return family
+
+    def family_segments(self, node_id):
+        """Segments coded to the node or a descendant, in the order of segments."""
+        lists = [
+            self.positions[i] for i in self.family_ids(node_id) if i in self.positions
+        ]
+        for position in heapq.merge(*lists):
+            yield self.segments[position]
+
+    def walk(self, node, prefix):
+        """Yields (node, outline prefix) for node and its descendants, depth first."""
+        yield node, prefix
+        for i, child in enumerate(self.children.get(node["id"], ())):
+            yield from self.walk(child, f"{prefix}{i + 1}.")
+
+    def roots(self):
+        """Yields (node, outline prefix) for every node, depth first from the roots."""
+        for i, root in enumerate(self.children.get(None, ())):
+            yield from self.walk(root, f"{i + 1}.")
+
+
+def sanitize_sheet_name(name):
+    return re.sub(r"[\\/*?:\[\]]", "", name)[:31]
+
+
+def _add_sheet(wb, title, columns):
+    ws = wb.create_sheet(title=sanitize_sheet_name(title))
+    # Write-only sheets take column widths only before the first row
+    for i, (_, width) in enumerate(columns):
+        ws.column_dimensions[chr(ord("A") + i)].width = width
+    header_font = Font(bold=True)
+    header = []
+    for name, _ in columns:
+        cell = WriteOnlyCell(ws, value=name)
+        cell.font = header_font
+        header.append(cell)
+    ws.append(header)
+    return ws
+
+
+def _append_segments(ws, segments, documents, with_node=False):
+    """Appends one row per segment, reading texts a batch at a time."""
+    batch = []
+    for segment in segments:
+        batch.append(segment)
+        if len(batch) == ROW_BATCH:
+            _append_batch(ws, batch, documents, with_node)
+            batch = []
+    if batch:
+        _append_batch(ws, batch, documents, with_node)
+
+
+def _append_batch(ws, segments, documents, with_node):
+    texts = database.get_segment_texts(segments, documents)
+    for segment, text in zip(segments, texts):
+        row = [segment["participant_name"] or "N/A", text, segment["document_title"]]
+        if with_node:
+            row.insert(0, segment["node_name"])
+        ws.append(row)
+
+
+def _discard(wb):
+    """Closes the sheet streams of an abandoned write-only workbook."""
+    for ws in wb.worksheets:
+        if not ws.closed:
+            ws.close()
+
+
+def write_node_sheets(file_path, nodes, segments, start_node_id=None, progress=None):
+    """
+    Writes one sheet per node listing the segments of the node and its
+    descendants. With start_node_id, only that node (numbered "1.") and its
+    descendants get sheets; otherwise every node does. progress(done, total)
+    is called after each sheet.
+    """
+    index = NodeIndex(nodes, segments)
+    if start_node_id is None:
+        sheets = list(index.roots())
+    else:
+        sheets = list(index.walk(index.nodes[start_node_id], "1."))
+    wb = openpyxl.Workbook(write_only=True)
+    documents = {}  # document texts, read once for all sheets
+    try:
+        for done, (node, prefix) in enumerate(sheets, 1):
+            ws = _add_sheet(wb, f"{prefix} {node['name']}", SEGMENT_COLUMNS)
+            _append_segments(ws, index.family_segments(node["id"]), documents)
+            if progress is not None:
+                progress(done, len(sheets))
+    except Exception:
+        _discard(wb)
+        raise
+    wb.save(file_path)
+
+
+def write_family_sheet(file_path, nodes, segments, start_node_id, progress=None):
+    """
+    Writes a single sheet with the segments of a node and its descendants, by
+    node name. progress(done, total) is called as each node's rows are written.
+    """
+    index = NodeIndex(nodes, segments)
+    start_node = index.nodes[start_node_id]
+    family_segments = sorted(
+        index.family_segments(start_node_id), key=lambda s: s["node_name"]
+    )
+    wb = openpyxl.Workbook(write_only=True)
+    ws = _add_sheet(wb, start_node["name"], FAMILY_COLUMNS)
+    documents = {}
+    groups = groupby(family_segments, key=lambda s: s["node_id"])
+    runs = [list(run) for _, run in groups]
+    try:
+        for done, run in enumerate(runs, 1):
+            _append_segments(ws, run, documents, with_node=True)
+            if progress is not None:
+                progress(done, len(runs))
+    except Exception:
+        _discard(wb)
+        raise
+    wb.save(file_path)
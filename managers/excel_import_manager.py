@@ -1,7 +1,26 @@
+from contextlib import contextmanager
+from itertools import islice
+
 import openpyxl
 import database
 from PySide6.QtWidgets import QApplication
 
+# Rows written per transaction
+IMPORT_BATCH_SIZE = 200
+
+
+@contextmanager
+def _row_savepoint(conn):
+    """Undoes all of one row's writes if any of them fails, keeping the batch."""
+    conn.execute("SAVEPOINT import_row")
+    try:
+        yield
+    except BaseException:
+        conn.execute("ROLLBACK TO import_row")
+        raise
+    finally:
+        conn.execute("RELEASE import_row")
+
 
 def import_data(project_id, file_path, mappings, progress_callback=None):
     """
@@ -46,57 +65,74 @@ def import_data(project_id, file_path, mappings, progress_callback=None):
     docs_imported = 0
     errors = []
 
-    # Iterate over rows, skipping the header
-    for row_idx, row in enumerate(sheet.iter_rows(min_row=2), start=2):
-        QApplication.processEvents()  # Keep UI responsive
+    rows = enumerate(sheet.iter_rows(min_row=2), start=2)  # skip the header
+    while True:
+        batch = list(islice(rows, IMPORT_BATCH_SIZE))
+        if not batch:
+            break
+        # One short transaction per batch instead of a commit per row. The
+        # event loop only runs between batches, never while it is open.
+        with database.session() as conn:
+            for row_idx, row in batch:
+                title = row[title_col_idx].value
+                content = row[content_col_idx].value
+
+                # Basic validation
+                if not title or not content:
+                    errors.append(
+                        f"Row {row_idx}: Skipped due to empty title or content."
+                    )
+                    continue
+
+                title = str(title).strip()
+                if title in existing_titles:
+                    original_title = title
+                    counter = 1
+                    while title in existing_titles:
+                        title = f"{original_title} (copy {counter})"
+                        counter += 1
+                content = str(content).strip()
 
-        title = row[title_col_idx].value
-        content = row[content_col_idx].value
-
-        # Basic validation
-        if not title or not content:
-            errors.append(f"Row {row_idx}: Skipped due to empty title or content.")
-            continue
-
-        title = str(title).strip()
-        if title in existing_titles:
-            original_title = title
-            counter = 1
-            while title in existing_titles:
-                title = f"{original_title} (copy {counter})"
-                counter += 1
-        content = str(content).strip()
-        participant_id = None
-
-        if participant_col_idx is not None:
-            participant_name = row[participant_col_idx].value
-            if participant_name:
-                participant_name = str(participant_name).strip()
-                if participant_name in participants_in_db:
-                    participant_id = participants_in_db[participant_name]
-                else:
-                    # Participant not found, create them and update our cache
-                    try:
-                        database.add_participant(project_id, participant_name)
-                        newly_added_participants = {
-                            p["name"]: p["id"]
-                            for p in database.get_participants_for_project(project_id)
-                        }
-                        participant_id = newly_added_participants.get(participant_name)
-                        participants_in_db[participant_name] = participant_id
-                    except Exception as e:
-                        errors.append(
-                            f"Row {row_idx}: Could not create new participant '{participant_name}'. Error: {e}"
+                participant_name = None
+                if participant_col_idx is not None:
+                    value = row[participant_col_idx].value
+                    if value:
+                        participant_name = str(value).strip()
+                participant_id = participants_in_db.get(participant_name)
+                new_participant = (
+                    participant_name is not None and participant_id is None
+                )
+
+                try:
+                    with _row_savepoint(conn):
+                        if new_participant:
+                            # Participant not found, create them
+                            try:
+                                database.add_participant(project_id, participant_name)
+                            except Exception as e:
+                                errors.append(
+                                    f"Row {row_idx}: Could not create new participant '{participant_name}'. Error: {e}"
+                                )
+                                continue
+                            participant_id = {
+                                p["name"]: p["id"]
+                                for p in database.get_participants_for_project(
+                                    project_id
+                                )
+                            }.get(participant_name)
+                        database.add_document(
+                            project_id, title, content, participant_id
                         )
-                        continue
-
-        try:
-            database.add_document(project_id, title, content, participant_id)
-            docs_imported += 1
-            existing_titles.add(title)
-        except Exception as e:
-            errors.append(
-                f"Row {row_idx}: Failed to import document '{title}'. Error: {e}"
-            )
+                except Exception as e:
+                    errors.append(
+                        f"Row {row_idx}: Failed to import document '{title}'. Error: {e}"
+                    )
+                    continue
+                # Only update the caches once the row's writes have stuck
+                if new_participant:
+                    participants_in_db[participant_name] = participant_id
+                docs_imported += 1
+                existing_titles.add(title)
+        QApplication.processEvents()  # Keep UI responsive
 
     return docs_imported, errors
@@ -0,0 +1,189 @@
+# managers/export_jobs.py
+"""
+Runs exports off the GUI thread, one at a time in submission order.
+
+submit() queues a writer from managers/exporters.py and returns an
+ExportJob whose signals are always emitted on the GUI thread: progress while
+the writer builds, then exactly one of finished, failed or cancelled. The
+user can keep coding and queue more exports while one is running.
+"""
+import itertools
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+
+import database
+from managers.exporters import ExportCancelled
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = range(5)
+# Minimum seconds between progress signals from one job
+PROGRESS_INTERVAL = 0.05
+
+
+class ExportJob(QObject):
+    progress = Signal(int, int)  # done, total
+    finished = Signal(object)  # result
+    failed = Signal(object)  # (exctype, value, traceback)
+    cancelled = Signal()
+
+    def __init__(self, job_id, title):
+        super().__init__()
+        self.job_id = job_id
+        self.title = title
+        self.state = QUEUED
+        self.future = None
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """Stops the job: a queued job never starts, a running one stops at its next progress step."""
+        self._cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+
+class ExportJobQueue(QObject):
+    job_added = Signal(object)  # ExportJob
+    # Emitted from the worker thread with job ids only, like QueryExecutor:
+    # jobs are created, used and destroyed on the GUI thread
+    _progressed = Signal(object)  # (job_id, done, total)
+    _completed = Signal(object)  # (job_id, state, result, error)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pool = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="nodeflow-export"
+        )
+        self._ids = itertools.count(1)
+        self._jobs = {}
+        self._progressed.connect(self._deliver_progress)
+        self._completed.connect(self._deliver)
+
+    def submit(self, title, fn, *args, on_finished=None, on_failed=None, **kwargs):
+        """
+        Queues fn(*args, progress=..., **kwargs) for the export worker.
+        on_finished(result) and on_failed((exctype, value, traceback)) are
+        called on the GUI thread; a cancelled job calls neither.
+        """
+        job_id = next(self._ids)
+        job = ExportJob(job_id, title)
+        if on_finished is not None:
+            job.finished.connect(on_finished)
+        if on_failed is not None:
+            job.failed.connect(on_failed)
+        self._jobs[job_id] = job
+        progressed = self._progressed
+        completed = self._completed
+        cancel_event = job._cancel_event
+
+        def run():
+            if cancel_event.is_set():
+                completed.emit((job_id, CANCELLED, None, None))
+                return
+            progressed.emit((job_id, 0, 0))
+            last_emit = 0.0
+
+            def progress(done, total):
+                nonlocal last_emit
+                if cancel_event.is_set():
+                    raise ExportCancelled()
+                now = time.monotonic()
+                if done == total or now - last_emit >= PROGRESS_INTERVAL:
+                    last_emit = now
+                    progressed.emit((job_id, done, total))
+
+            try:
+                result = fn(*args, progress=progress, **kwargs)
+            except ExportCancelled:
+                completed.emit((job_id, CANCELLED, None, None))
+            except Exception:
+                completed.emit((job_id, FAILED, None, sys.exc_info()))
+            else:
+                completed.emit((job_id, DONE, result, None))
+
+        def start():
+            if job.is_cancelled():
+                self._deliver((job_id, CANCELLED, None, None))
+                return
+            job.future = self._pool.submit(run)
+            job.future.add_done_callback(forget_if_cancelled)
+
+        def forget_if_cancelled(future):
+            # A cancelled future never runs, so nothing else would report it
+            if future.cancelled():
+                completed.emit((job_id, CANCELLED, None, None))
+
+        if database.in_session():
+            # Uncommitted writes are invisible to the worker's connection, so
+            # wait for the caller's session to end
+            QTimer.singleShot(0, start)
+        else:
+            start()
+        self.job_added.emit(job)
+        return job
+
+    @Slot(object)
+    def _deliver_progress(self, update):
+        job_id, done, total = update
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        job.state = RUNNING
+        job.progress.emit(done, total)
+
+    @Slot(object)
+    def _deliver(self, outcome):
+        job_id, state, result, error = outcome
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return
+        job.state = state
+        if state == DONE:
+            job.finished.emit(result)
+        elif state == FAILED:
+            job.failed.emit(error)
+        else:
+            job.cancelled.emit()
+
+    def jobs(self):
+        """The queued and running jobs, in submission order."""
+        return list(self._jobs.values())
+
+    def pending_count(self):
+        return len(self._jobs)
+
+    def shutdown(self, wait=True):
+        for job in list(self._jobs.values()):
+            job.cancel()
+        self._pool.shutdown(wait=wait)
+        self._jobs.clear()
+
+
+_queue = None
+
+
+def get_export_queue():
+    """Returns the application-wide export queue, creating it on first use."""
+    global _queue
+    if _queue is None:
+        _queue = ExportJobQueue()
+    return _queue
+
+
+def run_export(title, fn, *args, on_finished=None, on_failed=None, **kwargs):
+    """Shorthand for get_export_queue().submit(...)."""
+    return get_export_queue().submit(
+        title, fn, *args, on_finished=on_finished, on_failed=on_failed, **kwargs
+    )
+
+
+def shutdown_export_queue():
+    global _queue
+    if _queue is not None:
+        _queue.shutdown()
+        _queue = None
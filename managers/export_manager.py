@@ -1,260 +1,163 @@
 # managers/export_manager.py
+"""
+The export dialogs. Each function asks for a file path on the GUI thread,
+queues the matching writer from managers/exporters.py as a background
+export job and reports the outcome in a message box when the job ends.
+"""
+import os
+import traceback
 
 from PySide6.QtWidgets import QFileDialog, QMessageBox
-from docx import Document
-from openpyxl.styles import Font
-import json
-import re
-import database
-import openpyxl
-import networkx as nx
-from docx.shared import RGBColor
-
-
-def export_to_word(project_id, parent_widget=None):
-    """Exports the coded segments of a project to a .docx file."""
-    file_path, _ = QFileDialog.getSaveFileName(
-        parent_widget, "Save Word Report", "", "Word Documents (*.docx)"
-    )
-    if not file_path:
-        return
+from shiboken6 import isValid
 
-    # --- Fetch and structure the data ---
-    nodes = database.get_nodes_for_project(project_id)
-    coded_segments = database.get_coded_segments_for_project(project_id)
-
-    # Group segments by their node ID
-    segments_by_node = {}
-    for seg in coded_segments:
-        node_id = seg["node_id"]
-        if node_id not in segments_by_node:
-            segments_by_node[node_id] = []
-        segments_by_node[node_id].append(seg)
-
-    # --- Build the Word Document ---
-    doc = Document()
-    doc.add_heading("Qualitative Analysis Report", 0)
-
-    def write_nodes_recursively(parent_id=None, level=0, prefix=""):
-        children = sorted(
-            [n for n in nodes if n["parent_id"] == parent_id],
-            key=lambda x: x["position"],
-        )
+import database
+from managers import exporters
+from managers.export_jobs import run_export
+from managers.tabular_export import available_formats
 
-        for i, node in enumerate(children):
-            current_prefix = f"{prefix}{i + 1}."
-            doc.add_heading(f"{current_prefix} {node['name']}", level=level + 1)
 
-            if node["id"] in segments_by_node:
-                for segment_data in segments_by_node[node["id"]]:
-                    participant = segment_data["participant_name"] or "N/A"
-                    text = segment_data["content_preview"]
-                    p = doc.add_paragraph(style="List Bullet")
-                    p.add_run(f"{participant}: ").bold = True
-                    p.add_run(text)
+def _dialog_parent(parent_widget):
+    # The widget that started a job may have been closed by the time it ends
+    if parent_widget is not None and isValid(parent_widget):
+        return parent_widget
+    return None
 
-            write_nodes_recursively(
-                parent_id=node["id"], level=level + 1, prefix=current_prefix
-            )
 
-    write_nodes_recursively()
+def _queue_export(kind, file_path, saved_message, parent_widget, fn, *args):
+    """Queues fn(*args, file_path) and shows its outcome when it ends."""
 
-    # --- Save the document with error handling ---
-    try:
-        doc.save(file_path)
+    def on_finished(_):
         QMessageBox.information(
-            parent_widget,
+            _dialog_parent(parent_widget),
             "Export Successful",
-            f"Report successfully saved to:\n{file_path}",
-        )
-    except PermissionError:
-        QMessageBox.critical(
-            parent_widget,
-            "Permission Denied",
-            f"Could not save the file to:\n{file_path}\n\nPlease make sure you have permissions to write to this location and that the file is not currently open in another program.",
+            f"{saved_message}\n{file_path}",
         )
-    except Exception as e:
+
+    def on_failed(error):
+        exctype, value, tb = error
+        if issubclass(exctype, PermissionError):
+            QMessageBox.critical(
+                _dialog_parent(parent_widget),
+                "Permission Denied",
+                f"Could not save the file to:\n{file_path}\n\nPlease make sure you have permissions to write to this location and that the file is not currently open in another program.",
+            )
+            return
+        traceback.print_exception(exctype, value, tb)
         QMessageBox.critical(
-            parent_widget,
+            _dialog_parent(parent_widget),
             "Export Error",
-            f"An unexpected error occurred while saving the file:\n{e}",
+            f"An unexpected error occurred while saving the file:\n{value}",
         )
 
+    return run_export(
+        f"{kind}: {os.path.basename(file_path)}",
+        fn,
+        *args,
+        file_path,
+        on_finished=on_finished,
+        on_failed=on_failed,
+    )
+
+
+def export_to_word(project_id, parent_widget=None):
+    """Exports the coded segments of a project to a .docx file."""
+    file_path, _ = QFileDialog.getSaveFileName(
+        parent_widget, "Save Word Report", "", "Word Documents (*.docx)"
+    )
+    if not file_path:
+        return
+    return _queue_export(
+        "Word report",
+        file_path,
+        "Report successfully saved to:",
+        parent_widget,
+        exporters.write_word_report,
+        project_id,
+    )
+
+
+# Save dialog filters for JSON exports and the file name suffix each implies
+JSON_FILTERS = {
+    "JSON Files (*.json)": ".json",
+    "JSON Lines (*.ndjson)": ".ndjson",
+    "Compressed JSON (*.json.gz)": ".json.gz",
+    "Compressed JSON Lines (*.ndjson.gz)": ".ndjson.gz",
+}
+
 
 def export_to_json(project_id, parent_widget=None):
     """Exports the coded segments of a project to a .json file."""
-    file_path, _ = QFileDialog.getSaveFileName(
-        parent_widget, "Save JSON Export", "", "JSON Files (*.json)"
+    file_path, selected_filter = QFileDialog.getSaveFileName(
+        parent_widget, "Save JSON Export", "", ";;".join(JSON_FILTERS)
     )
     if not file_path:
         return
+    # The layout and compression follow the file name, so give it the
+    # suffix of the chosen filter when it has none of them
+    if not file_path.lower().endswith((".json", ".ndjson", ".jsonl", ".gz")):
+        file_path += JSON_FILTERS.get(selected_filter, ".json")
+    return _queue_export(
+        "JSON export",
+        file_path,
+        "JSON data successfully saved to:",
+        parent_widget,
+        exporters.write_json_export,
+        project_id,
+    )
 
-    nodes = database.get_nodes_for_project(project_id)
-    coded_segments = database.get_coded_segments_for_project(project_id)
-
-    segments_by_node = {}
-    for seg in coded_segments:
-        node_id = seg["node_id"]
-        if node_id not in segments_by_node:
-            segments_by_node[node_id] = []
-        # Store a dictionary with participant and text
-        segments_by_node[node_id].append(
-            {
-                "participant": seg["participant_name"] or "N/A",
-                "text": seg["content_preview"],
-                "document": seg["document_title"],
-            }
-        )
 
-    def build_json_recursively(parent_id=None):
-        children_data = []
-        children = sorted(
-            [n for n in nodes if n["parent_id"] == parent_id],
-            key=lambda x: x["position"],
-        )
+# Save dialog filters for table exports, by format
+TABLE_FILTERS = {
+    "parquet": "Parquet Files (*.parquet)",
+    "arrow": "Arrow IPC Files (*.arrow)",
+    "csv": "CSV Files (*.csv)",
+}
 
-        for node in children:
-            node_obj = {
-                "id": node["id"],
-                "name": node["name"],
-                "segments": segments_by_node.get(node["id"], []),
-                "children": build_json_recursively(parent_id=node["id"]),
-            }
-            children_data.append(node_obj)
-        return children_data
-
-    json_output = build_json_recursively()
-
-    # --- Save the JSON with error handling ---
-    try:
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(json_output, f, ensure_ascii=False, indent=4)
-        QMessageBox.information(
-            parent_widget,
-            "Export Successful",
-            f"JSON data successfully saved to:\n{file_path}",
-        )
-    except PermissionError:
-        QMessageBox.critical(
-            parent_widget,
-            "Permission Denied",
-            f"Could not save the file to:\n{file_path}\n\nPlease make sure you have permissions to write to this location and that the file is not currently open in another program.",
-        )
-    except Exception as e:
-        QMessageBox.critical(
-            parent_widget,
-            "Export Error",
-            f"An unexpected error occurred while saving the file:\n{e}",
-        )
+
+def export_to_table(project_id, parent_widget=None):
+    """
+    Exports the coded segments of a project as a flat table, with nodes and
+    participants tables beside it, to Parquet, Arrow or CSV.
+    """
+    filters = {TABLE_FILTERS[fmt]: fmt for fmt in available_formats()}
+    file_path, selected_filter = QFileDialog.getSaveFileName(
+        parent_widget, "Save Table Export", "", ";;".join(filters)
+    )
+    if not file_path:
+        return
+    fmt = filters.get(selected_filter, "csv")
+    if not file_path.lower().endswith(f".{fmt}"):
+        file_path += f".{fmt}"
+    return _queue_export(
+        "Table export",
+        file_path,
+        "Tables successfully saved to:",
+        parent_widget,
+        exporters.write_table_export,
+        project_id,
+    )
 
 
 def export_to_excel(project_id, parent_widget=None):
     """Exports coded segments to an Excel file with one sheet per node."""
-
     file_path, _ = QFileDialog.getSaveFileName(
         parent_widget, "Save Excel Report", "", "Excel Files (*.xlsx)"
     )
     if not file_path:
         return
+    return _queue_export(
+        "Excel report",
+        file_path,
+        "Excel report successfully saved to:",
+        parent_widget,
+        exporters.write_excel_report,
+        project_id,
+    )
+
 
-    # Fetch data for the ENTIRE project
+def _find_node(project_id, node_id):
     nodes = database.get_nodes_for_project(project_id)
-    coded_segments = database.get_coded_segments_for_project(project_id)
-
-    # --- Data Structuring for Traversal ---
-    nodes_by_id = {n["id"]: n for n in nodes}
-    nodes_by_parent = {n_id: [] for n_id in nodes_by_id}
-    nodes_by_parent[None] = []  # For root nodes
-
-    for n_id, node in nodes_by_id.items():
-        nodes_by_parent.get(node["parent_id"], []).append(node)
-
-    # Sort all children lists by position
-    for children_list in nodes_by_parent.values():
-        children_list.sort(key=lambda x: x["position"])
-
-    # --- Descendant and Segment Mapping ---
-    descendant_cache = {}
-
-    def get_all_descendant_ids(node_id):
-        if node_id in descendant_cache:
-            return descendant_cache[node_id]
-        descendants = []
-        for child_node in nodes_by_parent.get(node_id, []):
-            descendants.append(child_node["id"])
-            descendants.extend(get_all_descendant_ids(child_node["id"]))
-        descendant_cache[node_id] = descendants
-        return descendants
-
-    # --- Workbook Creation ---
-    wb = openpyxl.Workbook()
-    if "Sheet" in wb.sheetnames:
-        wb.remove(wb["Sheet"])
-
-    def sanitize_sheet_name(name):
-        name = re.sub(r"[\\/*?:\[\]]", "", name)
-        return name[:31]
-
-    # --- Recursive Sheet Creation ---
-    def create_sheets_recursively(parent_id, prefix=""):
-        children = nodes_by_parent.get(parent_id, [])
-        for i, node in enumerate(children):
-            node_id = node["id"]
-            current_prefix = f"{prefix}{i + 1}."
-            sheet_name = sanitize_sheet_name(f"{current_prefix} {node['name']}")
-
-            # Create worksheet
-            ws = wb.create_sheet(title=sheet_name)
-            headers = ["Participant", "Coded Segment", "Document"]
-            ws.append(headers)
-
-            # --- NEW: Bold headers ---
-            header_font = Font(bold=True)
-            for cell in ws[1]:
-                cell.font = header_font
-
-            # Get all node IDs for this sheet (self + descendants)
-            ids_to_include = [node_id] + get_all_descendant_ids(node_id)
-
-            # Filter segments and write to sheet
-            segments_for_sheet = [
-                s for s in coded_segments if s["node_id"] in ids_to_include
-            ]
-            for seg in segments_for_sheet:
-                participant = seg["participant_name"] or "N/A"
-                ws.append([participant, seg["content_preview"], seg["document_title"]])
-
-            # Adjust column widths
-            ws.column_dimensions["A"].width = 25
-            ws.column_dimensions["B"].width = 80
-            ws.column_dimensions["C"].width = 40
-
-            # Recurse for children
-            create_sheets_recursively(node_id, prefix=current_prefix)
-
-    # Start the process from the root (nodes with no parent)
-    create_sheets_recursively(None)
-
-    # --- Save the workbook with error handling ---
-    try:
-        wb.save(file_path)
-        QMessageBox.information(
-            parent_widget,
-            "Export Successful",
-            f"Excel report successfully saved to:\n{file_path}",
-        )
-    except PermissionError:
-        QMessageBox.critical(
-            parent_widget,
-            "Permission Denied",
-            f"Could not save the file to:\n{file_path}\n\nPlease make sure you have permissions to write to this location and that the file is not currently open in another program.",
-        )
-    except Exception as e:
-        QMessageBox.critical(
-            parent_widget,
-            "Export Error",
-            f"An unexpected error occurred while saving the file:\n{e}",
-        )
+    return next((n for n in nodes if n["id"] == node_id), None)
 
 
 def export_node_family_to_word(project_id, start_node_id, parent_widget=None):
@@ -262,12 +165,7 @@ def export_node_family_to_word(project_id, start_node_id, parent_widget=None):
     if not start_node_id:
         return
 
-    # Fetch all project data
-    all_nodes = database.get_nodes_for_project(project_id)
-    coded_segments = database.get_coded_segments_for_project(project_id)
-    nodes_map = {n["id"]: n for n in all_nodes}
-
-    start_node = nodes_map.get(start_node_id)
+    start_node = _find_node(project_id, start_node_id)
     if not start_node:
         return
 
@@ -279,89 +177,24 @@ def export_node_family_to_word(project_id, start_node_id, parent_widget=None):
     )
     if not file_path:
         return
-
-    # Filter segments for all nodes in the family first
-    segments_by_node = {}
-    ids_to_include = [start_node_id] + get_all_descendant_ids(
-        start_node_id, nodes_map, all_nodes
+    return _queue_export(
+        "Word report",
+        file_path,
+        "Report successfully saved to:",
+        parent_widget,
+        exporters.write_node_family_word,
+        project_id,
+        start_node_id,
     )
-    for seg in coded_segments:
-        if seg["node_id"] in ids_to_include:
-            node_id = seg["node_id"]
-            if node_id not in segments_by_node:
-                segments_by_node[node_id] = []
-            segments_by_node[node_id].append(seg)
-
-    # Build the document
-    doc = Document()
-    doc.add_heading(f"Report for Node: {start_node['name']}", 0)
-
-    # --- REFACTORED: Correct recursive function ---
-    def write_nodes_recursively(node_id, level, prefix):
-        node = nodes_map.get(node_id)
-        if not node:
-            return
 
-        # 1. Write the current node's info
-        doc.add_heading(f"{prefix} {node['name']}", level=level)
-        if node_id in segments_by_node:
-            for seg_data in segments_by_node[node_id]:
-                participant = seg_data["participant_name"] or "N/A"
-                text = seg_data["content_preview"]
-                p = doc.add_paragraph(style="List Bullet")
-                p.add_run(f"{participant}: ").bold = True
-                p.add_run(text)
-
-        # 2. Recurse for children
-        children = sorted(
-            [n for n in all_nodes if n["parent_id"] == node_id],
-            key=lambda x: x["position"],
-        )
-        for i, child_node in enumerate(children):
-            child_prefix = f"{prefix}{i + 1}."
-            write_nodes_recursively(child_node["id"], level + 1, child_prefix)
 
-    # Start the recursion with the selected node
-    write_nodes_recursively(start_node_id, level=1, prefix="1.")
-
-    # --- Save the document with error handling ---
-    try:
-        doc.save(file_path)
-        QMessageBox.information(
-            parent_widget,
-            "Export Successful",
-            f"Report successfully saved to:\n{file_path}",
-        )
-    except PermissionError:
-        QMessageBox.critical(
-            parent_widget,
-            "Permission Denied",
-            f"Could not save the file to:\n{file_path}\n\nPlease make sure you have permissions to write to this location and that the file is not currently open in another program.",
-        )
-    except Exception as e:
-        QMessageBox.critical(
-            parent_widget,
-            "Export Error",
-            f"An unexpected error occurred while saving the file:\n{e}",
-        )
-
-
-def get_all_descendant_ids(start_node_id, nodes_map, all_nodes):
-    """Helper to get all descendant IDs for a given node."""
-    nodes_by_parent = {n_id: [] for n_id in nodes_map}
-    nodes_by_parent[None] = []
-    for n in all_nodes:
-        nodes_by_parent.setdefault(n["parent_id"], []).append(n)
-
-    descendants = []
-    nodes_to_visit = [start_node_id]
-    while nodes_to_visit:
-        current_id = nodes_to_visit.pop(0)
-        children = nodes_by_parent.get(current_id, [])
-        for child in children:
-            descendants.append(child["id"])
-            nodes_to_visit.append(child["id"])
-    return descendants
+def get_all_descendant_ids(start_node_id, nodes_map=None, all_nodes=None):
+    """
+    Helper to get all descendant IDs for a given node. Resolved with one
+    indexed node_closure lookup; nodes_map/all_nodes are accepted for
+    backwards compatibility and no longer needed.
+    """
+    return database.get_node_descendants(start_node_id)
 
 
 # --- NEW: Selective node family export to Excel ---
@@ -370,11 +203,7 @@ def export_node_family_to_excel(project_id, start_node_id, parent_widget=None):
     if not start_node_id:
         return
 
-    all_nodes = database.get_nodes_for_project(project_id)
-    coded_segments = database.get_coded_segments_for_project(project_id)
-    nodes_map = {n["id"]: n for n in all_nodes}
-
-    start_node = nodes_map.get(start_node_id)
+    start_node = _find_node(project_id, start_node_id)
     if not start_node:
         return
 
@@ -386,66 +215,16 @@ def export_node_family_to_excel(project_id, start_node_id, parent_widget=None):
     )
     if not file_path:
         return
-
-    ids_to_include = [start_node_id] + get_all_descendant_ids(
-        start_node_id, nodes_map, all_nodes
+    return _queue_export(
+        "Excel report",
+        file_path,
+        "Excel report successfully saved to:",
+        parent_widget,
+        exporters.write_node_family_excel,
+        project_id,
+        start_node_id,
     )
 
-    wb = openpyxl.Workbook()
-    if "Sheet" in wb.sheetnames:
-        wb.remove(wb["Sheet"])
-
-    def sanitize_sheet_name(name):
-        return re.sub(r"[\\/*?:\[\]]", "", name)[:31]
-
-    # Create one sheet for the whole family
-    sheet_name = sanitize_sheet_name(start_node["name"])
-    ws = wb.create_sheet(title=sheet_name)
-    headers = ["Node", "Participant", "Coded Segment", "Document"]
-    ws.append(headers)
-
-    header_font = Font(bold=True)
-    for cell in ws[1]:
-        cell.font = header_font
-
-    # Filter segments and write to sheet
-    segments_for_sheet = [s for s in coded_segments if s["node_id"] in ids_to_include]
-    for seg in sorted(segments_for_sheet, key=lambda s: s["node_name"]):
-        ws.append(
-            [
-                seg["node_name"],
-                seg["participant_name"] or "N/A",
-                seg["content_preview"],
-                seg["document_title"],
-            ]
-        )
-
-    ws.column_dimensions["A"].width = 30
-    ws.column_dimensions["B"].width = 25
-    ws.column_dimensions["C"].width = 80
-    ws.column_dimensions["D"].width = 40
-
-    # --- Save the workbook with error handling ---
-    try:
-        wb.save(file_path)
-        QMessageBox.information(
-            parent_widget,
-            "Export Successful",
-            f"Excel report successfully saved to:\n{file_path}",
-        )
-    except PermissionError:
-        QMessageBox.critical(
-            parent_widget,
-            "Permission Denied",
-            f"Could not save the file to:\n{file_path}\n\nPlease make sure you have permissions to write to this location and that the file is not currently open in another program.",
-        )
-    except Exception as e:
-        QMessageBox.critical(
-            parent_widget,
-            "Export Error",
-            f"An unexpected error occurred while saving the file:\n{e}",
-        )
-
 
 def export_node_family_to_excel_multi_sheet(
     project_id, start_node_id, parent_widget=None
@@ -454,12 +233,7 @@ def export_node_family_to_excel_multi_sheet(
     if not start_node_id:
         return
 
-    # Fetch all project data
-    all_nodes = database.get_nodes_for_project(project_id)
-    coded_segments = database.get_coded_segments_for_project(project_id)
-    nodes_map = {n["id"]: n for n in all_nodes}
-
-    start_node = nodes_map.get(start_node_id)
+    start_node = _find_node(project_id, start_node_id)
     if not start_node:
         return
 
@@ -471,80 +245,15 @@ def export_node_family_to_excel_multi_sheet(
     )
     if not file_path:
         return
-
-    # --- Data Structuring for Traversal ---
-    nodes_by_parent = {n_id: [] for n_id in nodes_map}
-    nodes_by_parent[None] = []
-    for n in all_nodes:
-        nodes_by_parent.setdefault(n["parent_id"], []).append(n)
-
-    for children_list in nodes_by_parent.values():
-        children_list.sort(key=lambda x: x["position"])
-
-    # --- Workbook Creation ---
-    wb = openpyxl.Workbook()
-    if "Sheet" in wb.sheetnames:
-        wb.remove(wb["Sheet"])
-
-    def sanitize_sheet_name(name):
-        return re.sub(r"[\\/*?:\[\]]", "", name)[:31]
-
-    # --- Recursive Sheet Creation ---
-    def create_sheets_recursively(node, prefix):
-        node_id = node["id"]
-        sheet_name = sanitize_sheet_name(f"{prefix} {node['name']}")
-
-        ws = wb.create_sheet(title=sheet_name)
-        headers = ["Participant", "Coded Segment", "Document"]
-        ws.append(headers)
-
-        header_font = Font(bold=True)
-        for cell in ws[1]:
-            cell.font = header_font
-
-        ids_to_include_for_this_sheet = [node_id] + get_all_descendant_ids(
-            node_id, nodes_map, all_nodes
-        )
-
-        segments_for_sheet = [
-            s for s in coded_segments if s["node_id"] in ids_to_include_for_this_sheet
-        ]
-        for seg in segments_for_sheet:
-            participant = seg["participant_name"] or "N/A"
-            ws.append([participant, seg["content_preview"], seg["document_title"]])
-
-        ws.column_dimensions["A"].width = 25
-        ws.column_dimensions["B"].width = 80
-        ws.column_dimensions["C"].width = 40
-
-        # Recurse for children
-        children = nodes_by_parent.get(node_id, [])
-        for i, child_node in enumerate(children):
-            create_sheets_recursively(child_node, f"{prefix}{i + 1}.")
-
-    # Start the process from the start_node with prefix "1."
-    create_sheets_recursively(start_node, "1.")
-
-    # --- Save the workbook with error handling ---
-    try:
-        wb.save(file_path)
-        QMessageBox.information(
-            parent_widget,
-            "Export Successful",
-            f"Excel report successfully saved to:\n{file_path}",
-        )
-    except PermissionError:
-        QMessageBox.critical(
-            parent_widget,
-            "Permission Denied",
-            f"Could not save the file to:\n{file_path}\n\nPlease make sure you have permissions to write to this location and that the file is not currently open in another program.",
-        )
-    except Exception as e:
-        QMessageBox.critical(
-            parent_widget,
-            "Export Error",
-            f"An unexpected error occurred while saving the file:\n{e}",
-        )
+    return _queue_export(
+        "Excel report",
+        file_path,
+        "Excel report successfully saved to:",
+        parent_widget,
+        exporters.write_node_family_excel_multi_sheet,
+        project_id,
+        start_node_id,
+    )
 
 
 def export_co_occurrence_to_gexf(project_id, parent_widget=None):
@@ -554,75 +263,14 @@ def export_co_occurrence_to_gexf(project_id, parent_widget=None):
     )
     if not file_path:
         return
-
-    try:
-        nodes = database.get_nodes_for_project(project_id)
-        segments = database.get_coded_segments_for_project(project_id)
-
-        node_map = {node["id"]: node["name"] for node in nodes}
-        co_occurrence_matrix = {}
-
-        segments_by_content = {}
-        for seg in segments:
-            seg_key = (
-                seg["document_id"],
-                seg["segment_start"],
-                seg["segment_end"],
-            )
-            if seg_key not in segments_by_content:
-                segments_by_content[seg_key] = []
-            segments_by_content[seg_key].append(seg["node_id"])
-
-        for seg_key, node_ids in segments_by_content.items():
-            unique_node_ids = sorted(list(set(node_ids)))
-            for i in range(len(unique_node_ids)):
-                for j in range(i, len(unique_node_ids)):
-                    node1_id = unique_node_ids[i]
-                    node2_id = unique_node_ids[j]
-
-                    if node1_id == node2_id:
-                        continue
-
-                    node1_name = node_map.get(node1_id)
-                    node2_name = node_map.get(node2_id)
-
-                    if not node1_name or not node2_name:
-                        continue
-
-                    co_occurrence_matrix.setdefault(node1_name, {})
-                    co_occurrence_matrix[node1_name].setdefault(node2_name, 0)
-                    co_occurrence_matrix[node1_name][node2_name] += 1
-
-                    co_occurrence_matrix.setdefault(node2_name, {})
-                    co_occurrence_matrix[node2_name].setdefault(node1_name, 0)
-                    co_occurrence_matrix[node2_name][node1_name] += 1
-
-        G = nx.Graph()
-        for node1, connections in co_occurrence_matrix.items():
-            for node2, weight in connections.items():
-                if weight > 0 and node1 != node2:
-                    G.add_edge(node1, node2, weight=weight)
-
-        if not G.nodes():
-            for node in nodes:
-                G.add_node(node["name"])
-
-        nx.write_gexf(G, file_path)
-
-        QMessageBox.information(
-            parent_widget,
-            "Export Successful",
-            f"GEXF file successfully saved to:\n{file_path}",
-        )
-    except Exception as e:
-        import traceback
-
-        traceback.print_exc()
-        QMessageBox.critical(
-            parent_widget,
-            "Export Error",
-            f"An unexpected error occurred while saving the file:\n{e}",
-        )
+    return _queue_export(
+        "GEXF network",
+        file_path,
+        "GEXF file successfully saved to:",
+        parent_widget,
+        exporters.write_co_occurrence_gexf,
+        project_id,
+    )
 
 
 def export_annotated_document(
@@ -643,72 +291,12 @@ def export_annotated_document(
     )
     if not file_path:
         return
-
-    try:
-        content, _ = database.get_document_content(document_id)
-        segments = database.get_coded_segments_for_document(document_id)
-        segments.sort(key=lambda s: s["segment_start"])
-
-        doc = Document()
-        doc.add_heading(f"Annotated Document: {document_title}", 0)
-
-        p = doc.add_paragraph()
-        last_pos = 0
-        for seg in segments:
-            # Add text before the segment
-            p.add_run(content[last_pos : seg["segment_start"]])
-
-            # Add the segment with background color for highlight
-            run = p.add_run(seg["content_preview"])
-            hex_color = seg["node_color"].lstrip("#")
-            rgb = tuple(int(hex_color[i : i + 2], 16) for i in (0, 2, 4))
-            # Set background color using shading (python-docx)
-            run.font.highlight_color = None  # Remove any highlight
-            rPr = run._element.get_or_add_rPr()
-            shd = rPr.xpath("./w:shd")
-            from docx.oxml.ns import qn
-            from docx.oxml import OxmlElement
-
-            if not shd:
-                shd_elem = OxmlElement("w:shd")
-                shd_elem.set(qn("w:fill"), f"{hex_color}")
-                shd_elem.set(qn("w:val"), "clear")
-                shd_elem.set(qn("w:color"), "auto")
-                rPr.append(shd_elem)
-            else:
-                shd[0].set(qn("w:fill"), f"{hex_color}")
-                shd[0].set(qn("w:val"), "clear")
-                shd[0].set(qn("w:color"), "auto")
-            # Set font color for contrast
-            brightness = (rgb[0] * 299 + rgb[1] * 587 + rgb[2] * 114) / 1000
-            if brightness > 128:
-                run.font.color.rgb = RGBColor(0, 0, 0)  # black
-            else:
-                run.font.color.rgb = RGBColor(255, 255, 255)  # white
-
-            # Add remark as [<node>, <participant>] (no field name prefix)
-            info_run = p.add_run(f" [{seg['node_name']}, {seg['participant_name']}] ")
-            info_run.italic = True
-            info_run.font.size = run.font.size
-
-            last_pos = seg["segment_end"]
-
-        # Add remaining text
-        p.add_run(content[last_pos:])
-
-        doc.save(file_path)
-
-        QMessageBox.information(
-            parent_widget,
-            "Export Successful",
-            f"Annotated document successfully saved to:\n{file_path}",
-        )
-    except Exception as e:
-        import traceback
-
-        traceback.print_exc()
-        QMessageBox.critical(
-            parent_widget,
-            "Export Error",
-            f"An unexpected error occurred while saving the file:\n{e}",
-        )
+    return _queue_export(
+        "Annotated document",
+        file_path,
+        "Annotated document successfully saved to:",
+        parent_widget,
+        exporters.write_annotated_document,
+        document_id,
+        document_title,
+    )
@@ -0,0 +1,357 @@
+# managers/exporters.py
+"""
+Builds and writes export files. Nothing here imports Qt: each writer reads
+the project, builds the document and saves it to file_path, so it can run
+on a worker thread (managers/export_jobs.py) while export_manager keeps the
+file dialogs and message boxes on the GUI thread.
+
+Every writer takes an optional progress(done, total) callback, called after
+each node (or stage) is built. A callback may raise ExportCancelled to
+abandon the export; the file is then not written. Writers return an
+ExportResult; export_project() picks the project writer for a format.
+"""
+import os
+import time
+from dataclasses import dataclass
+
+import networkx as nx
+from docx import Document
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.shared import RGBColor
+
+import database
+from managers.excel_export import NodeIndex, write_family_sheet, write_node_sheets
+from managers.json_export import json_options, write_json
+from managers.tabular_export import table_format, write_table
+
+
+class ExportCancelled(Exception):
+    """Raised by a progress callback to stop an export before it is saved."""
+
+
+@dataclass(frozen=True, kw_only=True)
+class ExportResult:
+    format: str
+    path: str
+    nodes: int  # nodes covered by the export
+    segments: int  # coded segments written
+    size_bytes: int
+    seconds: float
+
+
+def _result(fmt, file_path, started, nodes, segments):
+    return ExportResult(
+        format=fmt,
+        path=file_path,
+        nodes=nodes,
+        segments=segments,
+        size_bytes=os.path.getsize(file_path),
+        seconds=time.perf_counter() - started,
+    )
+
+
+def _report(progress, done, total):
+    if progress is not None:
+        progress(done, total)
+
+
+def _add_segment_bullets(doc, segments, documents, style_id):
+    texts = database.get_segment_texts(segments, documents)
+    for segment, text in zip(segments, texts):
+        participant = segment["participant_name"] or "N/A"
+        p = doc.add_paragraph()
+        p._p.style = style_id
+        p.add_run(f"{participant}: ").bold = True
+        p.add_run(text)
+
+
+def _bullet_style_id(doc):
+    # add_paragraph(style=...) searches every style for the default of its
+    # type on each call, which dominates large reports; look it up once
+    return doc.styles["List Bullet"].style_id
+
+
+def _segments_by_node(index):
+    return {
+        node_id: [index.segments[i] for i in positions]
+        for node_id, positions in index.positions.items()
+    }
+
+
+def write_word_report(project_id, file_path, progress=None):
+    """The project's coded segments as a .docx outline, one heading per node."""
+    started = time.perf_counter()
+    index = NodeIndex(
+        database.get_nodes_for_project(project_id),
+        database.get_coded_segments_for_project(project_id),
+    )
+    segments_by_node = _segments_by_node(index)
+    doc = Document()
+    doc.add_heading("Qualitative Analysis Report", 0)
+    documents = {}
+    style_id = _bullet_style_id(doc)
+    total = len(index.nodes)
+    for done, (node, prefix) in enumerate(index.roots(), 1):
+        level = prefix.count(".")
+        doc.add_heading(f"{prefix} {node['name']}", level=level)
+        segments = segments_by_node.get(node["id"], [])
+        _add_segment_bullets(doc, segments, documents, style_id)
+        _report(progress, done, total)
+    doc.save(file_path)
+    return _result("docx", file_path, started, total, len(index.segments))
+
+
+def write_json_export(project_id, file_path, progress=None, lines=None, compress=None):
+    """
+    The project's node tree with each node's coded segments, streamed to
+    .json; as JSON Lines with lines=True and gzipped with compress=True.
+    Both default to what the file name implies (.ndjson/.jsonl, .gz).
+    """
+    started = time.perf_counter()
+    implied_lines, implied_compress = json_options(file_path)
+    lines = implied_lines if lines is None else lines
+    compress = implied_compress if compress is None else compress
+    nodes = database.get_nodes_for_project(project_id)
+    written = write_json(file_path, nodes, lines, compress, progress)
+    fmt = "ndjson" if lines else "json"
+    return _result(fmt, file_path, started, len(nodes), written)
+
+
+def write_ndjson_export(project_id, file_path, progress=None, compress=None):
+    """The project's nodes as JSON Lines, one object per node in tree order."""
+    return write_json_export(
+        project_id, file_path, progress, lines=True, compress=compress
+    )
+
+
+def write_table_export(project_id, file_path, progress=None, fmt=None):
+    """
+    The project's coded segments as one flat table, with nodes and
+    participants tables beside it, as .parquet, .arrow or .csv (by default,
+    what the file name implies); see managers/tabular_export.py.
+    """
+    started = time.perf_counter()
+    fmt = table_format(file_path) if fmt is None else fmt
+    nodes = database.get_nodes_for_project(project_id)
+    written = write_table(file_path, fmt, project_id, nodes, progress)
+    return _result(fmt, file_path, started, len(nodes), written)
+
+
+def write_parquet_export(project_id, file_path, progress=None):
+    """The segments, nodes and participants tables as Parquet (needs pyarrow)."""
+    return write_table_export(project_id, file_path, progress, fmt="parquet")
+
+
+def write_arrow_export(project_id, file_path, progress=None):
+    """The segments, nodes and participants tables as Arrow IPC files (needs pyarrow)."""
+    return write_table_export(project_id, file_path, progress, fmt="arrow")
+
+
+def write_csv_export(project_id, file_path, progress=None):
+    """The segments, nodes and participants tables as CSV."""
+    return write_table_export(project_id, file_path, progress, fmt="csv")
+
+
+def write_excel_report(project_id, file_path, progress=None):
+    """The project's coded segments as .xlsx, one sheet per node."""
+    started = time.perf_counter()
+    nodes = database.get_nodes_for_project(project_id)
+    segments = database.get_coded_segments_for_project(project_id)
+    write_node_sheets(file_path, nodes, segments, progress=progress)
+    return _result("xlsx", file_path, started, len(nodes), len(segments))
+
+
+def write_node_family_word(project_id, start_node_id, file_path, progress=None):
+    """A node and its descendants as a .docx outline numbered from "1."."""
+    started = time.perf_counter()
+    index = NodeIndex(
+        database.get_nodes_for_project(project_id),
+        database.get_coded_segments_for_project(project_id),
+    )
+    segments_by_node = _segments_by_node(index)
+    start_node = index.nodes[start_node_id]
+    family = list(index.walk(start_node, "1."))
+    doc = Document()
+    doc.add_heading(f"Report for Node: {start_node['name']}", 0)
+    documents = {}
+    style_id = _bullet_style_id(doc)
+    written = 0
+    for done, (node, prefix) in enumerate(family, 1):
+        doc.add_heading(f"{prefix} {node['name']}", level=prefix.count("."))
+        segments = segments_by_node.get(node["id"], [])
+        _add_segment_bullets(doc, segments, documents, style_id)
+        written += len(segments)
+        _report(progress, done, len(family))
+    doc.save(file_path)
+    return _result("docx", file_path, started, len(family), written)
+
+
+def _family_counts(segments, start_node_id):
+    family = {start_node_id, *database.get_node_descendants(start_node_id)}
+    return len(family), sum(1 for s in segments if s["node_id"] in family)
+
+
+def write_node_family_excel(project_id, start_node_id, file_path, progress=None):
+    """A node and its descendants as .xlsx, all segments on a single sheet."""
+    started = time.perf_counter()
+    nodes = database.get_nodes_for_project(project_id)
+    segments = database.get_coded_segments_for_project(project_id)
+    write_family_sheet(file_path, nodes, segments, start_node_id, progress=progress)
+    family_nodes, family_segments = _family_counts(segments, start_node_id)
+    return _result("xlsx", file_path, started, family_nodes, family_segments)
+
+
+def write_node_family_excel_multi_sheet(
+    project_id, start_node_id, file_path, progress=None
+):
+    """A node and its descendants as .xlsx, one sheet per node."""
+    started = time.perf_counter()
+    nodes = database.get_nodes_for_project(project_id)
+    segments = database.get_coded_segments_for_project(project_id)
+    write_node_sheets(file_path, nodes, segments, start_node_id, progress=progress)
+    family_nodes, family_segments = _family_counts(segments, start_node_id)
+    return _result("xlsx", file_path, started, family_nodes, family_segments)
+
+
+def write_co_occurrence_gexf(project_id, file_path, progress=None):
+    """The code co-occurrence network as a GEXF file, weighted by shared segments."""
+    started = time.perf_counter()
+    nodes = database.get_nodes_for_project(project_id)
+    segments = database.get_coded_segments_for_project(project_id)
+    _report(progress, 1, 3)
+
+    node_map = {node["id"]: node["name"] for node in nodes}
+    co_occurrence_matrix = {}
+
+    segments_by_content = {}
+    for seg in segments:
+        seg_key = (seg["document_id"], seg["segment_start"], seg["segment_end"])
+        segments_by_content.setdefault(seg_key, []).append(seg["node_id"])
+
+    for node_ids in segments_by_content.values():
+        unique_node_ids = sorted(set(node_ids))
+        for i, node1_id in enumerate(unique_node_ids):
+            for node2_id in unique_node_ids[i + 1 :]:
+                node1_name = node_map.get(node1_id)
+                node2_name = node_map.get(node2_id)
+                if not node1_name or not node2_name:
+                    continue
+                row = co_occurrence_matrix.setdefault(node1_name, {})
+                row[node2_name] = row.get(node2_name, 0) + 1
+                row = co_occurrence_matrix.setdefault(node2_name, {})
+                row[node1_name] = row.get(node1_name, 0) + 1
+    _report(progress, 2, 3)
+
+    G = nx.Graph()
+    for node1, connections in co_occurrence_matrix.items():
+        for node2, weight in connections.items():
+            if weight > 0 and node1 != node2:
+                G.add_edge(node1, node2, weight=weight)
+
+    if not G.nodes():
+        for node in nodes:
+            G.add_node(node["name"])
+
+    # Written under a temporary name so a cancel at the last step leaves no file
+    part_path = file_path + ".part"
+    try:
+        nx.write_gexf(G, part_path)
+        _report(progress, 3, 3)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    os.replace(part_path, file_path)
+    return _result("gexf", file_path, started, G.number_of_nodes(), len(segments))
+
+
+def _shade_run(run, hex_color):
+    """Gives a run a solid background and a contrasting font colour."""
+    rgb = tuple(int(hex_color[i : i + 2], 16) for i in (0, 2, 4))
+    run.font.highlight_color = None  # Remove any highlight
+    rPr = run._element.get_or_add_rPr()
+    shd = rPr.xpath("./w:shd")
+    if not shd:
+        shd_elem = OxmlElement("w:shd")
+        rPr.append(shd_elem)
+    else:
+        shd_elem = shd[0]
+    shd_elem.set(qn("w:fill"), f"{hex_color}")
+    shd_elem.set(qn("w:val"), "clear")
+    shd_elem.set(qn("w:color"), "auto")
+    brightness = (rgb[0] * 299 + rgb[1] * 587 + rgb[2] * 114) / 1000
+    if brightness > 128:
+        run.font.color.rgb = RGBColor(0, 0, 0)  # black
+    else:
+        run.font.color.rgb = RGBColor(255, 255, 255)  # white
+
+
+def write_annotated_document(document_id, document_title, file_path, progress=None):
+    """A document as .docx with its coded segments shaded in their node colours."""
+    started = time.perf_counter()
+    content, _ = database.get_document_content(document_id)
+    segments = database.get_coded_segments_for_document(document_id)
+    segments.sort(key=lambda s: s["segment_start"])
+
+    doc = Document()
+    doc.add_heading(f"Annotated Document: {document_title}", 0)
+
+    # Segment offsets are Qt (UTF-16) positions
+    qt_slice = database.utf16_slicer(content)
+    p = doc.add_paragraph()
+    last_pos = 0
+    for done, seg in enumerate(segments, 1):
+        # Add text before the segment
+        p.add_run(qt_slice(last_pos, seg["segment_start"]))
+
+        run = p.add_run(qt_slice(seg["segment_start"], seg["segment_end"]))
+        _shade_run(run, seg["node_color"].lstrip("#"))
+
+        # Add remark as [<node>, <participant>] (no field name prefix)
+        info_run = p.add_run(f" [{seg['node_name']}, {seg['participant_name']}] ")
+        info_run.italic = True
+        info_run.font.size = run.font.size
+
+        last_pos = seg["segment_end"]
+        _report(progress, done, len(segments))
+
+    # Add remaining text
+    p.add_run(qt_slice(last_pos))
+    doc.save(file_path)
+    nodes = len({seg["node_id"] for seg in segments})
+    return _result("docx", file_path, started, nodes, len(segments))
+
+
+# Whole-project writers by format, as used by the command line
+PROJECT_WRITERS = {
+    "docx": write_word_report,
+    "xlsx": write_excel_report,
+    "json": write_json_export,
+    "ndjson": write_ndjson_export,
+    "gexf": write_co_occurrence_gexf,
+    "parquet": write_parquet_export,
+    "arrow": write_arrow_export,
+    "csv": write_csv_export,
+}
+# Other file extensions of the formats above
+FORMAT_ALIASES = {"jsonl": "ndjson", "feather": "arrow"}
+
+
+def export_project(project_id, file_path, fmt=None, progress=None):
+    """
+    Exports a whole project to file_path in one of the PROJECT_WRITERS
+    formats (by default, the file's extension, ignoring a final ".gz") and
+    returns its ExportResult. JSON formats are gzipped when the name ends in .gz.
+    """
+    if fmt is None:
+        name = file_path[: -len(".gz")] if file_path.endswith(".gz") else file_path
+        fmt = os.path.splitext(name)[1].lstrip(".").lower()
+        fmt = FORMAT_ALIASES.get(fmt, fmt)
+    writer = PROJECT_WRITERS.get(fmt)
+    if writer is None:
+        raise ValueError(
+            f"Unknown export format {fmt!r}; expected one of "
+            f"{', '.join(PROJECT_WRITERS)}"
+        )
+    return writer(project_id, file_path, progress=progress)
@@ -0,0 +1,177 @@
+# managers/json_export.py
+"""
+Streams a project's coded segments to JSON without building the document in
+memory. Nodes are walked through NodeIndex's parent-to-children lists, and
+segments come node by node from a database cursor
+(database.iter_segments_by_node), so memory stays flat however many
+segments a project has.
+
+Two layouts are written:
+- JSON: the nested node tree, byte for byte what json.dump(..., indent=4)
+  produced for the same data.
+- JSON Lines (NDJSON): one compact object per node, in tree order, with its
+  parent_id instead of nested children.
+
+Either can be gzip-compressed. Nothing here imports Qt.
+"""
+import gzip
+import json
+import os
+from contextlib import closing
+from itertools import groupby
+
+import database
+from managers.excel_export import NodeIndex
+
+INDENT = 4
+LINES_SUFFIXES = (".ndjson", ".jsonl")
+# gzip's command-line default; level 9 takes about twice as long for little gain
+GZIP_LEVEL = 6
+
+
+def json_options(file_path):
+    """(lines, compress) implied by a file name: .ndjson/.jsonl and .gz."""
+    name = file_path.lower()
+    compress = name.endswith(".gz")
+    if compress:
+        name = name[: -len(".gz")]
+    return name.endswith(LINES_SUFFIXES), compress
+
+
+# json.dumps(..., ensure_ascii=False) builds a new encoder on every call
+_dumps = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def _segment_object(segment):
+    return {
+        "participant": segment["participant_name"] or "N/A",
+        "text": segment["text"],
+        "document": segment["document_title"],
+    }
+
+
+class _NodeRuns:
+    """Hands out the segment stream one node's run at a time, in node order."""
+
+    def __init__(self, segments):
+        self._groups = groupby(segments, key=lambda s: s["node_id"])
+        self._next = next(self._groups, None)
+        self.count = 0
+
+    def take(self, node_id):
+        if self._next is None or self._next[0] != node_id:
+            return
+        for segment in self._next[1]:
+            self.count += 1
+            yield segment
+        self._next = next(self._groups, None)
+
+
+class _TreeWriter:
+    """Writes the nested layout exactly as json.dump with indent=4 would."""
+
+    def __init__(self, f, index, runs, progress):
+        self.f = f
+        self.index = index
+        self.runs = runs
+        self.progress = progress
+        self.done = 0
+
+    def _newline(self, depth):
+        self.f.write("\n" + " " * (INDENT * depth))
+
+    def write_nodes(self, parent_id, depth):
+        children = self.index.children.get(parent_id, ())
+        if not children:
+            self.f.write("[]")
+            return
+        self.f.write("[")
+        for i, node in enumerate(children):
+            if i:
+                self.f.write(",")
+            self._newline(depth + 1)
+            self.f.write("{")
+            self._newline(depth + 2)
+            self.f.write(f'"id": {_dumps(node["id"])},')
+            self._newline(depth + 2)
+            self.f.write(f'"name": {_dumps(node["name"])},')
+            self._newline(depth + 2)
+            self.f.write('"segments": ')
+            self.write_segments(self.runs.take(node["id"]), depth + 2)
+            self.f.write(",")
+            self.done += 1
+            if self.progress is not None:
+                self.progress(self.done, len(self.index.nodes))
+            self._newline(depth + 2)
+            self.f.write('"children": ')
+            self.write_nodes(node["id"], depth + 2)
+            self._newline(depth + 1)
+            self.f.write("}")
+        self._newline(depth)
+        self.f.write("]")
+
+    def write_segments(self, segments, depth):
+        # One write per segment: each object sits at depth + 1, its fields at depth + 2
+        outer = "\n" + " " * (INDENT * (depth + 1))
+        inner = "\n" + " " * (INDENT * (depth + 2))
+        empty = True
+        for segment in segments:
+            fields = ("," + inner).join(
+                f"{_dumps(key)}: {_dumps(value)}"
+                for key, value in _segment_object(segment).items()
+            )
+            opening = "[" if empty else ","
+            self.f.write(f"{opening}{outer}{{{inner}{fields}{outer}}}")
+            empty = False
+        if empty:
+            self.f.write("[]")
+        else:
+            self._newline(depth)
+            self.f.write("]")
+
+
+def _write_lines(f, index, runs, progress):
+    total = len(index.nodes)
+    for done, (node, _) in enumerate(index.roots(), 1):
+        f.write(
+            f'{{"id": {_dumps(node["id"])}, "name": {_dumps(node["name"])}, '
+            f'"parent_id": {_dumps(node["parent_id"])}, "segments": ['
+        )
+        for i, segment in enumerate(runs.take(node["id"])):
+            f.write((", " if i else "") + _dumps(_segment_object(segment)))
+        f.write("]}\n")
+        if progress is not None:
+            progress(done, total)
+
+
+def _open(file_path, compress):
+    if compress:
+        return gzip.open(file_path, "wt", encoding="utf-8", compresslevel=GZIP_LEVEL)
+    return open(file_path, "w", encoding="utf-8")
+
+
+def write_json(file_path, nodes, lines=False, compress=False, progress=None):
+    """
+    Streams the segments of nodes (a project's node rows) to file_path and
+    returns the number of segments written. progress(done, total) is called
+    after each node. The file is written under a temporary name and only
+    replaces file_path once complete.
+    """
+    index = NodeIndex(nodes, [])
+    order = [node["id"] for node, _ in index.roots()]
+    part_path = file_path + ".part"
+    try:
+        with closing(database.iter_segments_by_node(order)) as segments, _open(
+            part_path, compress
+        ) as f:
+            runs = _NodeRuns(segments)
+            if lines:
+                _write_lines(f, index, runs, progress)
+            else:
+                _TreeWriter(f, index, runs, progress).write_nodes(None, 0)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    os.replace(part_path, file_path)
+    return runs.count
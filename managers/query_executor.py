@@ -0,0 +1,143 @@
+# managers/query_executor.py
+"""
+Runs database reads off the GUI thread.
+
+Each submitted call returns a QueryTask. Its `finished`/`failed` signals are
+always emitted on the GUI thread, so they can be connected to widget methods
+or plain lambdas. Worker threads get their own pooled SQLite connections,
+which WAL mode lets read alongside the GUI thread's writes.
+"""
+import itertools
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+
+import database
+
+DEFAULT_MAX_WORKERS = 2
+
+
+class QueryTask(QObject):
+    finished = Signal(object)  # result
+    failed = Signal(object)  # (exctype, value, traceback)
+
+    def __init__(self, task_id):
+        super().__init__()
+        self.task_id = task_id
+        self.future = None
+        self._cancelled = False
+
+    def cancel(self):
+        """Drops the result when it arrives; a query already running is not interrupted."""
+        self._cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+    def is_cancelled(self):
+        return self._cancelled
+
+
+class QueryExecutor(QObject):
+    # Emitted from worker threads with (task_id, result, error). Workers never
+    # hold the QueryTask itself, so tasks are only created, used and destroyed
+    # on the GUI thread.
+    _completed = Signal(object)
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, parent=None):
+        super().__init__(parent)
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="nodeflow-db"
+        )
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._completed.connect(self._deliver)
+
+    def submit(self, fn, *args, on_result=None, on_error=None, **kwargs):
+        """
+        Runs fn(*args, **kwargs) on a worker thread. on_result(result) and
+        on_error((exctype, value, traceback)) are called on the GUI thread.
+        """
+        task_id = next(self._ids)
+        task = QueryTask(task_id)
+        if on_result is not None:
+            task.finished.connect(on_result)
+        if on_error is not None:
+            task.failed.connect(on_error)
+        self._pending[task_id] = task
+        completed = self._completed
+
+        def run():
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                completed.emit((task_id, None, sys.exc_info()))
+            else:
+                completed.emit((task_id, result, None))
+
+        def start():
+            if task.is_cancelled():
+                self._pending.pop(task_id, None)
+                return
+            task.future = self._pool.submit(run)
+            task.future.add_done_callback(forget_if_cancelled)
+
+        def forget_if_cancelled(future):
+            # A cancelled future never runs, so nothing else would forget it
+            if future.cancelled():
+                completed.emit((task_id, None, None))
+
+        if database.in_session():
+            # Uncommitted writes are invisible to worker connections, so wait
+            # for the caller's session to end (it cannot span an event loop turn)
+            QTimer.singleShot(0, start)
+        else:
+            start()
+        return task
+
+    @Slot(object)
+    def _deliver(self, outcome):
+        task_id, result, error = outcome
+        task = self._pending.pop(task_id, None)
+        if task is None or task.is_cancelled():
+            return
+        if error is not None:
+            task.failed.emit(error)
+        else:
+            task.finished.emit(result)
+
+    def pending_count(self):
+        return len(self._pending)
+
+    def shutdown(self, wait=True):
+        for task in list(self._pending.values()):
+            task.cancel()
+        self._pool.shutdown(wait=wait)
+        self._pending.clear()
+
+
+_executor = None
+
+
+def get_query_executor():
+    """Returns the application-wide executor, creating it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = QueryExecutor()
+    return _executor
+
+
+def run_query(fn, *args, on_result=None, on_error=None, **kwargs):
+    """Shorthand for get_query_executor().submit(...)."""
+    return get_query_executor().submit(
+        fn, *args, on_result=on_result, on_error=on_error, **kwargs
+    )
+
+
+def shutdown_query_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+    # Worker threads are gone; release their pooled connections too
+    database.close_all_connections()
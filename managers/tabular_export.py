@@ -0,0 +1,285 @@
+# managers/tabular_export.py
+"""
+Flat exports of a project's coded segments for pandas, DuckDB and other
+analysis tools. Three tables are written side by side:
+- the segments (fact) table: one row per coded segment with its node path,
+  participant, document, offsets, word count and text;
+- the nodes and participants (dimension) tables, "<name>.nodes.<ext>" and
+  "<name>.participants.<ext>" next to the segments file.
+
+Segments are read in batches straight from the project segment query
+(database.iter_coded_segment_batches) and written batch by batch as
+Parquet row groups, Arrow IPC record batches or CSV rows, so memory does
+not grow with the project. In Parquet and Arrow the node path, participant
+and document columns are dictionary-encoded against the whole dimension:
+each row stores a small index and every name is written once.
+
+Parquet and Arrow need pyarrow; CSV only uses the standard library.
+Nothing here imports Qt.
+"""
+import csv
+import os
+from contextlib import closing
+
+import database
+from managers.excel_export import NodeIndex
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only the Parquet and Arrow formats need it
+    pa = pq = None
+
+FORMATS = ("parquet", "arrow", "csv")
+ARROW_FORMATS = ("parquet", "arrow")
+# Rows per batch: one Parquet row group or Arrow record batch each
+BATCH_SIZE = 32768
+PATH_SEPARATOR = " / "
+
+SEGMENT_COLUMNS = [
+    "segment_id",
+    "node_id",
+    "node_path",
+    "participant_id",
+    "participant",
+    "document_id",
+    "document",
+    "segment_start",
+    "segment_end",
+    "word_count",
+    "text",
+]
+NODE_COLUMNS = ["node_id", "parent_id", "outline", "name", "path", "depth", "color"]
+PARTICIPANT_COLUMNS = ["participant_id", "name", "details"]
+
+
+def available_formats():
+    """The formats that can be written with the installed packages."""
+    return FORMATS if pa is not None else ("csv",)
+
+
+def table_format(file_path):
+    """The format implied by a file name: .parquet, .arrow (or .feather) or .csv."""
+    fmt = os.path.splitext(file_path)[1].lstrip(".").lower()
+    return "arrow" if fmt == "feather" else fmt
+
+
+def dimension_path(file_path, table):
+    """Where a dimension table goes: study.parquet -> study.nodes.parquet."""
+    root, ext = os.path.splitext(file_path)
+    return f"{root}.{table}{ext}"
+
+
+class _Dimensions:
+    """The project's nodes, participants and documents, with each row's position."""
+
+    def __init__(self, nodes, participants, documents):
+        paths = {}
+        self.nodes = []  # NODE_COLUMNS rows, depth first in outline order
+        for node, outline in NodeIndex(nodes, []).roots():
+            parent_path = paths.get(node["parent_id"])
+            path = (
+                node["name"]
+                if parent_path is None
+                else f"{parent_path}{PATH_SEPARATOR}{node['name']}"
+            )
+            paths[node["id"]] = path
+            self.nodes.append(
+                [
+                    node["id"],
+                    node["parent_id"],
+                    outline,
+                    node["name"],
+                    path,
+                    outline.count(".") - 1,
+                    node["color"],
+                ]
+            )
+        self.participants = [[p["id"], p["name"], p["details"]] for p in participants]
+        self.paths = paths
+        # Dictionary positions of the encoded segment columns
+        self.node_position = {row[0]: i for i, row in enumerate(self.nodes)}
+        self.participant_position = {
+            row[0]: i for i, row in enumerate(self.participants)
+        }
+        self.document_titles = [d["title"] for d in documents]
+        self.document_position = {d["id"]: i for i, d in enumerate(documents)}
+
+
+def _segment_rows(batch, dimensions):
+    paths = dimensions.paths
+    return [
+        [
+            s["id"],
+            s["node_id"],
+            paths[s["node_id"]],
+            s["participant_id"],
+            s["participant_name"],
+            s["document_id"],
+            s["document_title"],
+            s["segment_start"],
+            s["segment_end"],
+            s["word_count"],
+            s["text"],
+        ]
+        for s in batch
+    ]
+
+
+def _write_csv(paths, dimensions, batches, progress, total):
+    def open_csv(path):
+        f = open(path, "w", encoding="utf-8", newline="")
+        return f, csv.writer(f)
+
+    for path, columns, rows in (
+        (paths["nodes"], NODE_COLUMNS, dimensions.nodes),
+        (paths["participants"], PARTICIPANT_COLUMNS, dimensions.participants),
+    ):
+        f, writer = open_csv(path)
+        with f:
+            writer.writerow(columns)
+            writer.writerows(rows)
+
+    done = 0
+    f, writer = open_csv(paths["segments"])
+    with f:
+        writer.writerow(SEGMENT_COLUMNS)
+        for batch in batches:
+            writer.writerows(_segment_rows(batch, dimensions))
+            done += len(batch)
+            if progress is not None:
+                progress(done, total)
+    return done
+
+
+def _segment_schema():
+    names = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema(
+        [
+            ("segment_id", pa.int64()),
+            ("node_id", pa.int64()),
+            ("node_path", names),
+            ("participant_id", pa.int64()),
+            ("participant", names),
+            ("document_id", pa.int64()),
+            ("document", names),
+            ("segment_start", pa.int64()),
+            ("segment_end", pa.int64()),
+            ("word_count", pa.int64()),
+            ("text", pa.string()),
+        ]
+    )
+
+
+def _dimension_table(columns, rows):
+    return pa.table(
+        dict(zip(columns, map(list, zip(*rows)))) if rows else {c: [] for c in columns}
+    )
+
+
+def _segment_batch(batch, dimensions, dictionaries, schema):
+    def encoded(key, positions, dictionary):
+        indices = pa.array([positions.get(s[key]) for s in batch], pa.int32())
+        return pa.DictionaryArray.from_arrays(indices, dictionary)
+
+    node_paths, participants, documents = dictionaries
+    columns = [
+        pa.array([s["id"] for s in batch], pa.int64()),
+        pa.array([s["node_id"] for s in batch], pa.int64()),
+        encoded("node_id", dimensions.node_position, node_paths),
+        pa.array([s["participant_id"] for s in batch], pa.int64()),
+        encoded("participant_id", dimensions.participant_position, participants),
+        pa.array([s["document_id"] for s in batch], pa.int64()),
+        encoded("document_id", dimensions.document_position, documents),
+        pa.array([s["segment_start"] for s in batch], pa.int64()),
+        pa.array([s["segment_end"] for s in batch], pa.int64()),
+        pa.array([s["word_count"] for s in batch], pa.int64()),
+        pa.array([s["text"] for s in batch], pa.string()),
+    ]
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def _write_arrow(fmt, paths, dimensions, batches, progress, total):
+    if fmt == "parquet":
+        save_table = pq.write_table
+        open_writer = pq.ParquetWriter
+    else:
+
+        def save_table(table, path):
+            with pa.ipc.new_file(path, table.schema) as writer:
+                writer.write_table(table)
+
+        open_writer = pa.ipc.new_file
+
+    save_table(_dimension_table(NODE_COLUMNS, dimensions.nodes), paths["nodes"])
+    save_table(
+        _dimension_table(PARTICIPANT_COLUMNS, dimensions.participants),
+        paths["participants"],
+    )
+
+    # One dictionary per encoded column, shared by every batch, so Arrow
+    # files hold each once and Parquet readers can keep them categorical
+    dictionaries = (
+        pa.array([row[4] for row in dimensions.nodes], pa.string()),
+        pa.array([row[1] for row in dimensions.participants], pa.string()),
+        pa.array(dimensions.document_titles, pa.string()),
+    )
+    schema = _segment_schema()
+    done = 0
+    with open_writer(paths["segments"], schema) as writer:
+        for batch in batches:
+            writer.write_batch(_segment_batch(batch, dimensions, dictionaries, schema))
+            done += len(batch)
+            if progress is not None:
+                progress(done, total)
+    return done
+
+
+def write_table(file_path, fmt, project_id, nodes, progress=None):
+    """
+    Writes the segments of a project (whose node rows are nodes) to
+    file_path as fmt, one of FORMATS, with the nodes and participants tables
+    beside it (see dimension_path), and returns the number of segments
+    written. progress(done, total) is called after each batch of segments.
+    All three files are written under temporary names and only replace
+    existing files once complete.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(
+            f"Unknown table format {fmt!r}; expected one of {', '.join(FORMATS)}"
+        )
+    if fmt in ARROW_FORMATS and pa is None:
+        raise RuntimeError(
+            f"Exporting to {fmt} needs the pyarrow package (pip install pyarrow)"
+        )
+    dimensions = _Dimensions(
+        nodes,
+        database.get_participants_for_project(project_id),
+        database.get_documents_for_project(project_id),
+    )
+    total = sum(
+        stats["segment_count"]
+        for stats in database.get_node_statistics(project_id).values()
+    )
+    targets = {
+        "segments": file_path,
+        "nodes": dimension_path(file_path, "nodes"),
+        "participants": dimension_path(file_path, "participants"),
+    }
+    parts = {table: path + ".part" for table, path in targets.items()}
+    try:
+        with closing(
+            database.iter_coded_segment_batches(project_id, BATCH_SIZE)
+        ) as batches:
+            if fmt == "csv":
+                written = _write_csv(parts, dimensions, batches, progress, total)
+            else:
+                written = _write_arrow(fmt, parts, dimensions, batches, progress, total)
+    except BaseException:
+        for part_path in parts.values():
+            if os.path.exists(part_path):
+                os.remove(part_path)
+        raise
+    for table, path in targets.items():
+        os.replace(parts[table], path)
+    return written
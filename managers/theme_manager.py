@@ -94,7 +94,7 @@ def get_dark_theme_stylesheet():
             min-width: 80px; /* Standardize dialog buttons */
             padding: 6px 12px;
         }
-        QLineEdit, QTextEdit, QListWidget, QTreeWidget, QComboBox, QTableView {
+        QLineEdit, QTextEdit, QListWidget, QTreeView, QComboBox, QTableView {
             background-color: #363636; /* Darker input/list background */
             border: 1px solid #505050; /* Consistent border */
             selection-background-color: #2a6096; /* Less contrasting blue for selection */
@@ -157,19 +157,6 @@ def get_dark_theme_stylesheet():
             background-color: #2a6096; /* Less contrasting blue for menu selection */
         }
 
-        /* Specific style for the NodeItemWidget color button */
-        NodeItemWidget #nodeColorButton { /* Target by objectName */
-            width: 18px; /* Override to desired size */
-            height: 18px; /* Override to desired size */
-            min-width: 18px; /* Ensure fixed minimum */
-            max-width: 18px; /* Ensure fixed maximum */
-            min-height: 18px; /* Ensure fixed minimum */
-            max-height: 18px; /* Ensure fixed maximum */
-            padding: 0px; /* Remove any padding */
-            border-radius: 2px; /* Maintain small radius */
-            border: 1px solid #888; /* Keep the specific border for color button */
-            background-color: transparent; /* Ensure transparent background */
-        }
 
         /* Specific style for the CodedSegmentsView delete button */
         QPushButton#codedSegmentDeleteButton { /* Target by objectName */
@@ -194,7 +181,7 @@ def get_dark_theme_stylesheet():
 
 
         /* Specific styles for other smaller buttons within custom item widgets */
-        ProjectItemWidget QPushButton, ParticipantItemWidget QPushButton, NodeItemWidget QPushButton {
+        ProjectItemWidget QPushButton, ParticipantItemWidget QPushButton {
             background-color: transparent;
             border: none; /* Remove border from these buttons */
             padding: 0px;
@@ -202,14 +189,14 @@ def get_dark_theme_stylesheet():
             color: #f0f0f0;
             border-radius: 2px;
         }
-        ProjectItemWidget QPushButton:hover, ParticipantItemWidget QPushButton:hover, NodeItemWidget QPushButton:hover {
+        ProjectItemWidget QPushButton:hover, ParticipantItemWidget QPushButton:hover {
             background-color: #505050;
         }
-        ProjectItemWidget QPushButton:pressed, ParticipantItemWidget QPushButton:pressed, NodeItemWidget QPushButton:pressed {
+        ProjectItemWidget QPushButton:pressed, ParticipantItemWidget QPushButton:pressed {
             background-color: #404040;
         }
 
-        /* Styles for QListWidget and QTreeWidget items */
+        /* Styles for QListWidget and QTreeView items */
         QListWidget::item {
             border: none;
             padding: 2px;
@@ -219,24 +206,24 @@ def get_dark_theme_stylesheet():
             color: white;
             /* Removed border here as per request */
         }
-        QTreeWidget::item {
+        QTreeView::item {
             border: none;
             padding: 2px;
         }
-        QTreeWidget::item:selected {
+        QTreeView::item:selected {
             background-color: #2a6096; /* Less contrasting blue for selected item */
             color: white;
             /* Removed border here as per request */
         }
         /* Ensure buttons AND their containers within selected list/tree items are transparent to show highlight */
-        QListWidget::item QWidget, QTreeWidget::item QWidget { /* Target the button container */
+        QListWidget::item QWidget, QTreeView::item QWidget { /* Target the button container */
             background-color: transparent;
         }
-        QListWidget::item QPushButton, QTreeWidget::item QPushButton {
+        QListWidget::item QPushButton, QTreeView::item QPushButton {
             background-color: transparent; /* Ensure button background is transparent */
         }
         /* Hover state for buttons within selected items */
-        QListWidget::item:selected QPushButton:hover, QTreeWidget::item:selected QPushButton:hover {
+        QListWidget::item:selected QPushButton:hover, QTreeView::item:selected QPushButton:hover {
             background-color: rgba(255, 255, 255, 0.2); /* Slight white overlay on hover for selected buttons */
         }
 
@@ -374,7 +361,7 @@ def get_light_theme_stylesheet():
             min-width: 80px;
             padding: 6px 12px;
         }
-        QLineEdit, QTextEdit, QListWidget, QTreeWidget, QComboBox, QTableView {
+        QLineEdit, QTextEdit, QListWidget, QTreeView, QComboBox, QTableView {
             background-color: #ffffff; /* White input/list background */
             border: 1px solid #cccccc;
             selection-background-color: #a6d5ff; /* Light blue for selection */
@@ -434,18 +421,6 @@ def get_light_theme_stylesheet():
             background-color: #a6d5ff; /* Light blue for menu selection */
         }
 
-        NodeItemWidget #nodeColorButton {
-            width: 18px;
-            height: 18px;
-            min-width: 18px;
-            max-width: 18px;
-            min-height: 18px;
-            max-height: 18px;
-            padding: 0px;
-            border-radius: 2px;
-            border: 1px solid #aaaaaa; /* Darker border for light theme */
-            background-color: transparent;
-        }
 
         QPushButton#codedSegmentDeleteButton {
             width: 20px;
@@ -467,7 +442,7 @@ def get_light_theme_stylesheet():
         }
 
         /* Specific styles for other smaller buttons within custom item widgets */
-        ProjectItemWidget QPushButton, ParticipantItemWidget QPushButton, NodeItemWidget QPushButton {
+        ProjectItemWidget QPushButton, ParticipantItemWidget QPushButton {
             background-color: transparent;
             border: none;
             padding: 0px;
@@ -475,14 +450,14 @@ def get_light_theme_stylesheet():
             color: #333333; /* Dark icon color for light theme */
             border-radius: 2px;
         }
-        ProjectItemWidget QPushButton:hover, ParticipantItemWidget QPushButton:hover, NodeItemWidget QPushButton:hover {
+        ProjectItemWidget QPushButton:hover, ParticipantItemWidget QPushButton:hover {
             background-color: #d0d0d0;
         }
-        ProjectItemWidget QPushButton:pressed, ParticipantItemWidget QPushButton:pressed, NodeItemWidget QPushButton:pressed {
+        ProjectItemWidget QPushButton:pressed, ParticipantItemWidget QPushButton:pressed {
             background-color: #c0c0c0;
         }
 
-        /* Styles for QListWidget and QTreeWidget items */
+        /* Styles for QListWidget and QTreeView items */
         QListWidget::item {
             border: none;
             padding: 2px;
@@ -492,25 +467,25 @@ def get_light_theme_stylesheet():
             color: black;
             /* Removed border here as per request */
         }
-        QTreeWidget::item {
+        QTreeView::item {
             border: none;
             padding: 2px;
         }
-        QTreeWidget::item:selected {
+        QTreeView::item:selected {
             background-color: #a6d5ff;
             color: black;
             /* Removed border here as per request */
         }
 
         /* Ensure buttons AND their containers within selected list/tree items are transparent to show highlight */
-        QListWidget::item QWidget, QTreeWidget::item QWidget { /* Target the button container */
+        QListWidget::item QWidget, QTreeView::item QWidget { /* Target the button container */
             background-color: transparent;
         }
-        QListWidget::item QPushButton, QTreeWidget::item QPushButton {
+        QListWidget::item QPushButton, QTreeView::item QPushButton {
             background-color: transparent; /* Ensure button background is transparent */
         }
         /* Hover state for buttons within selected items */
-        QListWidget::item:selected QPushButton:hover, QTreeWidget::item:selected QPushButton:hover {
+        QListWidget::item:selected QPushButton:hover, QTreeView::item:selected QPushButton:hover {
             background-color: rgba(0, 0, 0, 0.1); /* Slight black overlay on hover for selected buttons */
         }
 
@@ -583,7 +558,7 @@ def get_light_theme_stylesheet():
 def get_default_theme_stylesheet():
     """
     Returns the QSS for a more obvious highlight color in the default theme.
-    This stylesheet only overrides selection colors for QListWidget and QTreeWidget.
+    This stylesheet only overrides selection colors for QListWidget and QTreeView.
     """
     return """
         QListWidget::item:selected {
@@ -591,19 +566,19 @@ def get_default_theme_stylesheet():
             color: white; /* Ensure text is readable */
             border: none; /* Maintain no border */
         }
-        QTreeWidget::item:selected {
+        QTreeView::item:selected {
             background-color: #4A90D9; /* A more obvious blue */
             color: white; /* Ensure text is readable */
             border: none; /* Maintain no border */
         }
         /* Ensure buttons/widgets within selected items also show the highlight */
-        QListWidget::item:selected QWidget, QTreeWidget::item:selected QWidget {
+        QListWidget::item:selected QWidget, QTreeView::item:selected QWidget {
             background-color: transparent;
         }
-        QListWidget::item:selected QPushButton, QTreeWidget::item:selected QPushButton {
+        QListWidget::item:selected QPushButton, QTreeView::item:selected QPushButton {
             background-color: transparent;
         }
-        QListWidget::item:selected QPushButton:hover, QTreeWidget::item:selected QPushButton:hover {
+        QListWidget::item:selected QPushButton:hover, QTreeView::item:selected QPushButton:hover {
             background-color: rgba(255, 255, 255, 0.2); /* Slight white overlay on hover for selected buttons */
         }
     """
@@ -0,0 +1,154 @@
+"""
+NodeFlow on the command line, for scheduled or scripted exports. Nothing
+here imports Qt, so it runs on servers without a display:
+
+    python nodeflow.py export --project NAME --format docx --out report.docx
+    python nodeflow.py export --all-projects --format xlsx --out reports/
+    python nodeflow.py export --all-projects --format ndjson --gzip --out dumps/
+
+With one project --out is the output file; with several (--project given
+more than once, or --all-projects) it is a directory that receives one
+"<project name>.<format>" file per project. Every project is exported in
+the same process, sharing one database connection pool.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+
+import database
+from database.db_core import DATA_DIR, DB_FILE
+from managers.exporters import PROJECT_WRITERS, export_project
+
+SETTINGS_FILE = os.path.join(DATA_DIR, "settings.json")
+# Characters Windows does not allow in file names
+UNSAFE_FILE_CHARS = re.compile(r'[\\/:*?"<>|]')
+
+
+def _saved_storage_profile():
+    """The storage profile chosen in the app's settings, without importing Qt."""
+    try:
+        with open(SETTINGS_FILE, "r") as f:
+            return json.load(f).get("storage_profile", database.DEFAULT_STORAGE_PROFILE)
+    except (OSError, json.JSONDecodeError):
+        return database.DEFAULT_STORAGE_PROFILE
+
+
+def _file_name(project_name, fmt, compress):
+    suffix = ".gz" if compress else ""
+    return f"{UNSAFE_FILE_CHARS.sub('_', project_name)}.{fmt}{suffix}"
+
+
+def _select_projects(args):
+    projects = database.get_all_projects()
+    if args.all_projects:
+        return projects, []
+    by_name = {p["name"]: p for p in projects}
+    missing = [name for name in args.project if name not in by_name]
+    return [by_name[name] for name in args.project if name in by_name], missing
+
+
+def run_export(args):
+    if not os.path.exists(args.database):
+        print(f"No NodeFlow database at {args.database}", file=sys.stderr)
+        return 1
+    database.configure_database(args.database, args.storage_profile)
+    database.create_tables()
+
+    projects, missing = _select_projects(args)
+    for name in missing:
+        print(f"No project named {name!r}", file=sys.stderr)
+    if not projects:
+        return 1
+
+    batch = args.all_projects or len(args.project) > 1
+    if batch:
+        os.makedirs(args.out, exist_ok=True)
+
+    failures = len(missing)
+    for project in projects:
+        if batch:
+            name = _file_name(project["name"], args.format, args.gzip)
+            out = os.path.join(args.out, name)
+        elif args.gzip and not args.out.endswith(".gz"):
+            out = args.out + ".gz"
+        else:
+            out = args.out
+        try:
+            result = export_project(project["id"], out, args.format)
+        except Exception as e:
+            failures += 1
+            print(f"Could not export {project['name']!r}: {e}", file=sys.stderr)
+            continue
+        finally:
+            # Drop the cached rows so memory does not grow with the batch
+            database.clear_project_cache()
+        if not args.quiet:
+            print(
+                f"Exported {project['name']!r} to {result.path} "
+                f"({result.nodes} nodes, {result.segments} segments, "
+                f"{result.seconds:.1f} s)"
+            )
+    return 1 if failures else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="nodeflow")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser(
+        "export", help="Export the coded data of one or more projects"
+    )
+    which = export.add_mutually_exclusive_group(required=True)
+    which.add_argument(
+        "--project",
+        action="append",
+        metavar="NAME",
+        help="Project to export; repeat to export several",
+    )
+    which.add_argument(
+        "--all-projects", action="store_true", help="Export every project"
+    )
+    export.add_argument("--format", required=True, choices=list(PROJECT_WRITERS))
+    export.add_argument(
+        "--out",
+        required=True,
+        metavar="PATH",
+        help="Output file, or a directory when exporting several projects",
+    )
+    export.add_argument(
+        "--database",
+        default=DB_FILE,
+        metavar="PATH",
+        help=f"NodeFlow database file (default: {DB_FILE})",
+    )
+    export.add_argument(
+        "--storage-profile",
+        choices=list(database.STORAGE_PROFILES),
+        default=None,
+        help="Storage profile for the connection (default: the app's setting)",
+    )
+    export.add_argument(
+        "--gzip",
+        action="store_true",
+        help="Gzip json and ndjson output (adds .gz to the file name)",
+    )
+    export.add_argument("--quiet", action="store_true", help="Only report errors")
+    export.set_defaults(handler=run_export)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, "gzip", False) and args.format not in ("json", "ndjson"):
+        parser.error("--gzip only applies to --format json or ndjson")
+    if getattr(args, "storage_profile", None) is None:
+        args.storage_profile = _saved_storage_profile()
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
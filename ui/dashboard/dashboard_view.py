@@ -1,4 +1,5 @@
 import csv
+import traceback
 from PySide6.QtWidgets import (
     QDialog,
     QVBoxLayout,
@@ -22,6 +23,7 @@ from PySide6.QtGui import QPixmap, QColor, QIcon
 from PySide6.QtCharts import QChart
 
 from managers.export_manager import export_co_occurrence_to_gexf
+from managers.query_executor import run_query
 from managers.theme_manager import load_settings
 from .charts_widget import ChartsWidget
 from .crosstab_widget import CrosstabWidget
@@ -36,6 +38,7 @@ class DashboardView(QDialog):
         super().__init__(parent)
         self.project_id = project_id
         self.initial_document_id = current_document_id
+        self._load_task = None
         self.setWindowTitle(f"Dashboard: {project_name}")
         self.setMinimumSize(1100, 800)
         self.docs = database.get_documents_for_project(self.project_id)
@@ -193,7 +196,7 @@ class DashboardView(QDialog):
         for seg in segments:
             p_id = seg.get("participant_id")
             if p_id is not None and p_id in participant_stats:
-                word_count = len(seg["content_preview"].split())
+                word_count = seg["word_count"]
                 participant_stats[p_id]["word_count"] += word_count
                 participant_stats[p_id]["segment_count"] += 1
         return participant_stats
@@ -222,9 +225,22 @@ class DashboardView(QDialog):
         node_id = self.node_scope_combo.currentData()
         if node_id is None:
             return
+        # Only the latest scope matters; drop results of a superseded load
+        if self._load_task is not None:
+            self._load_task.cancel()
         self._set_loading_state(True)
+        self._load_task = run_query(
+            self._get_data_from_db,
+            doc_id,
+            part_id,
+            node_id,
+            on_result=self._on_data_loaded,
+            on_error=self._on_loading_error,
+        )
+
+    def _on_data_loaded(self, results):
+        self._load_task = None
         try:
-            results = self._get_data_from_db(doc_id, part_id, node_id, None)
             tab_index = self.tabs.currentIndex()
             # Always update stat labels for all tabs
             self._update_stat_labels_from_results(results)
@@ -240,10 +256,8 @@ class DashboardView(QDialog):
             elif tab_index == 4:
                 self._update_wordcloud_tab(results)
         except Exception as e:
-            import traceback
-
-            traceback.print_exc()
             self._on_loading_error((type(e), e, e.__traceback__))
+            return
         self._set_loading_state(False)
 
     def _update_stat_labels_from_results(self, results):
@@ -370,10 +384,8 @@ class DashboardView(QDialog):
     def _update_crosstab_tab(self, results):
         nodes = results.get("nodes", [])
         if "node_id" in results:
-            node_id = results["node_id"]
             all_project_segments = results.get("all_project_segments", [])
-            descendants = database.get_node_descendants(node_id)
-            family_node_ids = [node_id] + descendants
+            family_node_ids = results["family_node_ids"]
             family_segments = [
                 s for s in all_project_segments if s["node_id"] in family_node_ids
             ]
@@ -395,10 +407,8 @@ class DashboardView(QDialog):
 
     def _update_wordcloud_tab(self, results):
         if "node_id" in results:
-            node_id = results["node_id"]
             all_project_segments = results.get("all_project_segments", [])
-            descendants = database.get_node_descendants(node_id)
-            family_node_ids = [node_id] + descendants
+            family_node_ids = results["family_node_ids"]
             family_segments = [
                 s for s in all_project_segments if s["node_id"] in family_node_ids
             ]
@@ -428,7 +438,9 @@ class DashboardView(QDialog):
         self.export_button.setEnabled(not is_loading)
 
     def _on_loading_error(self, error_tuple):
+        self._load_task = None
         exctype, value, tb = error_tuple
+        traceback.print_exception(exctype, value, tb)
         QMessageBox.critical(
             self,
             f"Error: {exctype.__name__}",
@@ -436,7 +448,8 @@ class DashboardView(QDialog):
         )
         self._set_loading_state(False)
 
-    def _get_data_from_db(self, doc_id, part_id, node_id, progress_callback):
+    def _get_data_from_db(self, doc_id, part_id, node_id):
+        """Runs on a query executor thread: database reads only, no widget access."""
         results = {}
         nodes = database.get_nodes_for_project(self.project_id)
         nodes_map, nodes_by_parent = self._build_node_hierarchy(nodes)
@@ -447,18 +460,21 @@ class DashboardView(QDialog):
             all_project_segments = database.get_coded_segments_for_project(
                 self.project_id
             )
-            node_stats, _ = self._calculate_direct_stats(all_project_segments)
-            aggregated_stats = self._calculate_aggregated_stats(
-                nodes_by_parent, node_stats
-            )
+            aggregated_stats = database.get_node_rollup_statistics(self.project_id)
             results["node_id"] = node_id
+            # Resolved once per reload with a single recursive query
+            results["family_node_ids"] = {node_id} | set(
+                database.get_node_descendants(node_id)
+            )
             results["aggregated_stats"] = aggregated_stats
             results["all_project_segments"] = all_project_segments
         else:
             total_words, segments = self._get_scoped_data(doc_id, part_id)
-            node_stats, coded_words = self._calculate_direct_stats(segments)
-            aggregated_stats = self._calculate_aggregated_stats(
-                nodes_by_parent, node_stats
+            _, coded_words = self._calculate_direct_stats(segments)
+            aggregated_stats = database.get_node_rollup_statistics(
+                self.project_id,
+                document_id=doc_id if doc_id != -1 else None,
+                participant_id=part_id if part_id != -1 else None,
             )
             participant_stats = self._calculate_participant_stats(segments)
             (
@@ -652,16 +668,20 @@ class DashboardView(QDialog):
             QMessageBox.critical(self, "Export Failed", f"An error occurred: {e}")
 
     def _get_scoped_data(self, doc_id, part_id):
-        if doc_id != -1:
+        if doc_id != -1 and part_id != -1:
+            # Scoped by the segment's own participant, as the roll-up query is
+            total_words = database.get_document_word_count(doc_id)
+            segments = [
+                s
+                for s in database.get_coded_segments_for_participant(
+                    self.project_id, part_id
+                )
+                if s["document_id"] == doc_id
+            ]
+        elif doc_id != -1:
             total_words, segments = database.get_document_word_count(
                 doc_id
             ), database.get_coded_segments_for_document(doc_id)
-            if part_id != -1:
-                segments = [
-                    s
-                    for s in segments
-                    if s["participant_name"] == self.part_scope_combo.currentText()
-                ]
         elif part_id != -1:
             total_words, segments = database.get_word_count_for_participant(
                 self.project_id, part_id
@@ -676,7 +696,7 @@ class DashboardView(QDialog):
         node_stats, total_coded_words = {}, 0
         for seg in segments:
             node_stats.setdefault(seg["node_id"], {"word_count": 0, "segment_count": 0})
-            word_count = len(seg["content_preview"].split())
+            word_count = seg["word_count"]
             node_stats[seg["node_id"]]["segment_count"] += 1
             node_stats[seg["node_id"]]["word_count"] += word_count
             total_coded_words += word_count
@@ -692,25 +712,6 @@ class DashboardView(QDialog):
             L.sort(key=lambda x: (x.get("position", 0) or 0, x["name"]))
         return nodes_map, nodes_by_parent
 
-    def _calculate_aggregated_stats(self, nodes_by_parent, node_stats):
-        agg_stats = {}
-
-        def recurse(p_id):
-            p_wc, p_sc = 0, 0
-            for node in nodes_by_parent.get(p_id, []):
-                c_wc, c_sc = recurse(node["id"])
-                d_stats = node_stats.get(node["id"], {})
-                t_wc, t_sc = (
-                    d_stats.get("word_count", 0) + c_wc,
-                    d_stats.get("segment_count", 0) + c_sc,
-                )
-                agg_stats[node["id"]] = {"word_count": t_wc, "segment_count": t_sc}
-                p_wc, p_sc = p_wc + t_wc, p_sc + t_sc
-            return p_wc, p_sc
-
-        recurse(None)
-        return agg_stats
-
     def _calculate_co_occurrence(self, segments, nodes):
         node_map = {node["id"]: node["name"] for node in nodes}
         co_occurrence_matrix = {}
@@ -773,6 +774,9 @@ class DashboardView(QDialog):
         self.reload_active_tab()
 
     def closeEvent(self, event):
+        if self._load_task is not None:
+            self._load_task.cancel()
+            self._load_task = None
         if hasattr(self, "charts_widget"):
             self.charts_widget.clear_charts()
             try:
@@ -1,40 +1,55 @@
 from PySide6.QtWidgets import (
     QWidget,
     QVBoxLayout,
-    QTreeWidget,
-    QTreeWidgetItem,
+    QTreeView,
     QLineEdit,
     QHBoxLayout,
     QComboBox,
     QLabel,
     QPushButton,
     QMessageBox,
-    QTreeWidgetItemIterator,
     QAbstractItemView,
 )
 from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QKeyEvent
+from managers.data_events import (
+    APPLY,
+    SKIP,
+    DataVersionTracker,
+    get_data_event_bridge,
+)
+from managers.query_executor import run_query
 import database
 from qt_material_icons import MaterialIcon
+from .segment_search import SegmentSearch
+from .segment_table_model import SegmentStore, SegmentTableModel, load_segment_store
 
 
-class DeletableTreeWidget(QTreeWidget):
-    """A QTreeWidget that handles the Delete key to remove a segment."""
+class DeletableSegmentView(QTreeView):
+    """
+    A flat QTreeView over the segment model that handles the Delete key.
+    Rows can be dragged onto a node in the node tree to recode them.
+    """
 
     def __init__(self, parent_view):
         super().__init__()
         self.parent_view = parent_view
+        self.setRootIsDecorated(False)
+        self.setUniformRowHeights(True)
+        self.setAllColumnsShowFocus(True)
+        self.setDragEnabled(True)
+        self.setDragDropMode(QAbstractItemView.DragDropMode.DragOnly)
 
     def keyPressEvent(self, event: QKeyEvent):
         if event.key() == Qt.Key.Key_Delete:
-            current_item = self.currentItem()
-            if current_item:
-                segment_id = current_item.data(0, 1)
-                preview = current_item.text(0)
-                if segment_id is not None:
-                    self.parent_view.confirm_delete_segment(segment_id, preview)
-                    event.accept()
-                    return
+            current = self.currentIndex()
+            if current.isValid():
+                model = self.model()
+                self.parent_view.confirm_delete_segment(
+                    model.segment_id(current.row()), model.preview(current.row())
+                )
+                event.accept()
+                return
         super().keyPressEvent(event)
 
 
@@ -47,8 +62,9 @@ class CodedSegmentsView(QWidget):
         self.project_id = project_id
         self.current_document_id = None
         self.segments = []
-        self.all_segments = []
         self._last_active_node_filter = None
+        self._load_task = None
+        self._data_version = DataVersionTracker(project_id)
 
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(10, 10, 10, 10)
@@ -88,34 +104,34 @@ class CodedSegmentsView(QWidget):
         controls_layout.addWidget(self.search_scope_combo)
         main_layout.addLayout(controls_layout)
 
-        self.tree_widget = DeletableTreeWidget(self)
-        main_layout.addWidget(self.tree_widget)
+        self.model = SegmentTableModel(self)
+        self.tree_view = DeletableSegmentView(self)
+        self.tree_view.setModel(self.model)
+        main_layout.addWidget(self.tree_view)
+        self._search = SegmentSearch(self.model, self)
 
         self.scope_combo.currentTextChanged.connect(self.reload_view)
-        self.search_input.textChanged.connect(self.filter_tree)
+        self.search_input.textChanged.connect(self.on_search_text_changed)
         self.search_scope_combo.currentTextChanged.connect(self.filter_tree)
-        self.tree_widget.currentItemChanged.connect(self.on_selection_changed)
-        self.tree_widget.itemActivated.connect(self.on_segment_activated)
+        self.tree_view.selectionModel().currentRowChanged.connect(
+            self.on_selection_changed
+        )
+        self.tree_view.activated.connect(self.on_segment_activated)
+
+        get_data_event_bridge().changed.connect(self.on_data_event)
 
         self.scope_combo.setCurrentText("Current Document")
         self.reload_view()
 
-    def on_segment_activated(self, item: QTreeWidgetItem, column: int):
-        segment_id = item.data(0, 1)
-        if segment_id is None:
-            return
-
-        segment_data = next(
-            (s for s in self.all_segments if s["id"] == segment_id), None
-        )
-        if not segment_data:
+    def on_segment_activated(self, index):
+        if not index.isValid():
             return
-
+        segment_data = self.model.segment_at(index.row())
         doc_id = None
         if self.scope_combo.currentText() == "Current Document":
             doc_id = self.current_document_id
         else:
-            doc_id = segment_data.get("document_id")
+            doc_id = segment_data["document_id"]
 
         if doc_id is not None:
             self.segment_activated.emit(
@@ -131,28 +147,25 @@ class CodedSegmentsView(QWidget):
         self.search_input.clear()
         self.filter_tree()
 
-        self.tree_widget.blockSignals(True)
-        it = QTreeWidgetItemIterator(self.tree_widget)
-        while it.value():
-            item = it.value()
-            if item.data(0, 1) == segment_id:
-                self.tree_widget.setCurrentItem(item)
-                self.tree_widget.scrollToItem(
-                    item, QAbstractItemView.ScrollHint.PositionAtCenter
-                )
-                break
-            it += 1
-        self.tree_widget.blockSignals(False)
+        row = self.model.row_of(segment_id)
+        if row is None:
+            return
+        index = self.model.index(row, 0)
+        self.tree_view.selectionModel().blockSignals(True)
+        self.tree_view.setCurrentIndex(index)
+        self.tree_view.selectionModel().blockSignals(False)
+        self.tree_view.scrollTo(index, QAbstractItemView.ScrollHint.PositionAtCenter)
 
     def on_selection_changed(self, current, previous):
-        if previous:
-            self.tree_widget.setItemWidget(
-                previous, self.tree_widget.columnCount() - 1, None
+        last_column = self.model.columnCount() - 1
+        if previous.isValid():
+            self.tree_view.setIndexWidget(
+                self.model.index(previous.row(), last_column), None
             )
 
-        if current:
-            segment_id = current.data(0, 1)
-            preview = current.text(0)
+        if current.isValid():
+            segment_id = self.model.segment_id(current.row())
+            preview = self.model.preview(current.row())
 
             delete_button = QPushButton()
             delete_icon = MaterialIcon("delete")
@@ -173,13 +186,13 @@ class CodedSegmentsView(QWidget):
             button_layout.addWidget(delete_button)
             button_layout.addStretch()
 
-            self.tree_widget.setItemWidget(
-                current, self.tree_widget.columnCount() - 1, button_container
+            self.tree_view.setIndexWidget(
+                self.model.index(current.row(), last_column), button_container
             )
 
     def confirm_delete_segment(self, segment_id, segment_preview):
-        current_item = self.tree_widget.currentItem()
-        if not current_item or current_item.data(0, 1) != segment_id:
+        current = self.tree_view.currentIndex()
+        if not current.isValid() or self.model.segment_id(current.row()) != segment_id:
             return
 
         reply = QMessageBox.question(
@@ -190,11 +203,8 @@ class CodedSegmentsView(QWidget):
             QMessageBox.StandardButton.No,
         )
         if reply == QMessageBox.StandardButton.Yes:
+            # The SegmentDeleted event removes the row (see on_data_event)
             database.delete_coded_segment(segment_id)
-            self.all_segments = [s for s in self.all_segments if s["id"] != segment_id]
-            (current_item.parent() or self.tree_widget.invisibleRootItem()).removeChild(
-                current_item
-            )
             self.segment_deleted.emit()
 
     def load_segments(self, document_id):
@@ -204,166 +214,141 @@ class CodedSegmentsView(QWidget):
             self.reload_view()
 
     def reload_view(self):
-        try:
-            self.tree_widget.currentItemChanged.disconnect(self.on_selection_changed)
-        except (TypeError, RuntimeError):
-            pass
-
-        self.tree_widget.clear()
-        self.all_segments = []
         scope = self.scope_combo.currentText()
+        if self._load_task is not None:
+            self._load_task.cancel()
+            self._load_task = None
+        self._data_version.mark_loaded()
+        self._search.reset()
 
         if scope == "Current Document":
             headers = ["Coded Text", "Node", "Participant", ""]
-            self.tree_widget.setHeaderLabels(headers)
-            self.tree_widget.setColumnWidth(0, 300)
-            self.tree_widget.setColumnWidth(1, 150)
-            self.tree_widget.setColumnWidth(2, 150)
-            self.tree_widget.setColumnWidth(3, 50)
+            widths = [300, 150, 150, 50]
+            self.search_scope_combo.blockSignals(True)
             self.search_scope_combo.clear()
             self.search_scope_combo.addItems(
                 ["All", "Coded Text", "Node", "Participant"]
             )
+            self.search_scope_combo.blockSignals(False)
             if self.current_document_id:
-                self.all_segments = database.get_coded_segments_for_document(
-                    self.current_document_id
+                self._load_task = run_query(
+                    load_segment_store,
+                    document_id=self.current_document_id,
+                    on_result=self._on_segments_loaded,
                 )
-        elif scope == "Entire Project":
+        else:
             headers = ["Coded Text", "Node", "Participant", "Document", ""]
-            self.tree_widget.setHeaderLabels(headers)
-            self.tree_widget.setColumnWidth(0, 300)
-            self.tree_widget.setColumnWidth(1, 150)
-            self.tree_widget.setColumnWidth(2, 150)
-            self.tree_widget.setColumnWidth(3, 200)
-            self.tree_widget.setColumnWidth(4, 50)
+            widths = [300, 150, 150, 200, 50]
+            self.search_scope_combo.blockSignals(True)
             self.search_scope_combo.clear()
             self.search_scope_combo.addItems(
                 ["All", "Coded Text", "Node", "Participant", "Document"]
             )
-            self.all_segments = database.get_coded_segments_for_project(self.project_id)
+            self.search_scope_combo.blockSignals(False)
+            self._load_task = run_query(
+                load_segment_store,
+                project_id=self.project_id,
+                on_result=self._on_segments_loaded,
+            )
 
-        self.populate_tree(self.all_segments)
-        # Reconnect the signal after populating
-        self.tree_widget.currentItemChanged.connect(self.on_selection_changed)
+        self.model.set_store(
+            SegmentStore(by_document_title=scope == "Entire Project"), headers
+        )
+        for column, width in enumerate(widths):
+            self.tree_view.setColumnWidth(column, width)
 
+    def _on_segments_loaded(self, store):
+        self._load_task = None
+        self.model.set_store(store, self.model.headers())
         if self._last_active_node_filter is not None:
             self.filter_by_node_family(self._last_active_node_filter)
         else:
             self.filter_tree()
 
-    def populate_tree(self, segments):
-        scope = self.scope_combo.currentText()
-        for segment in segments:
-            preview = segment["content_preview"].strip()
-            if len(preview) > 100:
-                preview = preview[:100] + "..."
-
-            # This line should now work correctly as `segment` is a dict
-            participant_name = segment.get("participant_name") or "N/A"
-
-            item_data = [
-                preview,
-                segment["node_name"],
-                participant_name,
-            ]
-            if scope == "Entire Project":
-                item_data.append(segment["document_title"])
+    def segment_count(self):
+        """How many segments are in scope, before any filter."""
+        return len(self.model.order)
+
+    def _is_visible(self, index):
+        """Whether a store index passes the node filter or search currently applied."""
+        store = self.model.store
+        if self._last_active_node_filter:
+            return store.node_ids[index] in self._last_active_node_filter
+        query = self._search.applied_query()
+        if query is None:
+            return True
+        return bool(store.matching([index], *query))
+
+    def _in_scope(self, document_id):
+        if self.scope_combo.currentText() == "Entire Project":
+            return True
+        return document_id == self.current_document_id
+
+    def on_data_event(self, event):
+        """Applies one database change to the list without reloading it."""
+        action = self._data_version.check(event)
+        if action == SKIP:
+            return
+        if action != APPLY or self._load_task is not None:
+            # Missed an event, or the rows in flight may predate this change
+            self.reload_view()
+            return
+        if isinstance(event, database.SegmentAdded):
+            if self._in_scope(event.document_id):
+                segment = database.get_coded_segment(event.segment_id)
+                if segment is not None:
+                    self.model.insert_segment(segment, self._is_visible)
+        elif isinstance(event, database.SegmentDeleted):
+            self.model.remove_segments({event.segment_id})
+        elif isinstance(event, database.SegmentMoved):
+            # Re-inserted, so a node filter shows or hides it under its new node
+            self.model.remove_segments({event.segment_id})
+            if self._in_scope(event.document_id):
+                segment = database.get_coded_segment(event.segment_id)
+                if segment is not None:
+                    self.model.insert_segment(segment, self._is_visible)
+        elif isinstance(event, database.DocumentEdited):
+            self.model.store.forget_document_text(event.document_id)
+            if event.rebased_segment_ids and self._in_scope(event.document_id):
+                self.reload_view()
+        elif isinstance(event, database.NodeDeleted):
+            self.model.remove_segments(
+                self.model.segment_ids_of_nodes(event.deleted_node_ids)
+            )
+        elif isinstance(event, database.NodeRenamed):
+            self.model.rename_node(event.node_id, event.name)
+        # A search part-way through may hold rows from before the change
+        self._search.restart()
 
-            item = QTreeWidgetItem(self.tree_widget, item_data)
-            item.setData(0, 1, segment["id"])
+    def on_search_text_changed(self, text):
+        self._last_active_node_filter = None
+        self._search.request(text.lower(), self.search_scope_combo.currentText())
 
     def filter_tree(self):
+        """Applies the search box now; typing goes through the debounced on_search_text_changed."""
         self._last_active_node_filter = None
-        search_text = self.search_input.text().lower()
-        scope = self.search_scope_combo.currentText()
-        view_scope = self.scope_combo.currentText()
-
-        try:
-            self.tree_widget.currentItemChanged.disconnect(self.on_selection_changed)
-        except (TypeError, RuntimeError):
-            pass
-
-        self.tree_widget.clear()
-
-        if not search_text:
-            self.populate_tree(self.all_segments)
-        else:
-            filtered_segments = [
-                seg
-                for seg in self.all_segments
-                if self._segment_matches_filter(seg, search_text, scope, view_scope)
-            ]
-            self.populate_tree(filtered_segments)
-
-        self.tree_widget.currentItemChanged.connect(self.on_selection_changed)
-
-    def _segment_matches_filter(self, seg, search_text, scope, view_scope):
-        text_match = search_text in seg["content_preview"].lower()
-        node_match = search_text in seg["node_name"].lower()
-        participant_match = (
-            seg.get("participant_name")
-            and search_text in seg.get("participant_name", "").lower()
+        self._search.run_now(
+            self.search_input.text().lower(), self.search_scope_combo.currentText()
         )
-        doc_match = (
-            view_scope == "Entire Project"
-            and "document_title" in seg
-            and search_text in seg["document_title"].lower()
-        )
-
-        if scope == "All":
-            return text_match or node_match or participant_match or doc_match
-        elif scope == "Coded Text":
-            return text_match
-        elif scope == "Node":
-            return node_match
-        elif scope == "Participant":
-            return participant_match
-        elif scope == "Document":
-            return doc_match
-        return False
 
     def filter_by_node_family(self, node_ids: list):
+        self.search_input.blockSignals(True)
         self.search_input.clear()
+        self.search_input.blockSignals(False)
+        self._search.reset()
         self._last_active_node_filter = node_ids
 
-        try:
-            self.tree_widget.currentItemChanged.disconnect(self.on_selection_changed)
-        except (TypeError, RuntimeError):
-            pass
-
-        self.tree_widget.clear()
-
         if not node_ids:
-            self.populate_tree(self.all_segments)
+            self.model.set_rows(self.model.order)
         else:
-            node_filtered_segments = [
-                seg for seg in self.all_segments if seg["node_id"] in node_ids
-            ]
-            self.populate_tree(node_filtered_segments)
-
-        self.tree_widget.currentItemChanged.connect(self.on_selection_changed)
+            wanted = set(node_ids)
+            node_of = self.model.store.node_ids
+            self.model.set_rows([i for i in self.model.order if node_of[i] in wanted])
 
     def filter_by_single_node(self, node_id: int):
-        self.search_input.clear()
+        self.filter_by_node_family([node_id] if node_id else [])
         self._last_active_node_filter = [node_id]
 
-        try:
-            self.tree_widget.currentItemChanged.disconnect(self.on_selection_changed)
-        except (TypeError, RuntimeError):
-            pass
-
-        self.tree_widget.clear()
-
-        if not node_id:
-            self.populate_tree(self.all_segments)
-        else:
-            node_filtered_segments = [
-                seg for seg in self.all_segments if seg["node_id"] == node_id
-            ]
-            self.populate_tree(node_filtered_segments)
-
-        self.tree_widget.currentItemChanged.connect(self.on_selection_changed)
-
     def filter_segments_by_participant(self, participant_id: int):
         if not self.segments:
             return
@@ -18,8 +18,6 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import (
     QTextCursor,
-    QColor,
-    QTextCharFormat,
     QTextDocument,
     QFont,
 )
@@ -27,11 +25,19 @@ import os
 import database
 import docx
 
+from managers.data_events import (
+    APPLY,
+    SKIP,
+    DataVersionTracker,
+    get_data_event_bridge,
+)
 from managers.export_manager import export_annotated_document
 from managers.theme_manager import load_settings
 from .excel_import_dialog import ExcelImportDialog
+from .highlight_layer import HighlightLayer
 from managers import excel_import_manager
 from qt_material_icons import MaterialIcon
+from utils.offset_map import OffsetMap
 
 
 class ContentView(QWidget):
@@ -52,8 +58,12 @@ class ContentView(QWidget):
         self.current_document_id = None
         self.current_participant_id = None
         self.is_dirty = False
-        self._coded_segments_cache = []
+        self._coded_segments_cache = {}  # segment_id -> segment
+        # Edits since the text was loaded or saved; segment offsets are stored
+        # against that text and follow the edits through this map
+        self._offset_map = None
         self._pending_highlight = None
+        self._data_version = DataVersionTracker(project_id)
         self.setAcceptDrops(True)
         main_layout = QVBoxLayout(self)
         top_bar_layout = QHBoxLayout()
@@ -88,6 +98,7 @@ class ContentView(QWidget):
         self.text_edit = QTextEdit()
         self.text_edit.setReadOnly(False)
         self.text_edit.setAcceptDrops(False)
+        self.highlight_layer = HighlightLayer(self.text_edit)
         self.drop_overlay = QFrame()
         self.drop_overlay.setObjectName("dropOverlay")
         overlay_layout = QVBoxLayout(self.drop_overlay)
@@ -115,8 +126,10 @@ class ContentView(QWidget):
         info_bar_layout.setContentsMargins(5, 2, 5, 2)
         self.word_count_label = QLabel("Word Count: 0")
         self.segment_count_label = QLabel("Coded Segments: 0")
+        self.codes_at_cursor_label = QLabel()
         info_bar_layout.addWidget(self.word_count_label)
         info_bar_layout.addStretch()
+        info_bar_layout.addWidget(self.codes_at_cursor_label)
         info_bar_layout.addWidget(self.segment_count_label)
         top_bar_layout.addWidget(title_label)
         top_bar_layout.addWidget(self.doc_selector)
@@ -137,6 +150,7 @@ class ContentView(QWidget):
         self.text_edit.textChanged.connect(self.on_text_changed)
         self.text_edit.cursorPositionChanged.connect(self.on_cursor_position_changed)
         self.text_edit.selectionChanged.connect(self.on_selection_changed_for_coding)
+        get_data_event_bridge().changed.connect(self.on_data_event)
         self.load_document_list()
 
     def _select_and_scroll(self, start, end):
@@ -148,6 +162,12 @@ class ContentView(QWidget):
 
     def go_to_segment(self, document_id, start, end):
         if document_id == self.current_document_id:
+            if self._offset_map is not None and not self._offset_map.is_empty():
+                mapped = self._offset_map.map_range(start, end)
+                if mapped is None:
+                    position = self._offset_map.map_position(start)
+                    mapped = (position, position)
+                start, end = mapped
             self._select_and_scroll(start, end)
         else:
             self._pending_highlight = (start, end)
@@ -390,12 +410,42 @@ class ContentView(QWidget):
             self.is_dirty = True
             self.save_button.setEnabled(True)
 
+    def _on_contents_change(self, position, chars_removed, chars_added):
+        if self._offset_map is None:
+            return
+        self._offset_map.record(position, chars_removed, chars_added)
+        self.highlight_layer.refresh()
+
+    def _start_offset_map(self):
+        # Qt positions count UTF-16 units; the trailing block separator is not text
+        self._offset_map = OffsetMap(self.text_edit.document().characterCount() - 1)
+        self.highlight_layer.set_offset_map(self._offset_map)
+
+    def original_range(self, start, end):
+        """
+        The range of the text as loaded that the unsaved edits turn into
+        [start, end), which is what stored offsets refer to. None when no such
+        range exists, because the range starts or ends in inserted text.
+        """
+        if self._offset_map is None or self._offset_map.is_empty():
+            return start, end
+        original = (
+            self._offset_map.to_original(start),
+            self._offset_map.to_original(end),
+        )
+        if self._offset_map.map_range(*original) != (start, end):
+            return None
+        return original
+
     def save_document(self, show_success_prompt=True):
         if not self.is_dirty or not self.current_document_id:
             return
-        database.update_document_text_only(
-            self.current_document_id, self.text_edit.toPlainText()
-        )
+        content = self.text_edit.toPlainText()
+        # Segments are rebased to the saved text in the same transaction, and
+        # the DocumentEdited event reloads them against a fresh map
+        edits = self._offset_map
+        self._start_offset_map()
+        database.update_document_text_only(self.current_document_id, content, edits)
         self.is_dirty = False
         self.save_button.setEnabled(False)
         if show_success_prompt:
@@ -449,13 +499,16 @@ class ContentView(QWidget):
             except RuntimeError:
                 pass
             self.text_edit.setDocument(QTextDocument(self))
+            self._offset_map = None
+            self.highlight_layer.set_offset_map(None)
+            self.highlight_layer.clear()
             self.is_dirty = False
             self.save_button.setEnabled(False)
             selected_display_text = self.doc_selector.currentText()
             if not selected_display_text:
                 self.current_document_id = None
                 self.current_participant_id = None
-                self._coded_segments_cache = []
+                self._coded_segments_cache = {}
                 self.text_edit.setReadOnly(True)
                 self.text_edit.clear()
                 self.import_button.setStyleSheet(
@@ -473,8 +526,12 @@ class ContentView(QWidget):
                 )
                 self.current_participant_id = participant_id
                 self.text_edit.setPlainText(content)
+                self._start_offset_map()
+                self.text_edit.document().contentsChange.connect(
+                    self._on_contents_change
+                )
                 self.apply_all_highlights()
-                word_count = len(content.split())
+                word_count = database.get_document_word_count(self.current_document_id)
                 self.word_count_label.setText(f"Word Count: {word_count}")
 
             if self._pending_highlight:
@@ -487,59 +544,103 @@ class ContentView(QWidget):
             QApplication.restoreOverrideCursor()
 
     def apply_all_highlights(self):
-        self.text_edit.blockSignals(True)
-        original_position = self.text_edit.textCursor().position()
-        try:
-            cursor = self.text_edit.textCursor()
-            cursor.select(QTextCursor.SelectionType.Document)
-            cursor.setCharFormat(QTextCharFormat())
-            cursor.clearSelection()
-            self.text_edit.setTextCursor(cursor)
-            if not self.current_document_id:
-                self.segment_count_label.setText("Coded Segments: 0")
-                return
-            self._coded_segments_cache = database.get_coded_segments_for_document(
-                self.current_document_id
-            )
-            self.segment_count_label.setText(
-                f"Coded Segments: {len(self._coded_segments_cache)}"
-            )
-            for segment in self._coded_segments_cache:
-                self.highlight_text(
-                    segment["segment_start"],
-                    segment["segment_end"],
-                    segment["node_color"],
-                )
-        finally:
-            cursor = self.text_edit.textCursor()
-            cursor.setPosition(original_position)
-            self.text_edit.setTextCursor(cursor)
-            self.text_edit.blockSignals(False)
+        """Reloads the current document's segments and repaints their highlights."""
+        if not self.current_document_id:
+            self._coded_segments_cache = {}
+            self._update_segment_count()
+            self.highlight_layer.clear()
+            return
+        self._data_version.mark_loaded()
+        segments = database.get_coded_segments_for_document(self.current_document_id)
+        self._coded_segments_cache = {s["id"]: s for s in segments}
+        self._update_segment_count()
+        self.highlight_layer.set_segments(segments)
+
+    def _update_segment_count(self):
+        self.segment_count_label.setText(
+            f"Coded Segments: {len(self._coded_segments_cache)}"
+        )
 
-    def highlight_text(self, start, end, color_hex):
-        cursor = self.text_edit.textCursor()
-        cursor.setPosition(start)
-        cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
-        fmt = QTextCharFormat()
-        bg_color = QColor(color_hex)
-        brightness = (
-            bg_color.red() * 299 + bg_color.green() * 587 + bg_color.blue() * 114
-        ) / 1000
-        text_color = QColor("black") if brightness > 128 else QColor("white")
-        fmt.setBackground(bg_color)
-        fmt.setForeground(text_color)
-        cursor.setCharFormat(fmt)
-        cursor.clearSelection()
-        self.text_edit.setTextCursor(cursor)
+    def on_data_event(self, event):
+        """Applies one database change to the highlights without a full reload."""
+        action = self._data_version.check(event)
+        if action == SKIP or not self.current_document_id:
+            return
+        if action != APPLY:
+            self.apply_all_highlights()
+            return
+        if isinstance(event, database.DocumentEdited):
+            if (
+                event.document_id == self.current_document_id
+                and event.rebased_segment_ids
+            ):
+                self.apply_all_highlights()
+        elif isinstance(event, database.SegmentAdded):
+            if event.document_id != self.current_document_id:
+                return
+            segment = database.get_coded_segment(event.segment_id)
+            if segment is None:
+                return
+            self._coded_segments_cache[segment["id"]] = segment
+            self._update_segment_count()
+            self.highlight_layer.add_segment(segment)
+        elif isinstance(event, database.SegmentDeleted):
+            if event.document_id != self.current_document_id:
+                return
+            self._coded_segments_cache.pop(event.segment_id, None)
+            self._update_segment_count()
+            self.highlight_layer.remove_segment(event.segment_id)
+        elif isinstance(event, database.SegmentMoved):
+            if event.segment_id not in self._coded_segments_cache:
+                return
+            segment = database.get_coded_segment(event.segment_id)
+            if segment is None:
+                return
+            self._coded_segments_cache[segment["id"]] = segment
+            self.highlight_layer.set_color([segment["id"]], segment["node_color"])
+        elif isinstance(event, database.NodeRecolored):
+            segment_ids = []
+            for segment in self._coded_segments_cache.values():
+                if segment["node_id"] == event.node_id:
+                    segment["node_color"] = event.color
+                    segment_ids.append(segment["id"])
+            if segment_ids:
+                self.highlight_layer.set_color(segment_ids, event.color)
+        elif isinstance(event, database.NodeRenamed):
+            for segment in self._coded_segments_cache.values():
+                if segment["node_id"] == event.node_id:
+                    segment["node_name"] = event.name
+        elif isinstance(event, database.NodeDeleted):
+            removed = [
+                s["id"]
+                for s in self._coded_segments_cache.values()
+                if s["node_id"] in event.deleted_node_ids
+            ]
+            if not removed:
+                return
+            for segment_id in removed:
+                del self._coded_segments_cache[segment_id]
+                self.highlight_layer.remove_segment(segment_id)
+            self._update_segment_count()
+
+    def segments_at(self, position):
+        """Every coded segment covering a position, outermost (earliest start) first."""
+        return [
+            self._coded_segments_cache[segment_id]
+            for segment_id in self.highlight_layer.segment_ids_at(position)
+        ]
 
     def on_cursor_position_changed(self):
         pos = self.text_edit.textCursor().position()
-        found_segment = None
-        for segment in self._coded_segments_cache:
-            if segment["segment_start"] <= pos < segment["segment_end"]:
-                found_segment = segment
-                break
-        if found_segment:
+        segments = self.segments_at(pos)
+        node_names = [segment["node_name"] for segment in segments]
+        self.codes_at_cursor_label.setText(
+            f"Codes here: {', '.join(node_names)}" if node_names else ""
+        )
+        if segments:
+            # The latest-starting segment is painted on top, so it is the one
+            # the user sees under the cursor
+            found_segment = segments[-1]
             self.segment_clicked.emit(found_segment["id"])
             self.node_clicked_in_content.emit(found_segment["node_id"])
             if found_segment.get("participant_id"):
@@ -0,0 +1,89 @@
+from PySide6.QtWidgets import (
+    QWidget,
+    QVBoxLayout,
+    QHBoxLayout,
+    QPushButton,
+    QLabel,
+    QProgressBar,
+)
+from PySide6.QtCore import Signal
+from qt_material_icons import MaterialIcon
+
+from managers.export_jobs import get_export_queue
+
+
+class ExportJobRow(QWidget):
+    """One queued or running export: its title, progress and a cancel button."""
+
+    ended = Signal(int)  # job_id
+
+    def __init__(self, job):
+        super().__init__()
+        self.job = job
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 2, 0, 2)
+        layout.setSpacing(2)
+        top_layout = QHBoxLayout()
+        self.title_label = QLabel(job.title)
+        self.title_label.setToolTip(job.title)
+        self.cancel_button = QPushButton()
+        self.cancel_button.setIcon(MaterialIcon("close"))
+        self.cancel_button.setFixedSize(24, 24)
+        self.cancel_button.setToolTip("Cancel Export")
+        self.cancel_button.clicked.connect(job.cancel)
+        top_layout.addWidget(self.title_label, 1)
+        top_layout.addWidget(self.cancel_button)
+        layout.addLayout(top_layout)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFixedHeight(12)
+        self.progress_bar.setTextVisible(False)
+        self.progress_bar.setRange(0, 1)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setToolTip("Queued")
+        layout.addWidget(self.progress_bar)
+
+        job.progress.connect(self.on_progress)
+        job.finished.connect(self.on_ended)
+        job.failed.connect(self.on_ended)
+        job.cancelled.connect(self.on_ended)
+
+    def on_progress(self, done, total):
+        # total is 0 until the writer knows how many nodes it will write
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+        self.progress_bar.setToolTip(f"{done} of {total}" if total else "Starting")
+
+    def on_ended(self, *_):
+        self.ended.emit(self.job.job_id)
+
+
+class ExportJobsView(QWidget):
+    """Lists the exports running in the background; hidden while there are none."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = {}
+        self.rows_layout = QVBoxLayout(self)
+        self.rows_layout.setContentsMargins(0, 0, 0, 0)
+
+        queue = get_export_queue()
+        queue.job_added.connect(self.add_job)
+        for job in queue.jobs():
+            self.add_job(job)
+        self.setVisible(bool(self._rows))
+
+    def add_job(self, job):
+        row = ExportJobRow(job)
+        self._rows[job.job_id] = row
+        self.rows_layout.addWidget(row)
+        row.ended.connect(self.remove_job)
+        self.setVisible(True)
+
+    def remove_job(self, job_id):
+        row = self._rows.pop(job_id, None)
+        if row is not None:
+            self.rows_layout.removeWidget(row)
+            row.deleteLater()
+        self.setVisible(bool(self._rows))
@@ -0,0 +1,165 @@
+from PySide6.QtCore import QPointF, Qt
+from PySide6.QtGui import QColor, QTextCharFormat, QTextCursor
+from PySide6.QtWidgets import QTextEdit
+
+from utils.interval_index import IntervalIndex
+
+
+def highlight_format(color_hex):
+    """Background in the node's colour, with black or white text for contrast."""
+    fmt = QTextCharFormat()
+    bg_color = QColor(color_hex)
+    brightness = (
+        bg_color.red() * 299 + bg_color.green() * 587 + bg_color.blue() * 114
+    ) / 1000
+    text_color = QColor("black") if brightness > 128 else QColor("white")
+    fmt.setBackground(bg_color)
+    fmt.setForeground(text_color)
+    return fmt
+
+
+class HighlightLayer:
+    """
+    Paints coded segments over a QTextEdit as extra selections.
+
+    Unlike setCharFormat, extra selections leave the document, its undo stack,
+    its modified flag and the user's cursor alone, and a single segment can be
+    added, removed or recoloured without repainting any other.
+
+    Only the segments overlapping the visible text, plus one viewport of
+    margin above and below, are turned into selections. Scrolling past the
+    margin paints the next stretch, so opening a long transcript costs the
+    same as opening a short one.
+
+    Segment offsets stay as they were loaded. While the text has unsaved
+    edits, an OffsetMap translates them at paint time, so only the painted
+    segments pay for following the edits.
+    """
+
+    def __init__(self, text_edit):
+        self.text_edit = text_edit
+        self._index = IntervalIndex()
+        self._colors = {}  # segment_id -> color_hex
+        self._formats = {}  # color_hex -> QTextCharFormat
+        self._painted = None  # (start, end) character range currently painted
+        self._offset_map = None
+        scrollbar = text_edit.verticalScrollBar()
+        scrollbar.valueChanged.connect(self._on_viewport_changed)
+        scrollbar.rangeChanged.connect(self._on_viewport_changed)
+
+    def clear(self):
+        self._index = IntervalIndex()
+        self._colors = {}
+        self._painted = None
+        self.text_edit.setExtraSelections([])
+
+    def set_offset_map(self, offset_map):
+        """Follows the edits recorded in offset_map (None: offsets match the text)."""
+        self._offset_map = offset_map
+
+    def set_segments(self, segments):
+        """Replaces every highlight with the given segment dicts."""
+        self._index = IntervalIndex(
+            (s["segment_start"], s["segment_end"], s["id"]) for s in segments
+        )
+        self._colors = {s["id"]: s["node_color"] for s in segments}
+        self.refresh()
+
+    def add_segment(self, segment):
+        self._index.add(segment["segment_start"], segment["segment_end"], segment["id"])
+        self._colors[segment["id"]] = segment["node_color"]
+        self.refresh()
+
+    def remove_segment(self, segment_id):
+        if segment_id not in self._index:
+            return
+        self._index.remove(segment_id)
+        del self._colors[segment_id]
+        self.refresh()
+
+    def set_color(self, segment_ids, color_hex):
+        """Recolours the given segments."""
+        for segment_id in segment_ids:
+            if segment_id in self._colors:
+                self._colors[segment_id] = color_hex
+        self.refresh()
+
+    def segment_ids_at(self, position):
+        """Ids of every segment covering a position, in start order."""
+        offset_map = self._offset_map
+        if offset_map is None or offset_map.is_empty():
+            return self._index.at(position)
+        segment_ids = []
+        for segment_id in self._index.at(offset_map.to_original(position)):
+            span = self._span(segment_id)
+            if span is not None and span[0] <= position < span[1]:
+                segment_ids.append(segment_id)
+        return segment_ids
+
+    def painted_count(self):
+        """How many segments currently have a selection."""
+        return len(self.text_edit.extraSelections())
+
+    def refresh(self):
+        """Repaints the segments around the visible text."""
+        self._painted = self._visible_range(self.text_edit.viewport().height())
+        start, end = self._painted
+        if self._offset_map is not None and not self._offset_map.is_empty():
+            start = self._offset_map.to_original(start)
+            end = self._offset_map.to_original(end) + 1
+        document = self.text_edit.document()
+        last = document.characterCount() - 1
+        selections = []
+        for segment_id in self._index.overlapping(start, end):
+            span = self._span(segment_id)
+            if span is None:
+                continue
+            segment_start, segment_end = span
+            cursor = QTextCursor(document)
+            cursor.setPosition(min(segment_start, last))
+            cursor.setPosition(min(segment_end, last), QTextCursor.MoveMode.KeepAnchor)
+            selection = QTextEdit.ExtraSelection()
+            selection.cursor = cursor
+            selection.format = self._format(self._colors[segment_id])
+            selections.append(selection)
+        # Later selections paint over earlier ones, so overlaps follow start order
+        self.text_edit.setExtraSelections(selections)
+
+    def _span(self, segment_id):
+        """Current (start, end) of a segment, or None if its text was deleted."""
+        start, end = self._index.span(segment_id)
+        if self._offset_map is None or self._offset_map.is_empty():
+            return start, end
+        return self._offset_map.map_range(start, end)
+
+    def _on_viewport_changed(self, *_args):
+        if not len(self._index):
+            return
+        if self._painted is not None:
+            visible_start, visible_end = self._visible_range(0)
+            if self._painted[0] <= visible_start and visible_end <= self._painted[1]:
+                return
+        self.refresh()
+
+    def _visible_range(self, margin):
+        """Character range shown in the viewport, widened by margin pixels each way."""
+        document = self.text_edit.document()
+        layout = document.documentLayout()
+        viewport = self.text_edit.viewport()
+        top = self.text_edit.verticalScrollBar().value()
+        start = layout.hitTest(QPointF(0, top - margin), Qt.HitTestAccuracy.FuzzyHit)
+        end = layout.hitTest(
+            QPointF(viewport.width(), top + viewport.height() + margin),
+            Qt.HitTestAccuracy.FuzzyHit,
+        )
+        if start < 0:
+            start = 0
+        if end < 0:
+            end = document.characterCount()
+        return start, end
+
+    def _format(self, color_hex):
+        fmt = self._formats.get(color_hex)
+        if fmt is None:
+            fmt = self._formats[color_hex] = highlight_format(color_hex)
+        return fmt
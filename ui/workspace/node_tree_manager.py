@@ -2,9 +2,7 @@ from PySide6.QtWidgets import (
     QWidget,
     QVBoxLayout,
     QPushButton,
-    QTreeWidget,
-    QTreeWidgetItem,
-    QTreeWidgetItemIterator,
+    QTreeView,
     QMessageBox,
     QInputDialog,
     QLabel,
@@ -15,14 +13,22 @@ from PySide6.QtWidgets import (
     QComboBox,
 )
 from PySide6.QtCore import Qt, Signal, QTimer
-from PySide6.QtGui import QDropEvent, QKeyEvent
+from PySide6.QtGui import QColor, QKeyEvent
 from managers.export_manager import (
     export_node_family_to_word,
     export_node_family_to_excel,
     export_node_family_to_excel_multi_sheet,
 )
+from managers.data_events import (
+    APPLY,
+    SKIP,
+    DataVersionTracker,
+    get_data_event_bridge,
+)
+from managers.query_executor import run_query
 import database
 from qt_material_icons import MaterialIcon
+from .node_tree_model import NodeItemDelegate, NodeTreeModel
 
 PRESET_COLORS = [
     "#FFB3BA",
@@ -78,44 +84,28 @@ PRESET_COLORS = [
 ]
 
 
-class DraggableTreeWidget(QTreeWidget):
+class NodeTreeView(QTreeView):
+    """
+    The node tree: drag and drop to move nodes, or drop coded segments on a
+    node to recode them; F2 to rename, Delete to delete.
+    """
+
     def __init__(self, parent_manager):
         super().__init__()
         self.parent_manager = parent_manager
         self.setDragEnabled(True)
         self.setAcceptDrops(True)
-        self.setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
+        # DragDrop rather than InternalMove, which refuses the segment list's rows
+        self.setDragDropMode(QAbstractItemView.DragDropMode.DragDrop)
+        self.setDefaultDropAction(Qt.DropAction.MoveAction)
         self.setDropIndicatorShown(True)
-
-    def dropEvent(self, event: QDropEvent):
-        source_item = self.currentItem()
-        if not source_item:
-            return
-        source_id = source_item.data(0, 1)
-        super().dropEvent(event)
-        new_parent_item = source_item.parent()
-        new_parent_id = new_parent_item.data(0, 1) if new_parent_item else None
-        database.update_node_parent(source_id, new_parent_id)
-        if new_parent_item:
-            siblings = [
-                new_parent_item.child(i) for i in range(new_parent_item.childCount())
-            ]
-        else:
-            siblings = [self.topLevelItem(i) for i in range(self.topLevelItemCount())]
-        db_order_updates = [
-            (i, item.data(0, 1))
-            for i, item in enumerate(siblings)
-            if item.data(0, 1) is not None
-        ]
-        database.update_node_order(db_order_updates)
-        QTimer.singleShot(0, self.parent_manager.refresh_tree_and_emit_update)
+        self.setUniformRowHeights(True)
+        # The delegate shows a row's action buttons while the mouse is over it
+        self.setMouseTracking(True)
+        self.viewport().setAttribute(Qt.WidgetAttribute.WA_Hover)
 
     def keyPressEvent(self, event: QKeyEvent):
-        current_item = self.currentItem()
-        if not current_item:
-            super().keyPressEvent(event)
-            return
-        node_id = current_item.data(0, 1)
+        node_id = self.model().node_id(self.currentIndex())
         if node_id is None:
             super().keyPressEvent(event)
             return
@@ -129,118 +119,15 @@ class DraggableTreeWidget(QTreeWidget):
             super().keyPressEvent(event)
 
 
-class NodeItemWidget(QWidget):
-    def __init__(self, node_id, node_color, name_text, stats_text, parent_manager):
-        super().__init__()
-        self.node_id = node_id
-        self.parent_manager = parent_manager
-
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(0, 2, 5, 7)
-        layout.setSpacing(5)
-
-        self.color_button = QPushButton()
-        self.color_button.setObjectName("nodeColorButton")
-        self.color_button.setFixedSize(18, 18)
-        self.color_button.setToolTip("Click to change node color")
-        self.set_button_color(node_color)
-        self.color_button.clicked.connect(self.on_color_change)
-
-        self.name_label = QLabel(name_text)
-        self.stats_label = QLabel(stats_text)
-        self.stats_label.setStyleSheet("color: #888;")
-
-        self.export_button = QPushButton()
-        export_icon = MaterialIcon("download")
-        self.export_button.setIcon(export_icon)
-        self.export_button.setFixedSize(24, 24)
-        self.export_button.setToolTip("Export this node and its children")
-        self.export_button.clicked.connect(self.on_export)
-        self.export_button.setVisible(False)
-
-        self.filter_button = QPushButton()
-        filter_icon = MaterialIcon("filter_list")
-        self.filter_button.setIcon(filter_icon)
-        self.filter_button.setFixedSize(24, 24)
-        self.filter_button.setToolTip("Filter by this node only")
-        self.filter_button.clicked.connect(self.on_filter)
-        self.filter_button.setVisible(False)
-
-        self.add_button = QPushButton()
-        add_icon = MaterialIcon("add")
-        self.add_button.setIcon(add_icon)
-        self.add_button.setFixedSize(24, 24)
-        self.add_button.setToolTip("Add a child node")
-        self.add_button.clicked.connect(self.on_add_child)
-        self.add_button.setVisible(False)
-
-        self.edit_button = QPushButton()
-        edit_icon = MaterialIcon("edit")
-        self.edit_button.setIcon(edit_icon)
-        self.edit_button.setFixedSize(24, 24)
-        self.edit_button.setToolTip("Rename node (F2)")
-        self.edit_button.clicked.connect(self.on_rename)
-        self.edit_button.setVisible(False)
-
-        self.delete_button = QPushButton()
-        delete_icon = MaterialIcon("delete")
-        self.delete_button.setIcon(delete_icon)
-        self.delete_button.setFixedSize(24, 24)
-        self.delete_button.setToolTip("Delete node and its children (Delete)")
-        self.delete_button.clicked.connect(self.on_delete)
-        self.delete_button.setVisible(False)
-
-        layout.addWidget(self.color_button)
-        layout.addWidget(self.name_label)
-        layout.addStretch()
-        layout.addWidget(self.stats_label)
-        layout.addWidget(self.export_button)
-        layout.addWidget(self.filter_button)
-        layout.addWidget(self.add_button)
-        layout.addWidget(self.edit_button)
-        layout.addWidget(self.delete_button)
-
-    def set_button_color(self, color_hex):
-        self.color_button.setStyleSheet(
-            f"background-color: {color_hex}; border: 1px solid #888;"
-        )
-
-    def set_icons_visible(self, visible):
-        self.export_button.setVisible(visible)
-        self.filter_button.setVisible(visible)
-        self.add_button.setVisible(visible)
-        self.edit_button.setVisible(visible)
-        self.delete_button.setVisible(visible)
-
-    def set_selected_style(self, is_selected: bool):
-        if is_selected:
-            self.stats_label.setStyleSheet("color: white;")
-        else:
-            self.stats_label.setStyleSheet("color: #888;")
-
-    def on_color_change(self):
-        current_color = self.color_button.palette().button().color()
-        color = QColorDialog.getColor(current_color, self)
-        if color.isValid():
-            new_color_hex = color.name()
-            self.set_button_color(new_color_hex)
-            database.update_node_color(self.node_id, new_color_hex)
-            self.parent_manager.node_updated.emit()
-
-    def on_export(self):
-        self.parent_manager.show_node_export_menu(self.node_id, self.export_button)
-
-    def on_filter(self):
-        self.parent_manager.filter_by_single_node(self.node_id)
-
-    def on_add_child(self):
-        self.parent_manager.add_node(parent_id=self.node_id)
-
-    def on_rename(self):
-        self.parent_manager.rename_node(self.node_id)
-
-    def on_delete(self):
-        self.parent_manager.delete_node(self.node_id)
+def _load_node_stats(project_id, document_id, document_scope=False):
+    """Runs on a query executor thread. Returns (total_words, rolled-up node stats)."""
+    total_words = 0
+    if document_scope:
+        if document_id:
+            total_words = database.get_document_word_count(document_id)
+    else:
+        total_words = database.get_project_word_count(project_id)
+    return total_words, database.get_node_rollup_statistics(project_id, document_id)
 
 
 class NodeTreeManager(QWidget):
@@ -252,7 +139,10 @@ class NodeTreeManager(QWidget):
     def __init__(self, project_id):
         super().__init__()
         self.project_id = project_id
-        self.nodes_map = {}
+        self._stats_task = None
+        self._data_version = DataVersionTracker(project_id)
+        self._reload_scheduled = False
+        self._node_id_to_reselect = None
         self._is_selection_mode = False
         self.current_document_id = None
         main_layout = QVBoxLayout(self)
@@ -280,7 +170,7 @@ class NodeTreeManager(QWidget):
         self.scope_combo.setCurrentText(
             "Current Document"
         )  # Default to Current Document
-        self.scope_combo.currentTextChanged.connect(self.load_nodes)
+        self.scope_combo.currentTextChanged.connect(lambda _: self._load_stats())
         header_layout = QHBoxLayout()
         header_layout.addWidget(header_label)
         header_layout.addStretch()
@@ -288,162 +178,185 @@ class NodeTreeManager(QWidget):
         header_layout.addWidget(clear_filter_button)
         header_layout.addWidget(add_root_button)
         main_layout.addLayout(header_layout)
-        self.tree_widget = DraggableTreeWidget(self)
-        self.tree_widget.setHeaderHidden(True)
-        self.tree_widget.setIndentation(20)
-        main_layout.addWidget(self.tree_widget)
-        self.tree_widget.currentItemChanged.connect(self.on_selection_changed)
-        self.tree_widget.itemClicked.connect(self.on_item_clicked)
+        self.model = NodeTreeModel(self)
+        self.delegate = NodeItemDelegate(self)
+        self.delegate.action_triggered.connect(self.on_node_action)
+        self.tree_view = NodeTreeView(self)
+        self.tree_view.setHeaderHidden(True)
+        self.tree_view.setIndentation(20)
+        self.tree_view.setModel(self.model)
+        self.tree_view.setItemDelegate(self.delegate)
+        main_layout.addWidget(self.tree_view)
+        self.tree_view.selectionModel().currentChanged.connect(
+            self.on_selection_changed
+        )
+        self.tree_view.clicked.connect(self.on_item_clicked)
+        get_data_event_bridge().changed.connect(self.on_data_event)
         self.load_nodes()
 
+    @property
+    def nodes_map(self):
+        return self.model.nodes
+
     def load_nodes(self, node_id_to_reselect=None):
-        try:
-            self.tree_widget.currentItemChanged.disconnect(self.on_selection_changed)
-        except RuntimeError:
-            pass
-
-        self.tree_widget.clear()
-        scope = self.scope_combo.currentText()
-        total_words = 0
-        doc_id_for_stats = None
-        if scope == "Current Document":
-            if self.current_document_id:
-                total_words = database.get_document_word_count(self.current_document_id)
-                doc_id_for_stats = self.current_document_id
+        """
+        Re-reads the nodes. An unchanged tree keeps its rows and only repaints
+        renamed or recoloured ones; otherwise the model is reset.
+        """
+        self._data_version.mark_loaded()
+        selection_model = self.tree_view.selectionModel()
+        selection_model.blockSignals(True)
+        if self.model.set_nodes(database.get_nodes_for_project(self.project_id)):
+            self.tree_view.expandAll()
+        if node_id_to_reselect is not None:
+            index = self.model.index_of(node_id_to_reselect)
+            if index.isValid():
+                self.tree_view.setCurrentIndex(index)
+        selection_model.blockSignals(False)
+        self._load_stats()
+
+    def _load_stats(self):
+        if self._stats_task is not None:
+            self._stats_task.cancel()
+        if self.scope_combo.currentText() == "Current Document":
+            self._stats_task = run_query(
+                _load_node_stats,
+                self.project_id,
+                self.current_document_id,
+                document_scope=True,
+                on_result=self._apply_node_stats,
+            )
         else:
-            total_words = database.get_project_word_count(self.project_id)
-
-        node_stats = database.get_node_statistics(self.project_id, doc_id_for_stats)
-        nodes = database.get_nodes_for_project(self.project_id)
-        self.nodes_map = {n["id"]: n for n in nodes}
-        self.nodes_by_parent = {n_id: [] for n_id in self.nodes_map}
-        self.nodes_by_parent[None] = []
-        for n_id, node in self.nodes_map.items():
-            self.nodes_by_parent.setdefault(node["parent_id"], []).append(node)
-        for children_list in self.nodes_by_parent.values():
-            children_list.sort(key=lambda x: x["position"])
-
-        item_to_reselect = None
-        aggregated_stats = {}
-
-        def calculate_aggregated_stats(parent_id):
-            parent_word_count = 0
-            parent_segment_count = 0
-            children = self.nodes_by_parent.get(parent_id, [])
-            for node_data in children:
-                child_word_count, child_segment_count = calculate_aggregated_stats(
-                    node_data["id"]
-                )
-                direct_stats = node_stats.get(
-                    node_data["id"], {"word_count": 0, "segment_count": 0}
-                )
-                total_node_word_count = direct_stats["word_count"] + child_word_count
-                total_node_segment_count = (
-                    direct_stats["segment_count"] + child_segment_count
-                )
-                aggregated_stats[node_data["id"]] = {
-                    "word_count": total_node_word_count,
-                    "segment_count": total_node_segment_count,
-                }
-                parent_word_count += total_node_word_count
-                parent_segment_count += total_node_segment_count
-            return parent_word_count, parent_segment_count
-
-        calculate_aggregated_stats(None)
-
-        def add_items_recursively(parent_widget, parent_id, prefix=""):
-            nonlocal item_to_reselect
-            children = self.nodes_by_parent.get(parent_id, [])
-            for i, node_data in enumerate(children):
-                current_prefix = f"{prefix}{i + 1}."
-                stats = aggregated_stats.get(
-                    node_data["id"], {"word_count": 0, "segment_count": 0}
-                )
-                word_count = stats["word_count"]
-                segment_count = stats["segment_count"]
-
-                name_text = f"{current_prefix} {node_data['name']}"
-
-                stats_text = ""
-                if segment_count > 0:
-                    percentage = (
-                        (word_count / total_words * 100) if total_words > 0 else 0
-                    )
-                    stats_text = f"{percentage:.1f}% | {segment_count} Segments"
+            self._stats_task = run_query(
+                _load_node_stats,
+                self.project_id,
+                None,
+                on_result=self._apply_node_stats,
+            )
 
-                tree_item = QTreeWidgetItem(parent_widget)
-                tree_item.setData(0, 1, node_data["id"])
+    def _apply_node_stats(self, stats_result):
+        self._stats_task = None
+        # Counts already include each node's descendants (node_closure roll-up)
+        total_words, node_stats = stats_result
+        self.model.set_stats(total_words, node_stats)
+
+    def _schedule_reload(self):
+        # Deferred, so a drop (a move plus a reorder) rebuilds the tree once,
+        # and never from inside the tree widget's own event handler
+        if not self._reload_scheduled:
+            self._reload_scheduled = True
+            QTimer.singleShot(0, self._reload_tree)
+
+    def _reload_tree(self):
+        self._reload_scheduled = False
+        node_id_to_reselect = self._node_id_to_reselect
+        self._node_id_to_reselect = None
+        self.load_nodes(node_id_to_reselect=node_id_to_reselect)
+        self.node_updated.emit()
 
-                item_widget = NodeItemWidget(
-                    node_data["id"], node_data["color"], name_text, stats_text, self
+    def on_data_event(self, event):
+        """Applies one database change to the tree without rebuilding it."""
+        action = self._data_version.check(event)
+        if action == SKIP:
+            return
+        if action != APPLY:
+            self._schedule_reload()
+            return
+        if isinstance(event, (database.SegmentAdded, database.SegmentDeleted)):
+            if self._stats_task is not None:
+                # The stats in flight may or may not include this segment
+                self._load_stats()
+                return
+            if (
+                self.scope_combo.currentText() == "Current Document"
+                and event.document_id != self.current_document_id
+            ):
+                return
+            sign = 1 if isinstance(event, database.SegmentAdded) else -1
+            self.model.adjust_stats(event.node_id, sign, sign * event.word_count)
+        elif isinstance(event, database.SegmentMoved):
+            if self._stats_task is not None:
+                self._load_stats()
+            elif (
+                self.scope_combo.currentText() != "Current Document"
+                or event.document_id == self.current_document_id
+            ):
+                self.model.move_stats(
+                    event.old_node_id, event.node_id, event.word_count
                 )
-                self.tree_widget.setItemWidget(tree_item, 0, item_widget)
-
-                if node_data["id"] == node_id_to_reselect:
-                    item_to_reselect = tree_item
-                add_items_recursively(tree_item, node_data["id"], prefix=current_prefix)
-
-        add_items_recursively(self.tree_widget, None)
-        self.tree_widget.expandAll()
-        if item_to_reselect:
-            self.tree_widget.setCurrentItem(item_to_reselect)
-        self.tree_widget.currentItemChanged.connect(self.on_selection_changed)
+        elif isinstance(event, database.DocumentEdited):
+            if event.rebased_segment_ids:
+                # Edited segments may have gained or lost words
+                self._load_stats()
+        elif isinstance(event, database.NodeRenamed):
+            self.model.rename_node(event.node_id, event.name)
+        elif isinstance(event, database.NodeRecolored):
+            self.model.set_color(event.node_id, event.color)
+        elif isinstance(
+            event,
+            (
+                database.NodeAdded,
+                database.NodeMoved,
+                database.NodesReordered,
+                database.NodeDeleted,
+            ),
+        ):
+            self._schedule_reload()
 
     def set_current_document_id(self, doc_id):
         self.current_document_id = doc_id
         if self.scope_combo.currentText() == "Current Document":
-            self.load_nodes()
+            self._load_stats()
 
     def set_selection_mode(self, enabled: bool):
         self._is_selection_mode = enabled
         if enabled:
-            self.tree_widget.setStyleSheet("QTreeWidget { border: 2px solid #0078d7; }")
+            self.tree_view.setStyleSheet("QTreeView { border: 2px solid #0078d7; }")
         else:
-            self.tree_widget.setStyleSheet("")
+            self.tree_view.setStyleSheet("")
 
-    def on_item_clicked(self, item: QTreeWidgetItem, column: int):
-        if self._is_selection_mode and item:
-            self.tree_widget.blockSignals(True)
-            node_id = item.data(0, 1)
-            if node_id is not None:
-                self.node_selected_for_coding.emit(node_id)
-            self.tree_widget.blockSignals(False)
-
-    def refresh_tree_and_emit_update(self, node_id_to_reselect=None):
-        self.load_nodes(node_id_to_reselect=node_id_to_reselect)
-        self.node_updated.emit()
+    def on_item_clicked(self, index):
+        node_id = self.model.node_id(index)
+        if self._is_selection_mode and node_id is not None:
+            self.node_selected_for_coding.emit(node_id)
 
     def clear_all_filters(self):
-        self.tree_widget.clearSelection()
+        self.tree_view.clearSelection()
         self.filter_by_node_family_signal.emit([])
 
-    def on_selection_changed(
-        self, current_item: QTreeWidgetItem, previous_item: QTreeWidgetItem
-    ):
-        if previous_item:
-            widget = self.tree_widget.itemWidget(previous_item, 0)
-            if widget:
-                widget.set_icons_visible(False)
-                widget.set_selected_style(False)
-
-        if current_item:
-            widget = self.tree_widget.itemWidget(current_item, 0)
-            if widget:
-                widget.set_icons_visible(True)
-                widget.set_selected_style(True)
-
-            node_id = current_item.data(0, 1)
+    def on_selection_changed(self, current, previous):
+        node_id = self.model.node_id(current)
+        if node_id is not None:
             descendants = self.get_all_descendant_ids(node_id)
             self.filter_by_node_family_signal.emit([node_id] + descendants)
         else:
             self.filter_by_node_family_signal.emit([])
 
+    def on_node_action(self, action, node_id, global_pos):
+        if action == NodeItemDelegate.COLOR_ACTION:
+            self.change_node_color(node_id)
+        elif action == "export":
+            self.show_node_export_menu(node_id, global_pos)
+        elif action == "filter":
+            self.filter_by_single_node(node_id)
+        elif action == "add_child":
+            self.add_node(parent_id=node_id)
+        elif action == "rename":
+            self.rename_node(node_id)
+        elif action == "delete":
+            self.delete_node(node_id)
+
+    def change_node_color(self, node_id):
+        node_data = self.nodes_map.get(node_id)
+        if not node_data:
+            return
+        color = QColorDialog.getColor(QColor(node_data["color"]), self)
+        if color.isValid():
+            # The NodeRecolored event repaints the swatch
+            database.update_node_color(node_id, color.name())
+
     def get_all_descendant_ids(self, node_id):
-        descendants = []
-        for child_node in self.nodes_by_parent.get(node_id, []):
-            descendants.append(child_node["id"])
-            descendants.extend(self.get_all_descendant_ids(child_node["id"]))
-        return descendants
+        return self.model.descendant_ids(node_id)
 
     def rename_node(self, node_id):
         node_data = self.nodes_map.get(node_id)
@@ -455,7 +368,6 @@ class NodeTreeManager(QWidget):
         )
         if ok and new_name.strip() and new_name.strip() != current_name:
             database.update_node_name(node_id, new_name.strip())
-            self.refresh_tree_and_emit_update(node_id_to_reselect=node_id)
 
     def set_stats_scope(self, scope, document_id=None):
         self.current_filter_scope = scope
@@ -475,8 +387,8 @@ class NodeTreeManager(QWidget):
                     break
             try:
                 pid = int(self.project_id)
+                self._node_id_to_reselect = parent_id
                 database.add_node(pid, name.strip(), parent_id, new_color)
-                self.refresh_tree_and_emit_update(node_id_to_reselect=parent_id)
             except (ValueError, TypeError) as e:
                 QMessageBox.critical(
                     self,
@@ -506,13 +418,13 @@ class NodeTreeManager(QWidget):
         )
 
         if reply == QMessageBox.StandardButton.Yes:
+            self._node_id_to_reselect = parent_id_to_reselect
             database.delete_node_and_children(node_id)
-            self.refresh_tree_and_emit_update(node_id_to_reselect=parent_id_to_reselect)
 
     def filter_by_single_node(self, node_id):
         self.filter_by_single_node_signal.emit(node_id)
 
-    def show_node_export_menu(self, node_id, button):
+    def show_node_export_menu(self, node_id, global_pos):
         menu = QMenu(self)
         action_export_word = menu.addAction("Export as Word (.docx)")
         action_export_excel = menu.addAction("Export as Excel (.xlsx)")
@@ -522,7 +434,7 @@ class NodeTreeManager(QWidget):
         action_export_excel.triggered.connect(
             lambda: self.export_node_family_to_excel_handler(node_id)
         )
-        menu.exec(button.mapToGlobal(button.rect().bottomLeft()))
+        menu.exec(global_pos)
 
     def export_node_family_to_excel_handler(self, node_id):
         msg_box = QMessageBox(self)
@@ -559,7 +471,6 @@ class NodeTreeManager(QWidget):
             try:
                 pid = int(self.project_id)
                 database.add_node(pid, name.strip(), None, new_color)
-                self.refresh_tree_and_emit_update(node_id_to_reselect=None)
             except (ValueError, TypeError) as e:
                 QMessageBox.critical(
                     self,
@@ -577,70 +488,29 @@ class NodeTreeManager(QWidget):
 
     def select_node_by_id(self, node_id: int):
         """
-        Navigates the tree widget to select and highlight the node with the given ID.
+        Navigates the tree to select and highlight the node with the given ID.
         """
-        self.tree_widget.blockSignals(True)
-
-        it = QTreeWidgetItemIterator(self.tree_widget)
-        found_item = None
-        while it.value():
-            item = it.value()
-            if item.data(0, 1) == node_id:
-                found_item = item
-                break
-            it += 1
-
-        previous_item = self.tree_widget.currentItem()
-
-        if found_item:
-            self.tree_widget.setCurrentItem(found_item)
-            self.tree_widget.scrollToItem(
-                found_item, QAbstractItemView.ScrollHint.PositionAtCenter
-            )
-            self.on_selection_changed(found_item, previous_item)
-
-        self.tree_widget.blockSignals(False)
+        index = self.model.index_of(node_id)
+        if not index.isValid():
+            return
+        selection_model = self.tree_view.selectionModel()
+        previous = self.tree_view.currentIndex()
+        selection_model.blockSignals(True)
+        self.tree_view.setCurrentIndex(index)
+        selection_model.blockSignals(False)
+        self.tree_view.scrollTo(index, QAbstractItemView.ScrollHint.PositionAtCenter)
+        self.on_selection_changed(index, previous)
 
     def highlight_node_by_id(self, node_id: int):
         """
-        Highlights (selects and scrolls to) the node with the given ID in the tree widget,
+        Highlights (selects and scrolls to) the node with the given ID in the tree,
         but does NOT trigger filtering or emit any signals. Used for visual highlight only.
-        Also updates the stats style and hides the action buttons on the last item.
         """
-        self.tree_widget.blockSignals(True)
-
-        # Un-highlight previous item
-        previous_item = self.tree_widget.currentItem()
-        if previous_item:
-            prev_widget = self.tree_widget.itemWidget(previous_item, 0)
-            if prev_widget:
-                prev_widget.set_icons_visible(False)
-                prev_widget.set_selected_style(False)
-
-        it = QTreeWidgetItemIterator(self.tree_widget)
-        found_item = None
-        last_item = None
-        while it.value():
-            item = it.value()
-            last_item = item
-            if item.data(0, 1) == node_id:
-                found_item = item
-            it += 1
-
-        if found_item:
-            self.tree_widget.setCurrentItem(found_item)
-            self.tree_widget.scrollToItem(
-                found_item, QAbstractItemView.ScrollHint.PositionAtCenter
-            )
-            widget = self.tree_widget.itemWidget(found_item, 0)
-            if widget:
-                widget.set_icons_visible(False)
-                widget.set_selected_style(True)
-
-        # Hide the action buttons on the last listview item (if any)
-        if last_item:
-            last_widget = self.tree_widget.itemWidget(last_item, 0)
-            if last_widget:
-                last_widget.set_icons_visible(False)
-
-        self.tree_widget.blockSignals(False)
+        index = self.model.index_of(node_id)
+        if not index.isValid():
+            return
+        selection_model = self.tree_view.selectionModel()
+        selection_model.blockSignals(True)
+        self.tree_view.setCurrentIndex(index)
+        selection_model.blockSignals(False)
+        self.tree_view.scrollTo(index, QAbstractItemView.ScrollHint.PositionAtCenter)
@@ -0,0 +1,426 @@
+from PySide6.QtCore import (
+    QAbstractItemModel,
+    QByteArray,
+    QEvent,
+    QMimeData,
+    QModelIndex,
+    QRect,
+    QSize,
+    Qt,
+    Signal,
+)
+from PySide6.QtGui import QColor, QPen
+from PySide6.QtWidgets import (
+    QApplication,
+    QStyle,
+    QStyledItemDelegate,
+    QStyleOptionViewItem,
+    QToolTip,
+)
+
+import database
+from qt_material_icons import MaterialIcon
+from .segment_table_model import SEGMENT_MIME_TYPE
+
+NODE_MIME_TYPE = "application/x-nodeflow-node-id"
+
+
+class NodeTreeModel(QAbstractItemModel):
+    """
+    The codebook as a tree model. Each index carries its node id as its
+    internalId, so looking a node up, or its parent, is a dict access.
+
+    Reloading the same tree only emits dataChanged for rows whose name or
+    colour changed, and statistics updates only for rows whose text changed;
+    the view is reset only when nodes were added, removed or moved.
+    """
+
+    NODE_ID_ROLE = Qt.ItemDataRole.UserRole
+    COLOR_ROLE = Qt.ItemDataRole.UserRole + 1
+    STATS_ROLE = Qt.ItemDataRole.UserRole + 2
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.nodes = {}  # node_id -> node dict
+        self.children = {None: []}  # parent_id -> child ids, in position order
+        self._rows = {}  # node_id -> row under its parent
+        self._prefixes = {}  # node_id -> outline number, e.g. "1.2."
+        self._stats = {}  # node_id -> rolled-up segment_count / word_count
+        self._total_words = 0
+
+    def set_nodes(self, nodes):
+        """Shows the nodes of a project, as returned by get_nodes_for_project."""
+        nodes_map = {node["id"]: node for node in nodes}
+        children = {None: []}
+        for node in sorted(nodes, key=lambda n: n["position"]):
+            children.setdefault(node["parent_id"], []).append(node["id"])
+        if children == self.children and nodes_map.keys() == self.nodes.keys():
+            changed = [
+                node_id
+                for node_id, node in nodes_map.items()
+                if node["name"] != self.nodes[node_id]["name"]
+                or node["color"] != self.nodes[node_id]["color"]
+            ]
+            self.nodes = nodes_map
+            for node_id in changed:
+                self._emit_changed(node_id)
+            return False
+        self.beginResetModel()
+        self.nodes = nodes_map
+        self.children = children
+        self._rows = {}
+        self._prefixes = {}
+        stack = [(None, "")]
+        while stack:
+            parent_id, prefix = stack.pop()
+            for row, node_id in enumerate(children.get(parent_id, ())):
+                self._rows[node_id] = row
+                self._prefixes[node_id] = f"{prefix}{row + 1}."
+                stack.append((node_id, self._prefixes[node_id]))
+        self.endResetModel()
+        return True
+
+    def index(self, row, column, parent=QModelIndex()):
+        parent_id = parent.internalId() if parent.isValid() else None
+        siblings = self.children.get(parent_id, ())
+        if column != 0 or not 0 <= row < len(siblings):
+            return QModelIndex()
+        return self.createIndex(row, 0, siblings[row])
+
+    def parent(self, index=QModelIndex()):
+        if not index.isValid():
+            return QModelIndex()
+        parent_id = self.nodes[index.internalId()]["parent_id"]
+        if parent_id not in self._rows:
+            return QModelIndex()
+        return self.createIndex(self._rows[parent_id], 0, parent_id)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        parent_id = parent.internalId() if parent.isValid() else None
+        return len(self.children.get(parent_id, ()))
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node_id = index.internalId()
+        node = self.nodes.get(node_id)
+        if node is None:
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"{self._prefixes.get(node_id, '')} {node['name']}"
+        if role == self.NODE_ID_ROLE:
+            return node_id
+        if role == self.COLOR_ROLE:
+            return node["color"]
+        if role == self.STATS_ROLE:
+            return self.stats_text(node_id)
+        return None
+
+    def flags(self, index):
+        flags = Qt.ItemFlag.ItemIsDropEnabled
+        if index.isValid():
+            flags |= (
+                Qt.ItemFlag.ItemIsEnabled
+                | Qt.ItemFlag.ItemIsSelectable
+                | Qt.ItemFlag.ItemIsDragEnabled
+            )
+        return flags
+
+    def index_of(self, node_id):
+        if node_id not in self._rows:
+            return QModelIndex()
+        return self.createIndex(self._rows[node_id], 0, node_id)
+
+    def node_id(self, index):
+        return index.internalId() if index.isValid() else None
+
+    def descendant_ids(self, node_id):
+        descendants = []
+        stack = list(reversed(self.children.get(node_id, ())))
+        while stack:
+            child_id = stack.pop()
+            descendants.append(child_id)
+            stack.extend(reversed(self.children.get(child_id, ())))
+        return descendants
+
+    def rename_node(self, node_id, name):
+        if node_id in self.nodes:
+            self.nodes[node_id]["name"] = name
+            self._emit_changed(node_id)
+
+    def set_color(self, node_id, color):
+        if node_id in self.nodes:
+            self.nodes[node_id]["color"] = color
+            self._emit_changed(node_id)
+
+    # Statistics
+
+    def set_stats(self, total_words, stats):
+        """Replaces the rolled-up statistics; repaints the rows whose text changed."""
+        before = {node_id: self.stats_text(node_id) for node_id in self._rows}
+        self._total_words = total_words
+        self._stats = stats
+        for node_id, text in before.items():
+            if self.stats_text(node_id) != text:
+                self._emit_changed(node_id, [self.STATS_ROLE])
+
+    def adjust_stats(self, node_id, segment_delta, word_delta):
+        """Adds a segment change to a node and its ancestors: O(depth) rows."""
+        for ancestor_id in self._ancestry(node_id):
+            self._add_stats(ancestor_id, segment_delta, word_delta)
+
+    def move_stats(self, old_node_id, node_id, word_count):
+        """
+        Moves one segment's counts between nodes. Ancestors of both nodes keep
+        their totals, so only the two paths below the shared ancestor change.
+        """
+        old_path = self._ancestry(old_node_id)
+        new_path = self._ancestry(node_id)
+        shared = set(old_path).intersection(new_path)
+        for ancestor_id in old_path:
+            if ancestor_id not in shared:
+                self._add_stats(ancestor_id, -1, -word_count)
+        for ancestor_id in new_path:
+            if ancestor_id not in shared:
+                self._add_stats(ancestor_id, 1, word_count)
+
+    def _ancestry(self, node_id):
+        """The node followed by its ancestors up to the root."""
+        path = []
+        while node_id is not None and node_id in self.nodes:
+            path.append(node_id)
+            node_id = self.nodes[node_id]["parent_id"]
+        return path
+
+    def _add_stats(self, node_id, segment_delta, word_delta):
+        stats = self._stats.setdefault(node_id, {"segment_count": 0, "word_count": 0})
+        stats["segment_count"] += segment_delta
+        stats["word_count"] += word_delta
+        self._emit_changed(node_id, [self.STATS_ROLE])
+
+    def stats_text(self, node_id):
+        stats = self._stats.get(node_id)
+        if not stats or stats["segment_count"] == 0:
+            return ""
+        percentage = (
+            (stats["word_count"] / self._total_words * 100)
+            if self._total_words > 0
+            else 0
+        )
+        return f"{percentage:.1f}% | {stats['segment_count']} Segments"
+
+    def _emit_changed(self, node_id, roles=()):
+        index = self.index_of(node_id)
+        if index.isValid():
+            self.dataChanged.emit(index, index, list(roles))
+
+    # Drag and drop: moves are written to the database, whose NodeMoved and
+    # NodesReordered events reload the tree. Coded segments dragged from the
+    # segment list onto a node are recoded to it (SegmentMoved).
+
+    def supportedDropActions(self):
+        return Qt.DropAction.MoveAction
+
+    def mimeTypes(self):
+        return [NODE_MIME_TYPE, SEGMENT_MIME_TYPE]
+
+    def mimeData(self, indexes):
+        mime_data = QMimeData()
+        if indexes:
+            node_id = indexes[0].internalId()
+            mime_data.setData(NODE_MIME_TYPE, QByteArray(str(node_id).encode()))
+        return mime_data
+
+    def _dropped_node(self, data, parent):
+        if not data.hasFormat(NODE_MIME_TYPE):
+            return None
+        node_id = int(bytes(data.data(NODE_MIME_TYPE)).decode())
+        parent_id = parent.internalId() if parent.isValid() else None
+        if node_id not in self.nodes:
+            return None
+        if parent_id == node_id or parent_id in self.descendant_ids(node_id):
+            return None
+        return node_id
+
+    def _dropped_segments(self, data, row, parent):
+        # Segments go onto a node, not between nodes
+        if not data.hasFormat(SEGMENT_MIME_TYPE) or row != -1 or not parent.isValid():
+            return []
+        return [int(i) for i in bytes(data.data(SEGMENT_MIME_TYPE)).decode().split(",")]
+
+    def canDropMimeData(self, data, action, row, column, parent):
+        return (
+            self._dropped_node(data, parent) is not None
+            or len(self._dropped_segments(data, row, parent)) > 0
+        )
+
+    def dropMimeData(self, data, action, row, column, parent):
+        segment_ids = self._dropped_segments(data, row, parent)
+        if segment_ids:
+            with database.session():
+                for segment_id in segment_ids:
+                    database.move_coded_segment(segment_id, parent.internalId())
+            return True
+        node_id = self._dropped_node(data, parent)
+        if node_id is None:
+            return False
+        parent_id = parent.internalId() if parent.isValid() else None
+        siblings = [i for i in self.children.get(parent_id, ()) if i != node_id]
+        if row < 0 or row > len(siblings):
+            row = len(siblings)
+        elif (
+            self.nodes[node_id]["parent_id"] == parent_id and self._rows[node_id] < row
+        ):
+            row -= 1
+        siblings.insert(row, node_id)
+        if self.nodes[node_id]["parent_id"] != parent_id:
+            database.update_node_parent(node_id, parent_id)
+        database.update_node_order([(i, sibling) for i, sibling in enumerate(siblings)])
+        # The rows are not removed here; the reload after the events moves them
+        return True
+
+
+class NodeItemDelegate(QStyledItemDelegate):
+    """
+    Paints a node row: colour swatch, outline-numbered name, statistics and,
+    while the mouse is over the row, its action buttons. Clicks on the swatch
+    or a button emit action_triggered instead of selecting the row.
+    """
+
+    ROW_HEIGHT = 30
+    SWATCH_SIZE = 18
+    BUTTON_SIZE = 24
+    SPACING = 5
+    ACTIONS = [
+        ("export", "download", "Export this node and its children"),
+        ("filter", "filter_list", "Filter by this node only"),
+        ("add_child", "add", "Add a child node"),
+        ("rename", "edit", "Rename node (F2)"),
+        ("delete", "delete", "Delete node and its children (Delete)"),
+    ]
+    COLOR_ACTION = "color"
+    COLOR_TOOLTIP = "Click to change node color"
+
+    action_triggered = Signal(str, int, object)  # action, node_id, global QPoint
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._icons = {action: MaterialIcon(icon) for action, icon, _ in self.ACTIONS}
+        self._tooltips = {action: tooltip for action, _, tooltip in self.ACTIONS}
+        self._tooltips[self.COLOR_ACTION] = self.COLOR_TOOLTIP
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def _button_rects(self, rect, with_actions):
+        """(swatch rect, {action: rect}) of a row drawn in rect."""
+        top = rect.center().y() - self.SWATCH_SIZE // 2
+        swatch = QRect(rect.left() + 2, top, self.SWATCH_SIZE, self.SWATCH_SIZE)
+        buttons = {}
+        if with_actions:
+            right = rect.right() - self.SPACING
+            top = rect.center().y() - self.BUTTON_SIZE // 2
+            for action, _, _ in reversed(self.ACTIONS):
+                right -= self.BUTTON_SIZE
+                buttons[action] = QRect(
+                    right + 1, top, self.BUTTON_SIZE, self.BUTTON_SIZE
+                )
+        return swatch, buttons
+
+    def _shows_actions(self, option):
+        return bool(option.state & QStyle.StateFlag.State_MouseOver)
+
+    def paint(self, painter, option, index):
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        name = opt.text
+        opt.text = ""
+        widget = opt.widget
+        style = widget.style() if widget else QApplication.style()
+        # Background, selection and focus, without the text
+        style.drawControl(QStyle.ControlElement.CE_ItemViewItem, opt, painter, widget)
+
+        rect = option.rect
+        selected = bool(option.state & QStyle.StateFlag.State_Selected)
+        swatch, buttons = self._button_rects(rect, self._shows_actions(option))
+        painter.save()
+        painter.setPen(QPen(QColor("#888")))
+        painter.setBrush(QColor(index.data(NodeTreeModel.COLOR_ROLE) or "#FFFFFF"))
+        painter.drawRect(swatch.adjusted(0, 0, -1, -1))
+
+        text_left = swatch.right() + 1 + self.SPACING
+        text_right = (
+            min(r.left() for r in buttons.values()) if buttons else rect.right()
+        ) - self.SPACING
+        metrics = opt.fontMetrics
+        stats = index.data(NodeTreeModel.STATS_ROLE) or ""
+        if stats:
+            stats_width = metrics.horizontalAdvance(stats)
+            stats_rect = QRect(
+                text_right - stats_width, rect.top(), stats_width, rect.height()
+            )
+            painter.setPen(QColor("white") if selected else QColor("#888"))
+            painter.drawText(
+                stats_rect,
+                Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignRight,
+                stats,
+            )
+            text_right = stats_rect.left() - self.SPACING
+
+        name_rect = QRect(
+            text_left, rect.top(), max(0, text_right - text_left), rect.height()
+        )
+        palette = opt.palette
+        painter.setPen(
+            palette.highlightedText().color() if selected else palette.text().color()
+        )
+        painter.drawText(
+            name_rect,
+            Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft,
+            metrics.elidedText(name, Qt.TextElideMode.ElideRight, name_rect.width()),
+        )
+        for action, button in buttons.items():
+            self._icons[action].paint(painter, button.adjusted(3, 3, -3, -3))
+        painter.restore()
+
+    def _action_at(self, option, position):
+        # The pointer is over the row, so its buttons are showing
+        swatch, buttons = self._button_rects(option.rect, True)
+        if swatch.contains(position):
+            return self.COLOR_ACTION
+        for action, button in buttons.items():
+            if button.contains(position):
+                return action
+        return None
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() not in (
+            QEvent.Type.MouseButtonPress,
+            QEvent.Type.MouseButtonRelease,
+            QEvent.Type.MouseButtonDblClick,
+        ):
+            return super().editorEvent(event, model, option, index)
+        if event.button() != Qt.MouseButton.LeftButton:
+            return False
+        action = self._action_at(option, event.position().toPoint())
+        if action is None:
+            return False
+        if event.type() == QEvent.Type.MouseButtonRelease:
+            self.action_triggered.emit(
+                action, index.internalId(), event.globalPosition().toPoint()
+            )
+        # Swallow the press too, so clicking a button does not select the row
+        return True
+
+    def helpEvent(self, event, view, option, index):
+        if event.type() == QEvent.Type.ToolTip and index.isValid():
+            action = self._action_at(option, event.pos())
+            if action is not None:
+                QToolTip.showText(event.globalPos(), self._tooltips[action], view)
+                return True
+        return super().helpEvent(event, view, option, index)
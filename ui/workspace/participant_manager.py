@@ -15,6 +15,12 @@ from PySide6.QtCore import Signal, Qt
 from PySide6.QtGui import QKeyEvent
 from qt_material_icons import MaterialIcon
 
+from managers.data_events import (
+    APPLY,
+    SKIP,
+    DataVersionTracker,
+    get_data_event_bridge,
+)
 import database
 
 
@@ -87,6 +93,9 @@ class ParticipantItemWidget(QWidget):
         layout.addWidget(self.edit_button)
         layout.addWidget(self.delete_button)
 
+    def set_stats_text(self, stats_text):
+        self.stats_label.setText(stats_text)
+
     def set_icons_visible(self, visible):
         self.edit_button.setVisible(visible)
         self.delete_button.setVisible(visible)
@@ -114,6 +123,11 @@ class ParticipantManager(QWidget):
         super().__init__()
         self.project_id = project_id
         self.current_document_id = None
+        self._item_widgets = {}
+        self._participant_stats = {}
+        self._total_words = 0
+        self._document_participant_id = None
+        self._data_version = DataVersionTracker(project_id)
 
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(0, 0, 0, 0)
@@ -156,6 +170,7 @@ class ParticipantManager(QWidget):
         main_layout.addWidget(self.list_widget)
 
         self.scope_combo.currentTextChanged.connect(self.load_participants)
+        get_data_event_bridge().changed.connect(self.on_data_event)
         self.load_participants()
 
     def set_current_document_id(self, doc_id):
@@ -187,60 +202,90 @@ class ParticipantManager(QWidget):
             pass  # Signal was not connected
 
         self.list_widget.clear()
+        self._item_widgets = {}
+        self._data_version.mark_loaded()
         participants = database.get_participants_for_project(self.project_id)
 
         scope = self.scope_combo.currentText()
         total_words = 0
-        all_segments_in_scope = []
+        participant_stats = {}
+        self._document_participant_id = None
 
         if scope == "Current Document":
             if self.current_document_id:
                 total_words = database.get_document_word_count(self.current_document_id)
-                all_segments_in_scope = database.get_coded_segments_for_document(
+                participant_stats = database.get_participant_statistics(
+                    self.project_id, self.current_document_id
+                )
+                # Document-scope stats count every segment for the document's participant
+                self._document_participant_id = database.get_participant_for_document(
                     self.current_document_id
                 )
         else:  # Project Total
             total_words = database.get_project_word_count(self.project_id)
-            all_segments_in_scope = database.get_coded_segments_for_project(
-                self.project_id
-            )
+            participant_stats = database.get_participant_statistics(self.project_id)
+        self._participant_stats = participant_stats
+        self._total_words = total_words
 
         if not participants:
             item = QListWidgetItem("No participants created.", self.list_widget)
             item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsSelectable)
         else:
             for p in sorted(participants, key=lambda x: x["name"]):
-                participant_id = p["id"]
-
-                # Filter segments for the current participant
-                participant_segments = [
-                    seg
-                    for seg in all_segments_in_scope
-                    if seg["participant_id"] == participant_id
-                ]
-
-                segment_count = len(participant_segments)
-                word_count = sum(
-                    len(seg["content_preview"].split()) for seg in participant_segments
-                )
-
-                stats_text = ""
-                if segment_count > 0 and total_words > 0:
-                    percentage = (word_count / total_words) * 100
-                    stats_text = f"{percentage:.1f}% | {segment_count} Segments"
-                elif segment_count > 0:
-                    stats_text = f"{segment_count} Segments"
-
                 list_item = QListWidgetItem(self.list_widget)
                 item_widget = ParticipantItemWidget(
-                    p["id"], p["name"], stats_text, self
+                    p["id"], p["name"], self._stats_text(p["id"]), self
                 )
                 list_item.setSizeHint(item_widget.sizeHint())
                 self.list_widget.addItem(list_item)
                 self.list_widget.setItemWidget(list_item, item_widget)
+                self._item_widgets[p["id"]] = item_widget
 
         self.list_widget.currentItemChanged.connect(self.on_selection_changed)
 
+    def _stats_text(self, participant_id):
+        stats = self._participant_stats.get(
+            participant_id, {"word_count": 0, "segment_count": 0}
+        )
+        segment_count = stats["segment_count"]
+        word_count = stats["word_count"]
+        if segment_count > 0 and self._total_words > 0:
+            percentage = (word_count / self._total_words) * 100
+            return f"{percentage:.1f}% | {segment_count} Segments"
+        elif segment_count > 0:
+            return f"{segment_count} Segments"
+        return ""
+
+    def on_data_event(self, event):
+        """Applies one database change to the stats without reloading the list."""
+        action = self._data_version.check(event)
+        if action == SKIP:
+            return
+        if action != APPLY or isinstance(event, database.NodeDeleted):
+            self.load_participants()
+            return
+        if isinstance(event, database.DocumentEdited):
+            if event.rebased_segment_ids:
+                self.load_participants()
+            return
+        if isinstance(event, (database.SegmentAdded, database.SegmentDeleted)):
+            if self.scope_combo.currentText() == "Current Document":
+                if event.document_id != self.current_document_id:
+                    return
+                participant_id = self._document_participant_id
+            else:
+                participant_id = event.participant_id
+            item_widget = self._item_widgets.get(participant_id)
+            if item_widget is None:
+                return
+            sign = 1 if isinstance(event, database.SegmentAdded) else -1
+            stats = self._participant_stats.setdefault(
+                participant_id, {"word_count": 0, "segment_count": 0}
+            )
+            stats["segment_count"] += sign
+            stats["word_count"] += sign * event.word_count
+            item_widget.set_stats_text(self._stats_text(participant_id))
+
     def add_participant(self):
         name, ok = QInputDialog.getText(
             self, "Add Participant", "Enter participant's name:"
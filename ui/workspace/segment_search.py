@@ -0,0 +1,187 @@
+import time
+from collections import deque
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+
+class _SearchRun:
+    """One query being matched against a list of candidate store indices."""
+
+    def __init__(self, text, field, candidates):
+        self.text = text
+        self.field = field
+        self.candidates = candidates
+        self.position = 0
+        self.matches = []
+        self.shown = False
+
+    def remaining(self):
+        """Rows this query could still show: matches so far plus those unchecked."""
+        return self.matches + self.candidates[self.position :]
+
+
+class SegmentSearch(QObject):
+    """
+    Filters a SegmentTableModel as the user types. Keystrokes are debounced,
+    and matching runs in slices between event loop turns, so typing stays
+    responsive: a newer query drops the slices left of an older one, and
+    matches reach the view as each slice finds them.
+
+    A query that extends the previous one (same field, longer text) only
+    re-checks the rows the previous one kept, or could still have kept if it
+    was interrupted.
+
+    Latency is measured from the last keystroke a query answers (earlier
+    ones were superseded while typing) to the first rows shown and to the
+    complete result. The last hundred are kept in `latencies`, which
+    bench_segment_list reports; nothing is printed or logged.
+    """
+
+    DEBOUNCE_MS = 100
+    CHUNK_SIZE = 10000
+    SLICE_MS = 12
+
+    finished = Signal(int)  # match count
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.timeout.connect(self._start_pending)
+        self._step_timer = QTimer(self)
+        self._step_timer.setSingleShot(True)
+        self._step_timer.setInterval(0)
+        self._step_timer.timeout.connect(self._step)
+        self._pending = None
+        self._run = None
+        self._applied = None  # (text, field) answered by model.rows, once complete
+        self._applied_rows = None
+        self._keystrokes = []  # perf_counter() of keystrokes not yet answered
+        self._answering = None  # (keystrokes, first_rows_at) of the running query
+        # (text, keystrokes, first_rows_ms, complete_ms) per query
+        self.latencies = deque(maxlen=100)
+
+    def request(self, text, field):
+        """Queues a query typed by the user; it runs once typing pauses."""
+        self._keystrokes.append(time.perf_counter())
+        self._pending = (text, field)
+        self._debounce.start(self.DEBOUNCE_MS)
+
+    def run_now(self, text, field):
+        """Starts a query without waiting, e.g. after the rows were reloaded."""
+        self._debounce.stop()
+        self._pending = None
+        self._begin(text, field)
+
+    def reset(self):
+        """Stops any query; call when the model's rows are replaced some other way."""
+        self._debounce.stop()
+        self._step_timer.stop()
+        self._pending = None
+        self._run = None
+        self._applied = None
+        self._applied_rows = None
+        self._keystrokes = []
+        self._answering = None
+
+    def restart(self):
+        """Runs the current query again over every row, e.g. after rows changed mid-run."""
+        run = self._run
+        if run is not None:
+            self._run = None
+            self._begin(run.text, run.field)
+
+    def is_running(self):
+        return self._run is not None or self._pending is not None
+
+    def applied_query(self):
+        """(text, field) the rows on display answer completely, or None."""
+        if self._run is not None or self._applied_rows is not self.model.rows:
+            return None
+        return self._applied
+
+    def _start_pending(self):
+        if self._pending is not None:
+            text, field = self._pending
+            self._pending = None
+            self._begin(text, field)
+
+    def _begin(self, text, field):
+        previous = self._run
+        self._run = None
+        self._step_timer.stop()
+        if not text:
+            self._applied = None
+            self._applied_rows = None
+            self.model.set_rows(self.model.order)
+            self._answered()
+            self._complete(text, len(self.model.rows))
+            return
+
+        if previous is not None and _refines(
+            text, field, previous.text, previous.field
+        ):
+            candidates = previous.remaining()
+        elif self.applied_query() and _refines(text, field, *self._applied):
+            candidates = self.model.rows
+        else:
+            candidates = self.model.order
+        self._applied = None
+        self._applied_rows = None
+        self._run = _SearchRun(text, field, candidates)
+        self._step()
+
+    def _step(self):
+        run = self._run
+        if run is None:
+            return
+        deadline = time.perf_counter() + self.SLICE_MS / 1000
+        matching = self.model.store.matching
+        found = []
+        while run.position < len(run.candidates):
+            chunk = run.candidates[run.position : run.position + self.CHUNK_SIZE]
+            run.position += len(chunk)
+            found.extend(matching(chunk, run.text, run.field))
+            if time.perf_counter() >= deadline:
+                break
+        done = run.position >= len(run.candidates)
+
+        if run.shown:
+            self.model.extend_rows(found)
+        else:
+            run.matches.extend(found)
+            # Keep the previous rows up until there is something to replace them
+            if run.matches or done:
+                self.model.set_rows(run.matches)
+                run.shown = True
+                self._answered()
+
+        if not done:
+            self._step_timer.start()
+            return
+        self._run = None
+        self._applied = (run.text, run.field)
+        self._applied_rows = run.matches
+        self._complete(run.text, len(run.matches))
+
+    def _answered(self):
+        """Notes that the keystrokes waiting on the current query now see rows."""
+        self._answering = (self._keystrokes, time.perf_counter())
+        self._keystrokes = []
+
+    def _complete(self, text, count):
+        if self._answering is not None:
+            keystrokes, first_rows_at = self._answering
+            self._answering = None
+            if keystrokes:
+                now = time.perf_counter()
+                first_ms = (first_rows_at - keystrokes[-1]) * 1000
+                complete_ms = (now - keystrokes[-1]) * 1000
+                self.latencies.append((text, len(keystrokes), first_ms, complete_ms))
+        self.finished.emit(count)
+
+
+def _refines(text, field, previous_text, previous_field):
+    """Whether every row matching text also matches the previous query."""
+    return field == previous_field and text.startswith(previous_text)
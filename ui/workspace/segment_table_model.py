@@ -0,0 +1,398 @@
+from bisect import bisect_left
+from itertools import compress, repeat
+from operator import contains
+
+from PySide6.QtCore import QAbstractTableModel, QByteArray, QMimeData, QModelIndex, Qt
+from PySide6.QtGui import QFont
+
+import database
+
+PREVIEW_DISPLAY_LENGTH = 100
+# Dragged rows carry their segment ids, comma separated; see NodeTreeModel
+SEGMENT_MIME_TYPE = "application/x-nodeflow-segment-ids"
+DELETED_TEXT_TOOLTIP = (
+    "The coded text was deleted from the document; review this segment."
+)
+
+
+class SegmentStore:
+    """
+    Column-oriented coded segments: one list per field, indexed by position
+    in the store (plain lists index faster than array.array in the filter
+    loops). Node, participant and document names are kept once per id, so
+    renaming a node touches a single entry and filtering by name only
+    compares the distinct names.
+
+    Searches scan `texts`, each segment's full text in lower case, taken
+    from its document (or its stored text) once when the segment is added;
+    the documents read for it are kept for segments added later.
+
+    The store only grows; removed segments simply stop being referenced by
+    the model's row lists. It holds no Qt objects and can be built on a
+    worker thread.
+    """
+
+    def __init__(self, by_document_title=False):
+        self.by_document_title = by_document_title
+        self.ids = []
+        self.document_ids = []
+        self.node_ids = []
+        self.participant_ids = []  # 0 when there is none
+        self.starts = []
+        self.ends = []
+        self.flags = []  # DERIVED | DELETED
+        self.previews = []
+        self.texts = []  # full text in lower case, searched by matching()
+        self.node_names = {}
+        self.participant_names = {}
+        self.document_titles = {}
+        self.index_of = {}  # segment_id -> store index
+        self._lowered_documents = {}
+
+    DERIVED = 1
+    DELETED = 2
+
+    def __len__(self):
+        return len(self.ids)
+
+    def append(self, segment):
+        index = len(self.ids)
+        participant_id = segment.get("participant_id") or 0
+        self.ids.append(segment["id"])
+        self.document_ids.append(segment["document_id"])
+        self.node_ids.append(segment["node_id"])
+        self.participant_ids.append(participant_id)
+        self.starts.append(segment["segment_start"])
+        self.ends.append(segment["segment_end"])
+        flags = 0
+        if segment.get("text_derived"):
+            flags |= self.DERIVED
+        if segment.get("text_deleted"):
+            flags |= self.DELETED
+        self.flags.append(flags)
+        preview = segment["content_preview"].strip()
+        if len(preview) > PREVIEW_DISPLAY_LENGTH:
+            preview = preview[:PREVIEW_DISPLAY_LENGTH] + "..."
+        self.previews.append(preview)
+        if flags == self.DERIVED:
+            text = self._lowered_document(segment["document_id"])
+            self.texts.append(text[segment["segment_start"] : segment["segment_end"]])
+        else:
+            self.texts.append(segment["content_preview"].lower())
+        self.node_names[segment["node_id"]] = segment["node_name"]
+        if participant_id:
+            self.participant_names[participant_id] = segment.get("participant_name")
+        self.document_titles.setdefault(
+            segment["document_id"], segment.get("document_title") or ""
+        )
+        self.index_of[segment["id"]] = index
+        return index
+
+    def sort_key(self, index):
+        """Matches the ORDER BY of the query that loaded the scope."""
+        if self.by_document_title:
+            return (self.document_titles[self.document_ids[index]], self.ids[index])
+        return (self.starts[index], self.ids[index])
+
+    def segment(self, index):
+        return {
+            "id": self.ids[index],
+            "document_id": self.document_ids[index],
+            "node_id": self.node_ids[index],
+            "participant_id": self.participant_ids[index] or None,
+            "segment_start": self.starts[index],
+            "segment_end": self.ends[index],
+        }
+
+    def matching(self, indices, search_text, field):
+        """
+        The store indices from `indices` whose field contains search_text
+        (lower case), in the same order. field is "All", "Coded Text",
+        "Node", "Participant" or "Document", as in the view's search combo.
+        """
+        columns = []
+        if field in ("All", "Node"):
+            columns.append((self.node_ids, self.node_names))
+        if field in ("All", "Participant"):
+            columns.append((self.participant_ids, self.participant_names))
+        if field in ("All", "Document") and self.by_document_title:
+            columns.append((self.document_ids, self.document_titles))
+        # One selector per column, each a C-level pass over indices
+        selectors = []
+        for ids, names in columns:
+            wanted = _ids_matching(names, search_text)
+            if wanted:
+                selectors.append(
+                    map(wanted.__contains__, map(ids.__getitem__, indices))
+                )
+        if field in ("All", "Coded Text"):
+            selectors.append(
+                map(contains, map(self.texts.__getitem__, indices), repeat(search_text))
+            )
+        if not selectors:
+            return []
+        if len(selectors) == 1:
+            return list(compress(indices, selectors[0]))
+        return list(compress(indices, map(any, zip(*selectors))))
+
+    def forget_document_text(self, document_id):
+        """
+        Drops the lower-cased copy of a document whose text was edited. The
+        texts of its segments stay valid: an edit that changes any of them
+        rebases them, and the view reloads.
+        """
+        self._lowered_documents.pop(document_id, None)
+
+    def _lowered_document(self, document_id):
+        text = self._lowered_documents.get(document_id)
+        if text is None:
+            content, _ = database.get_document_content(document_id)
+            text = content.lower()
+            if len(text) != len(content):
+                # Lower-casing changed some lengths, which would shift offsets
+                text = "".join(c if len(c.lower()) != 1 else c.lower() for c in content)
+            self._lowered_documents[document_id] = text
+        return text
+
+
+def _ids_matching(names, search_text):
+    return {key for key, name in names.items() if name and search_text in name.lower()}
+
+
+def load_segment_store(project_id=None, document_id=None):
+    """Reads the segments of a document, or of a whole project, into a SegmentStore."""
+    if document_id is not None:
+        segments = database.get_coded_segments_for_document(document_id)
+        store = SegmentStore()
+    else:
+        segments = database.get_coded_segments_for_project(project_id)
+        store = SegmentStore(by_document_title=True)
+    for segment in segments:
+        store.append(segment)
+    # Read every document here, off the GUI thread, for segments added later
+    for document_id in store.document_titles:
+        store._lowered_document(document_id)
+    return store
+
+
+class SegmentTableModel(QAbstractTableModel):
+    """
+    Table over a SegmentStore. `order` lists every segment in scope, sorted;
+    `rows` is the filtered subset on display. Rows are handed to the view in
+    batches through fetchMore, so showing or re-filtering a large project only
+    lays out what is scrolled into view.
+    """
+
+    BATCH_SIZE = 100
+    SEGMENT_ID_ROLE = Qt.ItemDataRole.UserRole
+    ROW_FLAGS = (
+        Qt.ItemFlag.ItemIsSelectable
+        | Qt.ItemFlag.ItemIsEnabled
+        | Qt.ItemFlag.ItemNeverHasChildren
+        | Qt.ItemFlag.ItemIsDragEnabled
+    )
+    DATA_ROLES = frozenset(
+        {
+            Qt.ItemDataRole.DisplayRole,
+            SEGMENT_ID_ROLE,
+            Qt.ItemDataRole.FontRole,
+            Qt.ItemDataRole.ToolTipRole,
+        }
+    )
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.store = SegmentStore()
+        self.order = []
+        self.rows = []
+        self._headers = []
+        self._fetched = 0
+        self._italic_font = QFont()
+        self._italic_font.setItalic(True)
+
+    def set_store(self, store, headers):
+        self.beginResetModel()
+        self.store = store
+        self._headers = headers
+        # load_segment_store appends in the query's ORDER BY, which sort_key matches
+        self.order = list(range(len(store)))
+        self.rows = self.order
+        self._fetched = min(self.BATCH_SIZE, len(self.rows))
+        self.endResetModel()
+
+    def headers(self):
+        return list(self._headers)
+
+    def set_rows(self, rows):
+        """Shows the given store indices, which must be in `order` order."""
+        self.beginResetModel()
+        self.rows = rows
+        self._fetched = min(self.BATCH_SIZE, len(rows))
+        self.endResetModel()
+
+    def extend_rows(self, rows):
+        """Appends store indices after the shown rows, e.g. as a search finds them."""
+        if not rows:
+            return
+        self.rows.extend(rows)
+        if self._fetched < self.BATCH_SIZE:
+            self._fetch_to(self.BATCH_SIZE)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._fetched
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._headers)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (
+            orientation == Qt.Orientation.Horizontal
+            and role == Qt.ItemDataRole.DisplayRole
+            and section < len(self._headers)
+        ):
+            return self._headers[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        # Views ask for many roles per painted cell; most are answered here
+        if role not in self.DATA_ROLES or not index.isValid():
+            return None
+        i = self.rows[index.row()]
+        store = self.store
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return store.previews[i]
+            if column == 1:
+                return store.node_names.get(store.node_ids[i], "")
+            if column == 2:
+                return store.participant_names.get(store.participant_ids[i]) or "N/A"
+            if column == 3 and store.by_document_title:
+                return store.document_titles.get(store.document_ids[i], "")
+            return None
+        if role == self.SEGMENT_ID_ROLE:
+            return store.ids[i]
+        if column == 0 and store.flags[i] & SegmentStore.DELETED:
+            if role == Qt.ItemDataRole.FontRole:
+                return self._italic_font
+            if role == Qt.ItemDataRole.ToolTipRole:
+                return DELETED_TEXT_TOOLTIP
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._fetched < len(self.rows)
+
+    def fetchMore(self, parent=QModelIndex()):
+        self._fetch_to(self._fetched + self.BATCH_SIZE)
+
+    def _fetch_to(self, count):
+        count = min(count, len(self.rows))
+        if count <= self._fetched:
+            return
+        self.beginInsertRows(QModelIndex(), self._fetched, count - 1)
+        self._fetched = count
+        self.endInsertRows()
+
+    def segment_id(self, row):
+        return self.store.ids[self.rows[row]]
+
+    def flags(self, index):
+        # Called for every painted cell, so the combined flags are built once
+        if index.isValid():
+            return self.ROW_FLAGS
+        return super().flags(index)
+
+    def supportedDragActions(self):
+        return Qt.DropAction.MoveAction
+
+    def mimeTypes(self):
+        return [SEGMENT_MIME_TYPE]
+
+    def mimeData(self, indexes):
+        """Drags the segments of the given rows, e.g. onto a node to recode them."""
+        rows = sorted({index.row() for index in indexes if index.isValid()})
+        ids = ",".join(str(self.segment_id(row)) for row in rows)
+        mime_data = QMimeData()
+        mime_data.setData(SEGMENT_MIME_TYPE, QByteArray(ids.encode()))
+        return mime_data
+
+    def segment_at(self, row):
+        return self.store.segment(self.rows[row])
+
+    def preview(self, row):
+        return self.store.previews[self.rows[row]]
+
+    def row_of(self, segment_id):
+        """Row showing a segment, fetching up to it if needed; None if filtered out."""
+        i = self.store.index_of.get(segment_id)
+        if i is None:
+            return None
+        row = bisect_left(self.rows, self.store.sort_key(i), key=self.store.sort_key)
+        if row >= len(self.rows) or self.rows[row] != i:
+            return None
+        self._fetch_to(row + 1)
+        return row
+
+    def insert_segment(self, segment, is_visible):
+        """
+        Adds a segment dict to the store and to `order`. While a filter is
+        applied, it is shown only if is_visible(store_index) says so.
+        """
+        store = self.store
+        i = store.append(segment)
+        key = store.sort_key(i)
+        position = bisect_left(self.order, key, key=store.sort_key)
+        if self.rows is self.order:
+            self._insert_row(self.order, position, i)
+            return
+        self.order.insert(position, i)
+        if is_visible(i):
+            row = bisect_left(self.rows, key, key=store.sort_key)
+            self._insert_row(self.rows, row, i)
+
+    def remove_segments(self, segment_ids):
+        store = self.store
+        for segment_id in segment_ids:
+            i = store.index_of.pop(segment_id, None)
+            if i is None:
+                continue
+            key = store.sort_key(i)
+            if self.rows is not self.order:
+                row = bisect_left(self.rows, key, key=store.sort_key)
+                if row < len(self.rows) and self.rows[row] == i:
+                    self._remove_row(self.rows, row)
+                del self.order[bisect_left(self.order, key, key=store.sort_key)]
+            else:
+                self._remove_row(
+                    self.order, bisect_left(self.order, key, key=store.sort_key)
+                )
+
+    def _insert_row(self, rows, row, i):
+        # Rows past the fetched block reach the view through fetchMore later
+        if row < self._fetched or self._fetched == len(rows):
+            self.beginInsertRows(QModelIndex(), row, row)
+            rows.insert(row, i)
+            self._fetched += 1
+            self.endInsertRows()
+        else:
+            rows.insert(row, i)
+
+    def _remove_row(self, rows, row):
+        if row < self._fetched:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del rows[row]
+            self._fetched -= 1
+            self.endRemoveRows()
+        else:
+            del rows[row]
+
+    def segment_ids_of_nodes(self, node_ids):
+        store = self.store
+        return [store.ids[i] for i in self.order if store.node_ids[i] in node_ids]
+
+    def rename_node(self, node_id, name):
+        if node_id not in self.store.node_names:
+            return
+        self.store.node_names[node_id] = name
+        if self._fetched:
+            self.dataChanged.emit(self.index(0, 1), self.index(self._fetched - 1, 1))
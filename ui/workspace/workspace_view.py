@@ -22,9 +22,15 @@ from .participant_manager import ParticipantManager
 from .node_tree_manager import NodeTreeManager
 from .content_view import ContentView
 from .coded_segments_view import CodedSegmentsView
+from .export_jobs_view import ExportJobsView
 from ui.dashboard.dashboard_view import DashboardView
 
-from managers.export_manager import export_to_word, export_to_json, export_to_excel
+from managers.export_manager import (
+    export_to_word,
+    export_to_json,
+    export_to_excel,
+    export_to_table,
+)
 from managers.theme_manager import save_settings, load_settings
 import database
 from qt_material_icons import MaterialIcon
@@ -44,6 +50,16 @@ class SettingsDialog(QDialog):
         self.theme_combo.addItems(["Default", "Light", "Dark"])
         self.theme_combo.setCurrentText(self.settings.get("theme", "Default"))
         form_layout.addRow(QLabel("Application Theme:"), self.theme_combo)
+        self.storage_combo = QComboBox()
+        self.storage_combo.addItems(list(database.STORAGE_PROFILES.keys()))
+        self.storage_combo.setCurrentText(
+            self.settings.get("storage_profile", database.DEFAULT_STORAGE_PROFILE)
+        )
+        self.storage_combo.setToolTip(
+            "Database tuning: 'compatibility' uses SQLite defaults, "
+            "'large_project' uses more memory for big projects"
+        )
+        form_layout.addRow(QLabel("Storage Profile:"), self.storage_combo)
         layout.addLayout(form_layout)
         button_box = QDialogButtonBox(
             QDialogButtonBox.StandardButton.Save
@@ -55,11 +71,12 @@ class SettingsDialog(QDialog):
 
     def save_and_apply(self):
         self.settings["theme"] = self.theme_combo.currentText()
+        self.settings["storage_profile"] = self.storage_combo.currentText()
         save_settings(self.settings)
         QMessageBox.information(
             self,
             "Settings Saved",
-            "The new theme will be applied when you restart the application.",
+            "The new theme and storage profile will be applied when you restart the application.",
         )
         self.accept()
 
@@ -103,8 +120,13 @@ class WorkspaceView(QWidget):
         self.action_export_json = export_menu.addAction("Export as JSON (.json)")
         self.action_export_word = export_menu.addAction("Export as Word (.docx)")
         self.action_export_excel = export_menu.addAction("Export as Excel (.xlsx)")
+        self.action_export_table = export_menu.addAction(
+            "Export as Table (.parquet, .arrow, .csv)"
+        )
         export_button.setMenu(export_menu)
+        self.export_jobs_view = ExportJobsView()
         self.left_pane_layout.addStretch()
+        self.left_pane_layout.addWidget(self.export_jobs_view)
         self.left_pane_layout.addWidget(export_button)
         self.left_pane_layout.setStretchFactor(self.participant_manager, 2)
         self.left_pane_layout.setStretchFactor(self.node_tree_manager, 5)
@@ -130,11 +152,11 @@ class WorkspaceView(QWidget):
         self.center_pane.node_clicked_in_content.connect(
             self.node_tree_manager.highlight_node_by_id
         )
-        self.bottom_pane.segment_deleted.connect(self.on_segment_deleted)
         self.bottom_pane.segment_activated.connect(self.on_segment_navigation_requested)
         self.action_export_json.triggered.connect(self.export_as_json)
         self.action_export_word.triggered.connect(self.export_as_word)
         self.action_export_excel.triggered.connect(self.export_as_excel)
+        self.action_export_table.triggered.connect(self.export_as_table)
         self.node_tree_manager.filter_by_node_family_signal.connect(
             self.bottom_pane.filter_by_node_family
         )
@@ -144,9 +166,10 @@ class WorkspaceView(QWidget):
         self.participant_manager.participant_selected.connect(
             self.bottom_pane.filter_segments_by_participant
         )
-        self.center_pane.segments_changed.connect(self.on_segments_changed)
+        # Segment and node changes reach each view as database change events
+        # (managers/data_events.py); only document and participant changes,
+        # which reshape the document list, still refresh the whole workspace
         self.participant_manager.participant_updated.connect(self.refresh_all_views)
-        self.node_tree_manager.node_updated.connect(self.on_node_data_updated)
         self.center_pane.text_selection_changed.connect(
             self.node_tree_manager.set_selection_mode
         )
@@ -180,15 +203,6 @@ class WorkspaceView(QWidget):
         dialog = SettingsDialog(self)
         dialog.exec()
 
-    def on_segment_deleted(self):
-        self.center_pane.apply_all_highlights()
-        self.node_tree_manager.load_nodes()
-
-    def on_node_data_updated(self):
-        """Called when a node is changed. Refreshes text highlights and all views."""
-        self.center_pane.apply_all_highlights()
-        self.refresh_all_views()
-
     def on_document_added(self, new_doc_id):
         """Catches the new document's ID and triggers a refresh."""
         self._last_added_doc_id = new_doc_id
@@ -217,12 +231,15 @@ class WorkspaceView(QWidget):
     def export_as_excel(self):
         export_to_excel(self.project_id, self)
 
+    def export_as_table(self):
+        export_to_table(self.project_id, self)
+
     def on_document_changed(self):
         QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
         try:
             doc_id = self.center_pane.current_document_id
             self.bottom_pane.load_segments(doc_id)
-            self.node_tree_manager.tree_widget.clearSelection()
+            self.node_tree_manager.tree_view.clearSelection()
             self.node_tree_manager.set_current_document_id(doc_id)
             self.participant_manager.set_current_document_id(doc_id)
             self.participant_manager.load_participants()
@@ -236,16 +253,6 @@ class WorkspaceView(QWidget):
         finally:
             QApplication.restoreOverrideCursor()
 
-    def on_segments_changed(self):
-        """
-        Called when segments are added or deleted.
-        Reloads all relevant views.
-        """
-        doc_id = self.center_pane.current_document_id
-        self.bottom_pane.load_segments(doc_id)
-        self.node_tree_manager.load_nodes()
-        self.participant_manager.load_participants()
-
     def code_selection(self, node_id):
         text_edit = self.center_pane.text_edit
         cursor = text_edit.textCursor()
@@ -260,11 +267,25 @@ class WorkspaceView(QWidget):
         participant_id = self.center_pane.current_participant_id
         if not doc_id:
             return
+        if self.center_pane.is_dirty:
+            # Stored offsets refer to the text as loaded; unsaved edits move
+            # them when the document is saved
+            original = self.center_pane.original_range(start, end)
+            if original is None:
+                reply = QMessageBox.question(
+                    self,
+                    "Unsaved Changes",
+                    "The selection starts or ends in text that has not been saved. Save the document before coding it?",
+                    QMessageBox.StandardButton.Save | QMessageBox.StandardButton.Cancel,
+                    QMessageBox.StandardButton.Save,
+                )
+                if reply != QMessageBox.StandardButton.Save:
+                    return
+                self.center_pane.save_document(show_success_prompt=False)
+            else:
+                start, end = original
+        # The SegmentAdded event updates each view in place
         database.add_coded_segment(doc_id, node_id, participant_id, start, end, text)
-        self.bottom_pane.reload_view()
-        self.center_pane.apply_all_highlights()
-        self.node_tree_manager.load_nodes()
-        self.participant_manager.load_participants()
         new_cursor = text_edit.textCursor()
         new_cursor.setPosition(selection_end_pos)
         text_edit.setTextCursor(new_cursor)
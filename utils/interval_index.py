@@ -0,0 +1,167 @@
+import random
+
+
+class _Node:
+    __slots__ = ("start", "end", "key", "max_end", "priority", "left", "right")
+
+    def __init__(self, start, end, key, priority):
+        self.start = start
+        self.end = end
+        self.key = key
+        self.max_end = end
+        self.priority = priority
+        self.left = None
+        self.right = None
+
+    def update(self):
+        max_end = self.end
+        if self.left is not None and self.left.max_end > max_end:
+            max_end = self.left.max_end
+        if self.right is not None and self.right.max_end > max_end:
+            max_end = self.right.max_end
+        self.max_end = max_end
+
+
+class IntervalIndex:
+    """
+    Half-open [start, end) intervals, each stored under a unique, orderable key
+    (segment ids), answering "which intervals cover this position or range".
+
+    Intervals live in a treap ordered by (start, key) in which every node also
+    holds the largest end in its subtree. A query skips any subtree that ends
+    before the range and stops at the first start past it, so one long
+    interval (a segment spanning the whole document) costs one extra path,
+    not a scan. Adding or removing an interval costs O(log n) and a query
+    O(log n + k) for k results, all expected.
+    """
+
+    def __init__(self, intervals=()):
+        self._nodes = {}  # key -> _Node
+        self._random = random.Random()
+        for start, end, key in intervals:
+            self._nodes[key] = _Node(start, end, key, self._random.random())
+        self._root = self._build(
+            sorted(self._nodes.values(), key=lambda n: (n.start, n.key))
+        )
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, key):
+        return key in self._nodes
+
+    def add(self, start, end, key):
+        if key in self._nodes:
+            self.remove(key)
+        node = self._nodes[key] = _Node(start, end, key, self._random.random())
+        self._root = self._insert(self._root, node)
+
+    def remove(self, key):
+        node = self._nodes.pop(key, None)
+        if node is not None:
+            self._root = self._delete(self._root, (node.start, key))
+
+    def span(self, key):
+        node = self._nodes[key]
+        return node.start, node.end
+
+    def at(self, position):
+        """Keys of every interval covering position, in start order."""
+        return self.overlapping(position, position + 1)
+
+    def overlapping(self, start, end):
+        """Keys of every interval that overlaps [start, end), in start order."""
+        keys = []
+        self._collect(self._root, start, end, keys)
+        return keys
+
+    @classmethod
+    def _collect(cls, node, start, end, keys):
+        # In order, so keys come out sorted by (start, key)
+        while node is not None and node.max_end > start:
+            cls._collect(node.left, start, end, keys)
+            if node.start >= end:
+                return
+            if node.end > start:
+                keys.append(node.key)
+            node = node.right
+
+    @staticmethod
+    def _build(nodes):
+        """Treap over nodes sorted by (start, key), built in O(n)."""
+        stack = []
+        for node in nodes:
+            last = None
+            while stack and stack[-1].priority < node.priority:
+                last = stack.pop()
+                last.update()  # its subtree is final once popped
+            node.left = last
+            if stack:
+                stack[-1].right = node
+            stack.append(node)
+        root = stack[0] if stack else None
+        while stack:
+            stack.pop().update()
+        return root
+
+    @classmethod
+    def _insert(cls, node, new):
+        if node is None:
+            return new
+        if (new.start, new.key) < (node.start, node.key):
+            node.left = cls._insert(node.left, new)
+            if node.left.priority > node.priority:
+                node = cls._rotate_right(node)
+        else:
+            node.right = cls._insert(node.right, new)
+            if node.right.priority > node.priority:
+                node = cls._rotate_left(node)
+        node.update()
+        return node
+
+    @classmethod
+    def _delete(cls, node, order):
+        if node is None:
+            return None
+        node_order = (node.start, node.key)
+        if order < node_order:
+            node.left = cls._delete(node.left, order)
+        elif node_order < order:
+            node.right = cls._delete(node.right, order)
+        else:
+            return cls._merge(node.left, node.right)
+        node.update()
+        return node
+
+    @classmethod
+    def _merge(cls, left, right):
+        """Joins two treaps, every interval of left ordered before right's."""
+        if left is None:
+            return right
+        if right is None:
+            return left
+        if left.priority > right.priority:
+            left.right = cls._merge(left.right, right)
+            left.update()
+            return left
+        right.left = cls._merge(left, right.left)
+        right.update()
+        return right
+
+    @staticmethod
+    def _rotate_right(node):
+        pivot = node.left
+        node.left = pivot.right
+        pivot.right = node
+        node.update()
+        pivot.update()
+        return pivot
+
+    @staticmethod
+    def _rotate_left(node):
+        pivot = node.right
+        node.right = pivot.left
+        pivot.left = node
+        node.update()
+        pivot.update()
+        return pivot
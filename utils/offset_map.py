@@ -0,0 +1,155 @@
+from bisect import bisect_left, bisect_right
+
+
+class OffsetMap:
+    """
+    Maps character offsets in a document as it was loaded to offsets in the
+    text after a series of edits, so stored segment ranges can follow the text.
+
+    Edits are recorded as (position, removed, added), in the coordinates of the
+    text at the time of the edit, which is what QTextDocument.contentsChange
+    reports. Offsets are Qt positions (UTF-16 code units) throughout, so the
+    length given must be the document's length in those units.
+
+    Internally the map keeps the runs of original text that survive, as sorted
+    lists of their original starts and ends, and a Fenwick tree over original
+    offsets whose prefix sums give each surviving offset's shift. The tree is
+    a dict holding only the nodes edits have touched, so a new map allocates
+    nothing however long the document, and memory grows as O(edits * log
+    length). Recording an edit costs O(log runs * log length) plus the runs it
+    splits or removes, so a session of edits costs O(edits) such steps;
+    mapping an offset costs the same.
+    """
+
+    def __init__(self, length):
+        self._starts = [0] if length > 0 else []  # original starts of the runs
+        self._ends = [length] if length > 0 else []  # original ends, same order
+        self._tree = {}  # Fenwick tree nodes 1..length + 1, absent ones are 0
+        self._size = length + 1
+        self._edited = False
+
+    def is_empty(self):
+        """True until an edit has been recorded."""
+        return not self._edited
+
+    def _shift(self, offset):
+        """New offset minus original offset, for a surviving original offset."""
+        tree = self._tree
+        total = 0
+        i = offset + 1
+        while i > 0:
+            total += tree.get(i, 0)
+            i -= i & -i
+        return total
+
+    def _shift_from(self, offset, delta):
+        """Moves every original offset from offset on by delta."""
+        tree = self._tree
+        i = offset + 1
+        while i <= self._size:
+            tree[i] = tree.get(i, 0) + delta
+            i += i & -i
+
+    def _new_start(self, index):
+        start = self._starts[index]
+        return start + self._shift(start)
+
+    def _run_at(self, position):
+        """Index of the first run whose new end is after position."""
+        low, high = 0, len(self._starts)
+        while low < high:
+            middle = (low + high) // 2
+            new_end = (
+                self._new_start(middle) + self._ends[middle] - self._starts[middle]
+            )
+            if new_end <= position:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def first_changed(self):
+        """Smallest original offset whose text or position was changed by an edit."""
+        if not self._edited:
+            return None
+        offset = 0
+        for start, end in zip(self._starts, self._ends):
+            if start != offset or self._shift(start):
+                return offset
+            offset = end
+        return offset
+
+    def record(self, position, removed, added):
+        """Records that removed characters at position were replaced by added ones."""
+        if not removed and not added:
+            return
+        self._edited = True
+        cut_end = position + removed
+        first = index = self._run_at(position)
+        # Only the first overlapped run can keep a head before the cut and
+        # only the last a tail after it
+        head = tail = None
+        while index < len(self._starts):
+            start, end = self._starts[index], self._ends[index]
+            new_start = self._new_start(index)
+            if new_start >= cut_end:
+                break
+            if new_start < position:
+                head = (start, start + position - new_start)
+            if new_start + end - start > cut_end:
+                tail = (start + cut_end - new_start, end)
+            index += 1
+        kept = [run for run in (head, tail) if run is not None]
+        self._starts[first:index] = [start for start, _ in kept]
+        self._ends[first:index] = [end for _, end in kept]
+        # The tail, or else the first run after the cut, and every run after it
+        # move by the delta; the deleted offsets in between are never looked up
+        moved = first + (head is not None)
+        if moved < len(self._starts) and added != removed:
+            self._shift_from(self._starts[moved], added - removed)
+
+    def map_range(self, start, end):
+        """
+        New (start, end) of an original half-open range. Text inserted strictly
+        inside the range extends it; text inserted at either edge does not.
+        Returns None when every character of the range was deleted.
+        """
+        first = bisect_right(self._ends, start)
+        last = bisect_left(self._starts, end) - 1
+        if first > last or first >= len(self._starts):
+            return None
+        run_start = self._starts[first]
+        mapped_start = max(start, run_start) + self._shift(run_start)
+        run_start, run_end = self._starts[last], self._ends[last]
+        mapped_end = min(end, run_end) + self._shift(run_start)
+        return mapped_start, mapped_end
+
+    def is_intact(self, start, end):
+        """True when no edit touched the text of an original range (it may have moved)."""
+        index = bisect_right(self._ends, start)
+        if index >= len(self._starts):
+            return False
+        return self._starts[index] <= start and end <= self._ends[index]
+
+    def map_position(self, position):
+        """New offset of the first surviving original character at or after position."""
+        index = bisect_right(self._ends, position)
+        if index < len(self._starts):
+            run_start = self._starts[index]
+            return max(position, run_start) + self._shift(run_start)
+        if self._starts:
+            return self._ends[-1] + self._shift(self._starts[-1])
+        return 0
+
+    def to_original(self, position):
+        """
+        Original offset of the character now at position. Inserted text maps to
+        the first surviving original character after it.
+        """
+        index = self._run_at(position)
+        if index < len(self._starts):
+            new_start = self._new_start(index)
+            if new_start <= position:
+                return self._starts[index] + position - new_start
+            return self._starts[index]
+        return self._ends[-1] if self._starts else 0